@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+#By Isabella Zuluaga Yusti
+
+"""
+Persistent BLAST result cache.
+
+This module stores parsed BLAST hits on disk so that repeated searches of the
+same sequence against the same database with the same parameters can skip
+the BLAST subprocess completely.
+
+Cache keys combine:
+- a hash of the query sequence
+- the fingerprint of the database (changes on rebuild or re-download)
+- the normalized BLAST parameter set
+
+Entries live in a SQLite file and are evicted least-recently-used first once
+the cache grows beyond its size limit.
+
+Typical usage:
+    cache = BlastCache(".blast_cache/blast_cache.sqlite", max_bytes=1_000_000_000)
+    key = cache.make_key(sequence, fingerprint, params_key)
+    hits = cache.get(key)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any
+
+
+class BlastCache:
+    """
+    Size-bounded, content-addressed cache of BLAST hits backed by SQLite.
+
+    Attributes:
+        cache_path (str): Path to the SQLite cache file.
+        max_bytes (int): Maximum total size of stored hit payloads.
+    """
+
+    def __init__(self, cache_path: str, max_bytes: int) -> None:
+        """
+        Open (or create) the cache file.
+
+        Args:
+            cache_path (str): Path to the SQLite cache file.
+            max_bytes (int): Maximum total size of stored hit payloads in bytes.
+        """
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._connection = sqlite3.connect(cache_path, timeout=60)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS blast_cache ("
+            " cache_key TEXT PRIMARY KEY,"
+            " hits TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS blast_cache_last_used ON blast_cache (last_used)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def make_key(query_sequence: str, db_fingerprint: str, params_key: str) -> str:
+        """
+        Build the cache key for one query/database/parameter combination.
+
+        Args:
+            query_sequence (str): Query sequence string.
+            db_fingerprint (str): Fingerprint of the database version.
+            params_key (str): Normalized BLAST parameter string.
+
+        Returns:
+            str: Hex digest cache key.
+        """
+        sequence_hash = hashlib.sha256(query_sequence.upper().encode("utf-8")).hexdigest()
+        key_source = f"{sequence_hash}\t{db_fingerprint}\t{params_key}"
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    def get(self, cache_key: str) -> list[dict[str, Any]] | None:
+        """
+        Return cached hits for a key, or None on a cache miss.
+
+        Args:
+            cache_key (str): Key from make_key().
+
+        Returns:
+            list[dict[str, Any]] | None: Cached hits (possibly empty), or None.
+        """
+        return self.get_many([cache_key]).get(cache_key)
+
+    def get_many(self, cache_keys: list[str]) -> dict[str, list[dict[str, Any]]]:
+        """
+        Return cached hits for several keys.
+
+        The last-used time of every hit is updated in one statement and one
+        commit for the whole batch, so a lookup costs one write, not one
+        per query.
+
+        Args:
+            cache_keys (list[str]): Keys from make_key().
+
+        Returns:
+            dict[str, list[dict[str, Any]]]: Cached hits {cache_key: hits}
+            for the keys found; missing keys are left out.
+        """
+        found: dict[str, list[dict[str, Any]]] = {}
+
+        for cache_key in cache_keys:
+            row = self._connection.execute(
+                "SELECT hits FROM blast_cache WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+
+            if row is not None:
+                found[cache_key] = json.loads(row[0])
+
+        if found:
+            now = time.time()
+            self._connection.executemany(
+                "UPDATE blast_cache SET last_used = ? WHERE cache_key = ?",
+                ((now, cache_key) for cache_key in found),
+            )
+            self._connection.commit()
+
+        return found
+
+    def put_many(self, entries: dict[str, list[dict[str, Any]]]) -> None:
+        """
+        Store hits for several keys and evict old entries if needed.
+
+        Args:
+            entries (dict[str, list[dict[str, Any]]]): Mapping {cache_key: hits}.
+        """
+        if not entries:
+            return
+
+        now = time.time()
+        rows = []
+
+        for cache_key, hits in entries.items():
+            payload = json.dumps(hits, separators=(",", ":"))
+            rows.append((cache_key, payload, len(payload), now))
+
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO blast_cache (cache_key, hits, size, last_used) "
+            "VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        self._connection.commit()
+
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Delete least-recently-used entries until the cache fits in max_bytes.
+        """
+        total_size = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blast_cache"
+        ).fetchone()[0]
+
+        if total_size <= self.max_bytes:
+            return
+
+        excess = total_size - self.max_bytes
+        doomed: list[tuple[str]] = []
+
+        for cache_key, size in self._connection.execute(
+            "SELECT cache_key, size FROM blast_cache ORDER BY last_used ASC"
+        ):
+            if excess <= 0:
+                break
+            doomed.append((cache_key,))
+            excess -= size
+
+        self._connection.executemany(
+            "DELETE FROM blast_cache WHERE cache_key = ?",
+            doomed,
+        )
+        self._connection.commit()
+
+    def close(self) -> None:
+        """
+        Close the underlying SQLite connection.
+        """
+        self._connection.close()
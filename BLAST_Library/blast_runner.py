@@ -21,7 +21,47 @@ import shutil
 import subprocess
 import sys
 import tempfile
-from typing import Any
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator
+
+from blast_cache import BlastCache
+from config import classifier_thresholds, config_flag
+from hit_table import HitTable
+from database_manager import (
+    SubjectDatabaseMap,
+    alias_members,
+    database_fingerprint,
+    get_alias_database,
+    shard_volumes,
+)
+from sketch import SketchRouter
+
+
+def _run_blast_job(
+    blast_params: dict[str, Any],
+    query_sequences: dict[str, str],
+    database: str,
+    num_threads: int,
+) -> dict[str, list[dict[str, Any]]]:
+    """
+    Worker entry point for one (query chunk, database) job.
+
+    Defined at module level so it can be pickled by ProcessPoolExecutor.
+
+    Args:
+        blast_params (dict[str, Any]): BLAST parameter dictionary.
+        query_sequences (dict[str, str]): Query chunk {query_id: sequence}.
+        database (str): BLAST database prefix path.
+        num_threads (int): Threads given to this BLAST process.
+
+    Returns:
+        dict[str, list[dict[str, Any]]]: Hits per query for this job.
+    """
+    job_params = dict(blast_params)
+    job_params["num_threads"] = num_threads
+    return BlastRunner(job_params).run_blast_batch(query_sequences, database)
 
 
 class BlastRunner:
@@ -57,6 +97,8 @@ class BlastRunner:
         """
         self.blast_params = blast_params
         self.program: str = str(blast_params.get("program", "blastn"))
+        self._cache: BlastCache | None = None
+        self._fingerprints: dict[str, str] = {}
 
     def check_blast_program(self) -> None:
         """
@@ -97,12 +139,278 @@ class BlastRunner:
 
         return temp_handle.name
 
+    def format_query_batch(self, query_sequences: dict[str, str]) -> tuple[list[str], dict[str, str]]:
+        """
+        Format several query sequences as multi-FASTA records for BLAST stdin.
+
+        Each record is written under a short internal identifier (q0, q1, ...)
+        so that BLAST reports a predictable qseqid regardless of how the
+        original FASTA headers look.
+
+        Args:
+            query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+
+        Returns:
+            tuple[list[str], dict[str, str]]: FASTA records (one string per
+            query) and a mapping {internal_id: query_id} used to split the
+            BLAST output.
+        """
+        records: list[str] = []
+        id_map: dict[str, str] = {}
+
+        for index, (query_id, query_sequence) in enumerate(query_sequences.items()):
+            internal_id = f"q{index}"
+            id_map[internal_id] = query_id
+            records.append(f">{internal_id}\n{query_sequence}\n")
+
+        return records, id_map
+
+    def chunk_queries(
+        self,
+        query_sequences: dict[str, str],
+        chunk_size: int,
+    ) -> list[dict[str, str]]:
+        """
+        Split the query dictionary into consecutive chunks of at most chunk_size.
+
+        Args:
+            query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+            chunk_size (int): Maximum number of queries per chunk.
+
+        Returns:
+            list[dict[str, str]]: Query chunks, in the original query order.
+        """
+        chunk_size = max(1, int(chunk_size))
+        chunks: list[dict[str, str]] = []
+        current: dict[str, str] = {}
+
+        for query_id, query_sequence in query_sequences.items():
+            current[query_id] = query_sequence
+
+            if len(current) >= chunk_size:
+                chunks.append(current)
+                current = {}
+
+        if current:
+            chunks.append(current)
+
+        return chunks
+
+    def get_cache(self) -> BlastCache | None:
+        """
+        Return the persistent result cache, opening it on first use.
+
+        The cache is enabled by setting 'cache_file' in the configuration;
+        'cache_max_mb' bounds its size.
+
+        Returns:
+            BlastCache | None: The cache, or None if caching is disabled.
+        """
+        cache_file: str = str(self.blast_params.get("cache_file", "")).strip()
+
+        if not cache_file or cache_file.lower() in ("none", "nan"):
+            return None
+
+        if self._cache is None:
+            max_mb: float = float(self.blast_params.get("cache_max_mb", 1024))
+            self._cache = BlastCache(cache_file, int(max_mb * 1_000_000))
+
+        return self._cache
+
+    def blast_params_key(self) -> str:
+        """
+        Return the normalized BLAST parameter set used in cache keys.
+
+        The key is the command from build_blast_command() without the query,
+        database, and thread count, which do not change the hits, plus any
+        parse-time filters, which do.
+
+        Returns:
+            str: Normalized parameter string.
+        """
+        cmd: list[str] = self.build_blast_command("-", "-")
+        skipped_options = ("-query", "-db", "-num_threads")
+        normalized: list[str] = [cmd[0]]
+
+        index = 1
+        while index < len(cmd):
+            option = cmd[index]
+            value = cmd[index + 1] if index + 1 < len(cmd) else ""
+
+            if option not in skipped_options:
+                normalized.append(f"{option}={value}")
+
+            index += 2
+
+        filters = self.hit_filters()
+
+        if filters is not None:
+            normalized.append(
+                f"filters=evalue<={filters['evalue']},identity>={filters['identity']},top_k={filters['top_k']}"
+            )
+
+        return " ".join(normalized)
+
+    def cache_keys(self, query_sequences: dict[str, str], database: str) -> dict[str, str]:
+        """
+        Build cache keys for a set of queries searched against one database.
+
+        Args:
+            query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+            database (str): BLAST database prefix path.
+
+        Returns:
+            dict[str, str]: Mapping {query_id: cache_key}.
+        """
+        if database not in self._fingerprints:
+            self._fingerprints[database] = database_fingerprint(database)
+
+        db_fingerprint: str = self._fingerprints[database]
+        params_key: str = self.blast_params_key()
+
+        return {
+            query_id: BlastCache.make_key(query_sequence, db_fingerprint, params_key)
+            for query_id, query_sequence in query_sequences.items()
+        }
+
+    def lookup_cached(
+        self,
+        query_sequences: dict[str, str],
+        database: str,
+    ) -> tuple[dict[str, list[dict[str, Any]]], dict[str, str]]:
+        """
+        Split queries into cache hits and queries that still need a search.
+
+        Args:
+            query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+            database (str): BLAST database prefix path.
+
+        Returns:
+            tuple[dict[str, list[dict[str, Any]]], dict[str, str]]: Cached hits
+            per query, and the remaining {query_id: sequence} to search.
+        """
+        cache = self.get_cache()
+
+        if cache is None:
+            return {}, query_sequences
+
+        keys: dict[str, str] = self.cache_keys(query_sequences, database)
+        found = cache.get_many(list(keys.values()))
+        cached_results: dict[str, list[dict[str, Any]]] = {}
+        uncached: dict[str, str] = {}
+
+        for query_id, query_sequence in query_sequences.items():
+            if keys[query_id] not in found:
+                uncached[query_id] = query_sequence
+                continue
+
+            # Identical sequences share one key, so each query gets its own copy
+            cached_hits = [dict(hit) for hit in found[keys[query_id]]]
+
+            for hit in cached_hits:
+                hit["query_id"] = query_id
+            cached_results[query_id] = cached_hits
+
+        if cached_results:
+            sys.stdout.write(
+                f"Cache hits for {len(cached_results)} queries "
+                f"against database '{os.path.basename(database)}'.\n"
+            )
+
+        return cached_results, uncached
+
+    def store_cached(
+        self,
+        query_sequences: dict[str, str],
+        results: dict[str, list[dict[str, Any]]],
+        database: str,
+    ) -> None:
+        """
+        Store freshly searched hits in the cache, if caching is enabled.
+
+        Args:
+            query_sequences (dict[str, str]): The queries that were searched.
+            results (dict[str, list[dict[str, Any]]]): Hits per query.
+            database (str): BLAST database prefix path.
+        """
+        cache = self.get_cache()
+
+        if cache is None or not query_sequences:
+            return
+
+        keys: dict[str, str] = self.cache_keys(query_sequences, database)
+
+        cache.put_many({
+            keys[query_id]: self._strip_query_ids(results.get(query_id, []))
+            for query_id in query_sequences
+        })
+
+    def hit_filters(self) -> dict[str, float] | None:
+        """
+        Return the classifier filters to apply while parsing, if enabled.
+
+        With 'pushdown_filters' turned on, hits that fail the classifier's
+        thresholds (see config.classifier_thresholds, the same values
+        --classify uses) are dropped as soon as their output line is read,
+        and at most 'top_k_per_query' hits per query and database are kept.
+
+        Returns:
+            dict[str, float] | None: {'evalue', 'identity', 'top_k'}, the keys
+            classifier.load_result_filters reads back, or None if pushdown
+            is disabled.
+        """
+        if not config_flag(self.blast_params, "pushdown_filters"):
+            return None
+
+        evalue_threshold, identity_threshold = classifier_thresholds(self.blast_params)
+
+        return {
+            "evalue": evalue_threshold,
+            "identity": identity_threshold,
+            "top_k": int(self.blast_params.get("top_k_per_query", 0)),
+        }
+
+    @staticmethod
+    def apply_top_k(hits: list[dict[str, Any]], top_k: int) -> list[dict[str, Any]]:
+        """
+        Keep the top_k best hits of one query against one database.
+
+        Ranking follows the classifier within a single database: bit score
+        (desc), E-value (asc), identity (desc). The lowest bit score is kept
+        as well, because the classifier min-max normalizes bit scores per
+        database and needs that minimum. Kept hits stay in their original
+        order so classifier tie-breaking is unchanged.
+
+        Args:
+            hits (list[dict[str, Any]]): Hits of one query against one database.
+            top_k (int): Number of hits to keep; 0 keeps everything.
+
+        Returns:
+            list[dict[str, Any]]: The kept hits.
+        """
+        if top_k <= 0 or len(hits) <= top_k + 1:
+            return hits
+
+        ranked: list[int] = sorted(
+            range(len(hits)),
+            key=lambda index: (
+                -hits[index]["bitscore"],
+                hits[index]["evalue"],
+                -hits[index]["identity"],
+            ),
+        )
+
+        keep: set[int] = set(ranked[:top_k])
+        keep.add(min(range(len(hits)), key=lambda index: hits[index]["bitscore"]))
+
+        return [hit for index, hit in enumerate(hits) if index in keep]
+
     def build_blast_command(self, query_fasta: str, database_path: str) -> list[str]:
         """
         Build the BLAST command using stored configuration parameters.
 
         Args:
-            query_fasta (str): Path to the temporary FASTA query file.
+            query_fasta (str): Path to the FASTA query file, or '-' for stdin.
             database_path (str): BLAST database prefix path.
 
         Returns:
@@ -126,37 +434,54 @@ class BlastRunner:
             "-dust", dust,
         ]
 
+        task = self.blast_params.get("task")
+
+        if task is not None and task == task and str(task).strip():
+            cmd.extend(["-task", str(task).strip()])
+
         if float(self.blast_params.get("perc_identity", 0)) > 0:
             cmd.extend(["-perc_identity", str(self.blast_params["perc_identity"])])
 
         if float(self.blast_params.get("query_coverage", 0)) > 0:
             cmd.extend(["-qcov_hsp_perc", str(self.blast_params["query_coverage"])])
 
+        if int(float(self.blast_params.get("dbsize", 0))) > 0:
+            cmd.extend(["-dbsize", str(int(float(self.blast_params["dbsize"])))])
+
         return cmd
 
-    def parse_blast_output(self, stdout_text: str, database_name: str) -> list[dict[str, Any]]:
+    def iter_blast_hits(
+        self,
+        lines: Iterable[str],
+        database_name: str,
+        filters: dict[str, float] | None = None,
+    ) -> Iterator[dict[str, Any]]:
         """
-        Parse BLAST tabular output into a list of hit dictionaries.
+        Parse BLAST tabular output line by line, yielding one hit at a time.
 
         Args:
-            stdout_text (str): Raw BLAST stdout in outfmt 6 format.
+            lines (Iterable[str]): Lines of BLAST outfmt 6 output, e.g. a pipe.
             database_name (str): Name of the source database.
+            filters (dict[str, float] | None): Optional thresholds from
+                hit_filters(); failing lines are skipped before a hit dict
+                is built.
 
-        Returns:
-            list[dict[str, Any]]: Parsed BLAST hits.
+        Yields:
+            dict[str, Any]: Parsed BLAST hit.
         """
-        hits: list[dict[str, Any]] = []
-
-        if not stdout_text.strip():
-            return hits
+        max_evalue: float = filters["evalue"] if filters else float("inf")
+        min_identity: float = filters["identity"] if filters else float("-inf")
 
-        for line in stdout_text.strip().splitlines():
-            parts: list[str] = line.split("\t")
+        for line in lines:
+            parts: list[str] = line.rstrip("\n").split("\t")
 
             if len(parts) != 12:
                 continue
 
-            hit: dict[str, Any] = {
+            if filters and (float(parts[10]) > max_evalue or float(parts[2]) < min_identity):
+                continue
+
+            yield {
                 "database": database_name,
                 "query_id": parts[0],
                 "subject_id": parts[1],
@@ -172,9 +497,108 @@ class BlastRunner:
                 "bitscore": float(parts[11]),
             }
 
-            hits.append(hit)
+    def parse_blast_output(self, stdout_text: str, database_name: str) -> list[dict[str, Any]]:
+        """
+        Parse BLAST tabular output into a list of hit dictionaries.
 
-        return hits
+        Args:
+            stdout_text (str): Raw BLAST stdout in outfmt 6 format.
+            database_name (str): Name of the source database.
+
+        Returns:
+            list[dict[str, Any]]: Parsed BLAST hits.
+        """
+        return list(self.iter_blast_hits(stdout_text.splitlines(), database_name))
+
+    def stream_blast(
+        self,
+        cmd: list[str],
+        fasta_records: Iterable[str],
+        database_name: str,
+        filters: dict[str, float] | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Run BLAST with queries fed through stdin and parse hits as they arrive.
+
+        The output is read from a pipe line by line instead of being buffered
+        as one string, so memory grows only with the hits the caller keeps.
+        Stdin is written and stderr is drained on helper threads to avoid
+        pipe deadlocks.
+
+        Args:
+            cmd (list[str]): Command from build_blast_command() with query '-'.
+            fasta_records (Iterable[str]): FASTA text records to send to stdin.
+            database_name (str): Name of the source database.
+            filters (dict[str, float] | None): Optional parse-time thresholds.
+
+        Yields:
+            dict[str, Any]: Parsed BLAST hit.
+
+        Raises:
+            RuntimeError: If BLAST exits with a non-zero return code.
+        """
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1 << 16,
+        )
+
+        stderr_lines: list[str] = []
+
+        def feed_stdin() -> None:
+            try:
+                for record in fasta_records:
+                    process.stdin.write(record)
+                process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+
+        def drain_stderr() -> None:
+            for line in process.stderr:
+                stderr_lines.append(line)
+
+        writer = threading.Thread(target=feed_stdin, daemon=True)
+        reader = threading.Thread(target=drain_stderr, daemon=True)
+        writer.start()
+        reader.start()
+
+        completed = False
+
+        try:
+            yield from self.iter_blast_hits(process.stdout, database_name, filters)
+            completed = True
+        finally:
+            if not completed:
+                process.kill()
+
+            process.stdout.close()
+            returncode = process.wait()
+            writer.join()
+            reader.join()
+            process.stderr.close()
+
+        if returncode != 0:
+            raise RuntimeError(
+                f"BLAST failed against '{database_name}' with return code {returncode}.\n"
+                f"Command: {' '.join(cmd)}\n"
+                f"STDERR:\n{''.join(stderr_lines)}"
+            )
+
+    @staticmethod
+    def _strip_query_ids(hits: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Return copies of hits without 'query_id', for storage in the cache.
+
+        Cached hits are keyed by sequence, so the same entry can be served to
+        any query ID that carries that sequence.
+        """
+        return [
+            {key: value for key, value in hit.items() if key != "query_id"}
+            for hit in hits
+        ]
 
     def run_blast(self, query_id: str, query_sequence: str, database: str) -> list[dict[str, Any]]:
         """
@@ -191,59 +615,709 @@ class BlastRunner:
         Raises:
             RuntimeError: If BLAST execution fails.
         """
+        cache = self.get_cache()
+        cache_key: str = ""
+
+        if cache is not None:
+            cache_key = self.cache_keys({query_id: query_sequence}, database)[query_id]
+            cached_hits = cache.get(cache_key)
+
+            if cached_hits is not None:
+                for hit in cached_hits:
+                    hit["query_id"] = query_id
+                return cached_hits
+
         self.check_blast_program()
 
         db_path: str = database
         db_name: str = os.path.basename(database)
 
-        query_fasta: str = self.write_temp_fasta(query_id, query_sequence)
+        cmd: list[str] = self.build_blast_command("-", db_path)
+
+        sys.stdout.write(
+            f"Running {self.program} for query '{query_id}' against database '{db_name}'...\n"
+        )
+
+        filters = self.hit_filters()
 
         try:
-            cmd: list[str] = self.build_blast_command(query_fasta, db_path)
+            hits: list[dict[str, Any]] = list(
+                self.stream_blast(cmd, [f">{query_id}\n{query_sequence}\n"], db_name, filters)
+            )
+        except RuntimeError as error:
+            raise RuntimeError(f"BLAST failed for query '{query_id}'.\n{error}") from error
+
+        if filters is not None:
+            hits = self.apply_top_k(hits, int(filters["top_k"]))
+
+        for hit in hits:
+            hit["query_id"] = query_id
+
+        if cache is not None:
+            cache.put_many({cache_key: self._strip_query_ids(hits)})
+
+        return hits
+
+    def run_blast_batch(
+        self,
+        query_sequences: dict[str, str],
+        database: str,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """
+        Run BLAST for a chunk of queries against one database in a single call.
+
+        All queries are streamed to BLAST's stdin as one multi-FASTA, so BLAST
+        is started and the database is loaded only once for the whole chunk.
+        The tabular output is parsed from the pipe and split back by qseqid.
+
+        Args:
+            query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+            database (str): BLAST database prefix path.
+
+        Returns:
+            dict[str, list[dict[str, Any]]]: Hits per query. Every query of the
+            chunk is present, queries without hits map to an empty list.
+
+        Raises:
+            RuntimeError: If BLAST execution fails.
+        """
+        db_path: str = database
+        db_name: str = os.path.basename(database)
+
+        chunk_results: dict[str, list[dict[str, Any]]] = {
+            query_id: [] for query_id in query_sequences
+        }
+
+        cached_results, query_sequences = self.lookup_cached(query_sequences, database)
+        chunk_results.update(cached_results)
+
+        if not query_sequences:
+            return chunk_results
+
+        self.check_blast_program()
+
+        fasta_records, id_map = self.format_query_batch(query_sequences)
+        cmd: list[str] = self.build_blast_command("-", db_path)
+
+        sys.stdout.write(
+            f"Running {self.program} for {len(query_sequences)} queries "
+            f"against database '{db_name}'...\n"
+        )
+
+        filters = self.hit_filters()
+
+        try:
+            for hit in self.stream_blast(cmd, fasta_records, db_name, filters):
+                query_id = id_map.get(hit["query_id"])
+
+                if query_id is None:
+                    continue
+
+                hit["query_id"] = query_id
+                chunk_results[query_id].append(hit)
+        except RuntimeError as error:
+            raise RuntimeError(
+                f"BLAST failed for a batch of {len(query_sequences)} queries.\n{error}"
+            ) from error
+
+        if filters is not None:
+            for query_id in query_sequences:
+                chunk_results[query_id] = self.apply_top_k(chunk_results[query_id], int(filters["top_k"]))
+
+        self.store_cached(query_sequences, chunk_results, database)
+        return chunk_results
+
+    def plan_core_budget(self, num_jobs: int) -> tuple[int, int]:
+        """
+        Split the machine-wide core budget between concurrent jobs and threads.
+
+        The budget comes from 'core_budget' in the configuration (0 means all
+        available CPUs). As many jobs as possible run side by side, since BLAST
+        scales poorly past a few threads on short queries; leftover cores are
+        handed out as extra threads per job, up to 'max_threads_per_job'.
 
+        Args:
+            num_jobs (int): Number of (query chunk, database) jobs to run.
+
+        Returns:
+            tuple[int, int]: (number of worker processes, threads per job).
+        """
+        core_budget: int = int(self.blast_params.get("core_budget", 1))
+
+        if core_budget <= 0:
+            core_budget = os.cpu_count() or 1
+
+        max_threads: int = max(1, int(self.blast_params.get("max_threads_per_job", 4)))
+
+        workers: int = max(1, min(num_jobs, core_budget))
+        threads_per_job: int = max(1, min(max_threads, core_budget // workers))
+
+        return workers, threads_per_job
+
+    def iter_blast_jobs(
+        self,
+        chunks: list[dict[str, str]],
+        databases: list[str],
+    ) -> Iterator[dict[str, list[dict[str, Any]]]]:
+        """
+        Run every (query chunk, database) pair as a job on a pool of workers.
+
+        Results are yielded chunk by chunk in the same order the serial path
+        produces, and within each query, database by database. Cached
+        queries are resolved up front, so only the remaining queries become
+        jobs.
+
+        Args:
+            chunks (list[dict[str, str]]): Query chunks from chunk_queries().
+            databases (list[str]): List of database prefix paths.
+
+        Yields:
+            dict[str, list[dict[str, Any]]]: Hits per query of one chunk
+            across all databases.
+        """
+        self.check_blast_program()
+
+        num_jobs: int = len(chunks) * len(databases)
+        workers, threads_per_job = self.plan_core_budget(num_jobs)
+
+        sys.stdout.write(
+            f"Scheduling {num_jobs} BLAST jobs on {workers} workers "
+            f"with {threads_per_job} threads each\n"
+        )
+
+        # The cache is read and written only here in the parent process;
+        # workers get a copy of the parameters with caching turned off.
+        worker_params: dict[str, Any] = {**self.blast_params, "cache_file": ""}
+        cached: dict[tuple[int, int], dict[str, list[dict[str, Any]]]] = {}
+        pending: dict[tuple[int, int], dict[str, str]] = {}
+
+        for chunk_index, chunk in enumerate(chunks):
+            for db_index, database in enumerate(databases):
+                job = (chunk_index, db_index)
+                cached[job], pending[job] = self.lookup_cached(chunk, database)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                job: executor.submit(
+                    _run_blast_job,
+                    worker_params,
+                    pending[job],
+                    databases[job[1]],
+                    threads_per_job,
+                )
+                for job in pending
+                if pending[job]
+            }
+
+            for chunk_index, chunk in enumerate(chunks):
+                merged: dict[str, list[dict[str, Any]]] = {query_id: [] for query_id in chunk}
+
+                for db_index, database in enumerate(databases):
+                    job = (chunk_index, db_index)
+                    chunk_results = cached.pop(job)
+
+                    if job in futures:
+                        searched = futures.pop(job).result()
+                        self.store_cached(pending[job], searched, database)
+                        chunk_results.update(searched)
+
+                    for query_id in chunk:
+                        merged[query_id].extend(chunk_results.get(query_id, []))
+
+                yield merged
+
+    def alias_database_for(self, databases: list[str]) -> str | None:
+        """
+        Return the alias database to search instead of databases, if any.
+
+        With 'search_mode' set to 'alias', a run over the whole catalog of
+        one database type is done as a single search of the alias
+        database spanning it. Runs over a subset of the catalog (e.g.
+        --db_name or --update) keep searching database by database.
+
+        Args:
+            databases (list[str]): List of database prefix paths.
+
+        Returns:
+            str | None: Alias database prefix, or None to search each database.
+        """
+        search_mode: str = str(self.blast_params.get("search_mode", "per_database")).lower()
+
+        if search_mode != "alias" or len(databases) < 2:
+            return None
+
+        db_type: str = "prot" if self.program in ("blastp", "blastx") else "nucl"
+        alias_prefix: str = get_alias_database(db_type, os.path.dirname(os.path.dirname(databases[0])))
+
+        if set(alias_members(alias_prefix)) != set(databases):
             sys.stdout.write(
-                f"Running {self.program} for query '{query_id}' against database '{db_name}'...\n"
+                "Selected databases differ from the alias database members; "
+                "searching each database separately.\n"
             )
+            return None
+
+        return alias_prefix
+
+    @staticmethod
+    def attribute_hits(
+        piece: dict[str, list[dict[str, Any]]],
+        subject_map: SubjectDatabaseMap,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """
+        Replace the alias database name of each hit with its source database.
+
+        Subjects missing from the map, or shared by several databases, keep
+        the alias database name.
+
+        Args:
+            piece (dict[str, list[dict[str, Any]]]): Hits per query from an alias search.
+            subject_map (SubjectDatabaseMap): Map built with the alias database.
+
+        Returns:
+            dict[str, list[dict[str, Any]]]: The same hits, attributed.
+        """
+        subject_ids: list[str] = [hit["subject_id"] for hits in piece.values() for hit in hits]
+        sources: dict[str, str] = subject_map.lookup(subject_ids)
+
+        for hits in piece.values():
+            for hit in hits:
+                hit["database"] = sources.get(hit["subject_id"], hit["database"])
+
+        return piece
+
+    @classmethod
+    def apply_top_k_per_database(
+        cls,
+        piece: dict[str, list[dict[str, Any]]],
+        top_k: int,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """
+        Apply apply_top_k() to the hits of every query and database in a piece.
+
+        Kept hits stay in their original order across databases, so
+        classifier tie-breaking is unchanged.
+
+        Args:
+            piece (dict[str, list[dict[str, Any]]]): Hits per query, from any
+                number of databases.
+            top_k (int): Number of hits to keep per query and database; 0
+                keeps everything.
+
+        Returns:
+            dict[str, list[dict[str, Any]]]: The kept hits per query.
+        """
+        if top_k <= 0:
+            return piece
+
+        for query_id, hits in piece.items():
+            per_database: dict[str, list[dict[str, Any]]] = {}
+
+            for hit in hits:
+                per_database.setdefault(hit["database"], []).append(hit)
+
+            keep: set[int] = {
+                id(hit)
+                for database_hits in per_database.values()
+                for hit in cls.apply_top_k(database_hits, top_k)
+            }
+            piece[query_id] = [hit for hit in hits if id(hit) in keep]
+
+        return piece
+
+    def route_queries(
+        self,
+        query_sequences: dict[str, str],
+        databases: list[str],
+    ) -> dict[str, list[str]] | None:
+        """
+        Pick the databases each query is searched against with the sketch prefilter.
+
+        With 'prefilter' enabled, every query is scored against the k-mer
+        sketch of each database and searched only against its
+        'prefilter_top_n' best databases (see SketchRouter.route). The
+        prefilter needs query and database in the same alphabet, so it only
+        applies to blastn and blastp.
+
+        Args:
+            query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+            databases (list[str]): List of database prefix paths.
+
+        Returns:
+            dict[str, list[str]] | None: {database: query IDs}, or None to
+            search every query against every database.
+        """
+        if not config_flag(self.blast_params, "prefilter") or len(databases) < 2:
+            return None
+
+        if self.program not in ("blastn", "blastp"):
+            sys.stdout.write(f"Prefilter does not apply to {self.program}; searching every database.\n")
+            return None
+
+        top_n: int = int(self.blast_params.get("prefilter_top_n", 1))
+
+        if top_n >= len(databases):
+            return None
+
+        start = time.perf_counter()
+        router = SketchRouter(databases, "prot" if self.program == "blastp" else "nucl")
+        routes = router.route(
+            query_sequences,
+            top_n,
+            float(self.blast_params.get("prefilter_min_containment", 0)),
+        )
+
+        planned: int = len(query_sequences) * len(databases)
+        routed: int = sum(len(query_ids) for query_ids in routes.values())
+        sys.stdout.write(
+            f"Prefilter kept {routed} of {planned} query/database searches "
+            f"in {time.perf_counter() - start:.2f} s"
+            + (f" ({len(router.unsketched)} databases without sketch)" if router.unsketched else "")
+            + ".\n"
+        )
+
+        return routes
+
+    def fans_out(self, databases: list[str]) -> bool:
+        """
+        Return True if sharded databases are searched volume by volume.
+
+        With 'shard_search' set to 'fanout', a database built in shards is
+        searched as separate volume jobs that run in parallel, instead of
+        as one search of its alias file.
+
+        Args:
+            databases (list[str]): List of database prefix paths.
+
+        Returns:
+            bool: True if any of the databases is searched per volume.
+        """
+        shard_search: str = str(self.blast_params.get("shard_search", "alias")).lower()
+        return shard_search == "fanout" and any(shard_volumes(database) for database in databases)
+
+    def merge_volume_hits(
+        self,
+        piece: dict[str, list[dict[str, Any]]],
+        database: str,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """
+        Combine the unfiltered hits of all volumes of one database into a
+        single list, as a single-volume search would have returned it.
+
+        Each volume lists its subjects best first, with the HSPs of one
+        subject together. Subjects of all volumes are ranked by their best
+        HSP (E-value, then bit score); ties keep the volume order, and each
+        subject keeps its HSPs in BLAST's order. Only the 'max_target_seqs'
+        best subjects are kept, since each volume returned its own best
+        subjects. Parse-time filters and the top-K filter are applied after
+        that cut, in the same order as for a single-volume search.
+
+        Args:
+            piece (dict[str, list[dict[str, Any]]]): Unfiltered hits per
+                query from the volumes, volume by volume.
+            database (str): Database prefix path the volumes belong to.
+
+        Returns:
+            dict[str, list[dict[str, Any]]]: Hits per query for the database.
+        """
+        db_name: str = os.path.basename(database)
+        max_target_seqs: int = int(self.blast_params.get("max_target_seqs", 10))
+        filters = self.hit_filters()
 
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=False,
+        for query_id, hits in piece.items():
+            subjects: dict[str, list[dict[str, Any]]] = {}
+
+            for hit in hits:
+                subjects.setdefault(hit["subject_id"], []).append(hit)
+
+            ranked = sorted(
+                subjects.values(),
+                key=lambda subject_hits: (
+                    min(hit["evalue"] for hit in subject_hits),
+                    -max(hit["bitscore"] for hit in subject_hits),
+                ),
             )
 
-            if result.returncode != 0:
-                raise RuntimeError(
-                    f"BLAST failed for query '{query_id}' against '{db_name}'.\n"
-                    f"Command: {' '.join(cmd)}\n"
-                    f"STDOUT:\n{result.stdout}\n"
-                    f"STDERR:\n{result.stderr}"
+            kept: list[dict[str, Any]] = [
+                hit for subject_hits in ranked[:max_target_seqs] for hit in subject_hits
+            ]
+
+            for hit in kept:
+                hit["database"] = db_name
+
+            if filters is not None:
+                kept = [
+                    hit for hit in kept
+                    if hit["evalue"] <= filters["evalue"] and hit["identity"] >= filters["identity"]
+                ]
+                kept = self.apply_top_k(kept, int(filters["top_k"]))
+
+            piece[query_id] = kept
+
+        return piece
+
+    def iter_single_database(
+        self,
+        query_sequences: dict[str, str],
+        database: str,
+    ) -> Iterator[dict[str, list[dict[str, Any]]]]:
+        """
+        Search queries against one database, fanning out across its volumes
+        when fans_out() applies to it.
+
+        Volume searches run with -dbsize set to the letters of the whole
+        database, so their E-values match a search of the combined database.
+
+        Args:
+            query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+            database (str): BLAST database prefix path.
+
+        Yields:
+            dict[str, list[dict[str, Any]]]: Hits per query for one piece.
+        """
+        volumes = shard_volumes(database) if self.fans_out([database]) else None
+
+        if volumes is None:
+            yield from self.iter_database_results(query_sequences, [database])
+            return
+
+        volume_prefixes, total_letters = volumes
+
+        # Volumes are searched unfiltered: filters and top-K only apply once
+        # the max_target_seqs best subjects of the whole database are known
+        volume_runner = BlastRunner({**self.blast_params, "dbsize": total_letters, "pushdown_filters": "no"})
+
+        for piece in volume_runner.iter_database_results(query_sequences, volume_prefixes):
+            yield self.merge_volume_hits(piece, database)
+
+    def iter_routed_results(
+        self,
+        query_sequences: dict[str, str],
+        routes: dict[str, list[str]],
+    ) -> Iterator[dict[str, list[dict[str, Any]]]]:
+        """
+        Search each database with only the queries routed to it.
+
+        Hits are gathered per query and yielded as one piece in query
+        order, with each query's hits in database order, exactly as an
+        unrouted search would list them.
+
+        Args:
+            query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+            routes (dict[str, list[str]]): {database: query IDs}, e.g. from
+                route_queries().
+
+        Yields:
+            dict[str, list[dict[str, Any]]]: Hits per query.
+        """
+        merged: dict[str, list[dict[str, Any]]] = {query_id: [] for query_id in query_sequences}
+
+        for database, query_ids in routes.items():
+            if not query_ids:
+                continue
+
+            subset = {query_id: query_sequences[query_id] for query_id in query_ids}
+
+            for piece in self.iter_single_database(subset, database):
+                for query_id, hits in piece.items():
+                    merged[query_id].extend(hits)
+
+        yield merged
+
+    def iter_results(
+        self,
+        query_sequences: dict[str, str],
+        databases: list[str],
+    ) -> Iterator[dict[str, list[dict[str, Any]]]]:
+        """
+        Search all queries across all databases, yielding results piece by piece.
+
+        When alias_database_for() returns an alias database, it is searched
+        once instead of every database, so all hits share one search space
+        and comparable E-values; each hit is then attributed back to its
+        source database, and top-K filtering applies per source database.
+
+        Otherwise, when route_queries() returns routes, each database is
+        searched only with the queries the sketch prefilter sent to it, and
+        sharded databases may fan out across their volumes (fans_out()).
+
+        Args:
+            query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+            databases (list[str]): List of database prefix paths.
+
+        Yields:
+            dict[str, list[dict[str, Any]]]: Hits per query for one piece.
+        """
+        alias_prefix: str | None = self.alias_database_for(databases)
+
+        if alias_prefix is None:
+            routes = self.route_queries(query_sequences, databases)
+
+            if routes is None and not self.fans_out(databases):
+                yield from self.iter_database_results(query_sequences, databases)
+            else:
+                if routes is None:
+                    routes = {database: list(query_sequences) for database in databases}
+                yield from self.iter_routed_results(query_sequences, routes)
+            return
+
+        subject_map = SubjectDatabaseMap(alias_prefix)
+        filters = self.hit_filters()
+
+        # The alias search runs without top-K: it only applies once each hit
+        # is attributed to its member database, the grouping the classifier
+        # normalizes bit scores over
+        alias_runner = BlastRunner({**self.blast_params, "top_k_per_query": 0})
+
+        try:
+            for piece in alias_runner.iter_database_results(query_sequences, [alias_prefix]):
+                piece = self.resolve_ambiguous_hits(
+                    self.attribute_hits(piece, subject_map),
+                    subject_map,
+                    query_sequences,
+                    databases,
                 )
 
-            return self.parse_blast_output(result.stdout, db_name)
+                if filters is not None:
+                    piece = self.apply_top_k_per_database(piece, int(filters["top_k"]))
 
+                yield piece
         finally:
-            if os.path.exists(query_fasta):
-                os.remove(query_fasta)
+            subject_map.close()
 
-    def run_blast_across_databases(
+    def resolve_ambiguous_hits(
         self,
+        piece: dict[str, list[dict[str, Any]]],
+        subject_map: SubjectDatabaseMap,
         query_sequences: dict[str, str],
         databases: list[str],
     ) -> dict[str, list[dict[str, Any]]]:
+        """
+        Re-search queries with hits on subject IDs shared by several databases.
+
+        The alias search cannot tell which member database such a hit came
+        from, so those queries are searched against every database
+        separately and their alias hits are replaced.
+
+        Args:
+            piece (dict[str, list[dict[str, Any]]]): Attributed hits per query.
+            subject_map (SubjectDatabaseMap): Map built with the alias database.
+            query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+            databases (list[str]): Member database prefixes.
+
+        Returns:
+            dict[str, list[dict[str, Any]]]: The same piece, with the hits of
+            affected queries taken from per-database searches.
+        """
+        ambiguous = subject_map.ambiguous([hit["subject_id"] for hits in piece.values() for hit in hits])
+
+        if not ambiguous:
+            return piece
+
+        query_ids = [
+            query_id for query_id, hits in piece.items()
+            if any(hit["subject_id"] in ambiguous for hit in hits)
+        ]
+
+        sys.stdout.write(
+            f"{len(query_ids)} queries hit subject IDs found in several databases; "
+            "searching them in each database separately.\n"
+        )
+
+        subset = {query_id: query_sequences[query_id] for query_id in query_ids}
+
+        for results in self.iter_database_results(subset, databases):
+            for query_id, hits in results.items():
+                piece[query_id] = hits
+
+        return piece
+
+    def iter_database_results(
+        self,
+        query_sequences: dict[str, str],
+        databases: list[str],
+    ) -> Iterator[dict[str, list[dict[str, Any]]]]:
+        """
+        Search all queries across all databases, yielding results piece by piece.
+
+        Each yielded dictionary covers one query chunk (or one query when
+        batching is off) with its hits from every database. Pieces come in
+        query order, so callers can convert or write them without holding
+        the whole run as dictionaries.
+
+        Args:
+            query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+            databases (list[str]): List of database prefix paths.
+
+        Yields:
+            dict[str, list[dict[str, Any]]]: Hits per query for one piece.
+        """
+        batch_size: int = int(self.blast_params.get("batch_size", 0))
+
+        num_chunks: int = -(-len(query_sequences) // max(1, batch_size))
+        workers, _ = self.plan_core_budget(num_chunks * len(databases))
+
+        if workers > 1:
+            chunks = self.chunk_queries(query_sequences, max(1, batch_size))
+            yield from self.iter_blast_jobs(chunks, databases)
+            return
+
+        if batch_size > 0:
+            for chunk in self.chunk_queries(query_sequences, batch_size):
+                sys.stdout.write(f"Processing batch of {len(chunk)} queries\n")
+
+                merged: dict[str, list[dict[str, Any]]] = {query_id: [] for query_id in chunk}
+
+                for database in databases:
+                    chunk_results = self.run_blast_batch(chunk, database)
+
+                    for query_id, hits in chunk_results.items():
+                        merged[query_id].extend(hits)
+
+                yield merged
+            return
+
+        for query_id, query_sequence in query_sequences.items():
+            sys.stdout.write(f"Processing query: {query_id}\n")
+            hits: list[dict[str, Any]] = []
+
+            for database in databases:
+                hits.extend(self.run_blast(query_id, query_sequence, database))
+
+            yield {query_id: hits}
+
+    def run_blast_across_databases(
+        self,
+        query_sequences: dict[str, str],
+        databases: list[str],
+        as_table: bool = False,
+    ) -> dict[str, list[dict[str, Any]]] | HitTable:
         """
         Run BLAST searches for all queries across all databases.
 
+        When 'batch_size' is set in the configuration, queries are grouped
+        into chunks of that size and each chunk is searched with a single
+        BLAST call per database. Otherwise one BLAST call is made per
+        query and database.
+
+        When 'core_budget' allows more than one concurrent job, the
+        (chunk, database) jobs are run on a process pool instead.
+
+        With 'search_mode' set to 'alias', the whole catalog is searched
+        as one alias database (see iter_results).
+
         Args:
             query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
             databases (list[str]): List of database prefix paths.
+            as_table (bool): Return a columnar HitTable instead of dictionaries.
+                Hit dictionaries then only exist for one chunk at a time.
 
         Returns:
-            dict[str, list[dict[str, Any]]]: Dictionary like:
+            dict[str, list[dict[str, Any]]] | HitTable: Dictionary like:
                 {
                     "query1": [hit1, hit2, ...],
                     "query2": [hit1, hit2, ...],
                 }
+            or the same hits as a HitTable.
 
         Raises:
             TypeError: If query_sequences is not a dictionary or databases is not a list.
@@ -254,14 +1328,15 @@ class BlastRunner:
         if not isinstance(databases, list):
             raise TypeError("databases must be a list")
 
-        all_results: dict[str, list[dict[str, Any]]] = {}
+        if as_table:
+            return HitTable.concat([
+                HitTable.from_results(piece)
+                for piece in self.iter_results(query_sequences, databases)
+            ])
 
-        for query_id, query_sequence in query_sequences.items():
-            sys.stdout.write(f"Processing query: {query_id}\n")
-            all_results[query_id] = []
+        all_results: dict[str, list[dict[str, Any]]] = {}
 
-            for database in databases:
-                hits = self.run_blast(query_id, query_sequence, database)
-                all_results[query_id].extend(hits)
+        for piece in self.iter_results(query_sequences, databases):
+            all_results.update(piece)
 
         return all_results
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+#By Isabella Zuluaga Yusti
+
+"""
+Staged BLAST search with early termination.
+
+This module runs a search as a sequence of stages and sends only the
+queries that are still unresolved after one stage on to the next. It is
+used for the database cascade, where each stage is one database searched
+from the smallest (or a configured first choice) to the largest, so most
+queries never reach the expensive databases.
+
+A stage is a name plus a search function returning a HitTable. Whether a
+query is resolved is decided by a caller-supplied check, normally the
+classifier's E-value and identity thresholds.
+
+Expected inputs:
+- query_sequences: dict like {query_id: sequence_string}
+- stages: list of SearchStage objects
+
+Expected outputs:
+- one HitTable with the hits of every stage, in query order
+- per-stage statistics for the run report
+
+Typical usage:
+    stages = [SearchStage(db, search_function(db)) for db in order_databases(dbs)]
+    table, stats = run_stages(queries, stages, is_resolved)
+    sys.stdout.write(format_stage_report(stats, len(queries)))
+"""
+
+import os
+import time
+from typing import Callable
+
+import numpy as np
+
+from hit_table import HitTable
+
+
+class SearchStage:
+    """
+    One stage of a staged search.
+
+    Attributes:
+        name (str): Name shown in the report (e.g. the database name).
+        search (Callable[[dict[str, str]], HitTable]): Searches a set of
+            queries and returns their hits.
+        replaces_hits (bool): Hits of this stage replace the hits earlier
+            stages found for the same queries, instead of being added.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        search: Callable[[dict[str, str]], HitTable],
+        replaces_hits: bool = False,
+    ) -> None:
+        self.name = name
+        self.search = search
+        self.replaces_hits = replaces_hits
+
+
+# ---------------------------------------------------------------------------
+# Database order
+# ---------------------------------------------------------------------------
+
+def database_size(db_prefix: str) -> int:
+    """
+    Return the total size in bytes of the files of one database.
+
+    Args:
+        db_prefix (str): Full path prefix of the database.
+
+    Returns:
+        int: Sum of the sizes of all files named <prefix>.*.
+    """
+    db_dir = os.path.dirname(db_prefix) or "."
+    db_base = os.path.basename(db_prefix)
+
+    if not os.path.isdir(db_dir):
+        return 0
+
+    return sum(
+        os.path.getsize(os.path.join(db_dir, filename))
+        for filename in os.listdir(db_dir)
+        if filename.startswith(db_base + ".")
+    )
+
+
+def order_databases(databases: list[str], configured_order: list[str] | None = None) -> list[str]:
+    """
+    Order databases for a cascade.
+
+    Databases named in configured_order come first, in that order; all
+    others follow from the smallest to the largest.
+
+    Args:
+        databases (list[str]): List of database prefix paths.
+        configured_order (list[str] | None): Database names to search first.
+
+    Returns:
+        list[str]: Database prefix paths in cascade order.
+
+    Raises:
+        ValueError: If configured_order names an unknown database.
+    """
+    by_name = {os.path.basename(database): database for database in databases}
+    configured_order = configured_order or []
+
+    unknown = [name for name in configured_order if name not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown databases in cascade order: {', '.join(unknown)}")
+
+    first = [by_name[name] for name in configured_order]
+    rest = sorted(
+        (database for database in databases if database not in first),
+        key=database_size,
+    )
+    return first + rest
+
+
+# ---------------------------------------------------------------------------
+# Staged search
+# ---------------------------------------------------------------------------
+
+def run_stages(
+    query_sequences: dict[str, str],
+    stages: list[SearchStage],
+    is_resolved: Callable[[HitTable], np.ndarray],
+) -> tuple[HitTable, list[dict]]:
+    """
+    Search queries stage by stage, passing on only unresolved queries.
+
+    Args:
+        query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+        stages (list[SearchStage]): Stages in the order they are run.
+        is_resolved (Callable[[HitTable], np.ndarray]): Returns a boolean per
+            query of a table (aligned with table.query_ids), True if the
+            query needs no further stages.
+
+    Returns:
+        tuple[HitTable, list[dict]]:
+            - hits of every query from all stages that searched it, in the
+              order of query_sequences
+            - one dict per stage with 'stage', 'queries', 'resolved', and
+              'seconds'
+    """
+    remaining: dict[str, str] = dict(query_sequences)
+    tables: list[HitTable] = [HitTable.empty(query_sequences)]
+    stats: list[dict] = []
+
+    for stage in stages:
+        record = {"stage": stage.name, "queries": len(remaining), "resolved": 0, "seconds": 0.0}
+        stats.append(record)
+
+        if not remaining:
+            continue
+
+        started = time.perf_counter()
+        table = stage.search(remaining)
+        record["seconds"] = time.perf_counter() - started
+
+        if stage.replaces_hits:
+            tables = [drop_queries(previous, remaining) for previous in tables]
+
+        tables.append(table)
+
+        resolved = np.asarray(is_resolved(table), dtype=bool)
+        resolved_ids = {query_id for query_id, done in zip(table.query_ids, resolved) if done}
+        record["resolved"] = len(resolved_ids)
+
+        remaining = {
+            query_id: sequence
+            for query_id, sequence in remaining.items()
+            if query_id not in resolved_ids
+        }
+
+    merged = HitTable.concat(tables)
+    return merged.take(np.argsort(merged.query, kind="stable")), stats
+
+
+def drop_queries(table: HitTable, query_ids: dict[str, str]) -> HitTable:
+    """
+    Return table without the hits of the given queries (queries are kept).
+    """
+    codes = [code for code, query_id in enumerate(table.query_ids) if query_id in query_ids]
+    return table.filter(~np.isin(table.query, codes))
+
+
+def merge_stage_stats(total: list[dict], stats: list[dict]) -> list[dict]:
+    """
+    Add the statistics of one run_stages() call to running totals, in place.
+
+    Args:
+        total (list[dict]): Running totals (empty at the start).
+        stats (list[dict]): Statistics of one call, same stage order.
+
+    Returns:
+        list[dict]: The updated totals.
+    """
+    if not total:
+        total.extend(dict(record) for record in stats)
+        return total
+
+    for running, record in zip(total, stats):
+        for key in ("queries", "resolved", "seconds"):
+            running[key] += record[key]
+
+    return total
+
+
+def format_stage_report(stats: list[dict], num_queries: int) -> str:
+    """
+    Format per-stage hit rates and the estimated time saved.
+
+    A stage's time saved is estimated from its own cost per searched
+    query, multiplied by the number of queries that never reached it.
+
+    Args:
+        stats (list[dict]): Statistics from run_stages() or merge_stage_stats().
+        num_queries (int): Number of queries in the run.
+
+    Returns:
+        str: Report text, one line per stage plus a summary line.
+    """
+    lines = ["stage\tqueries\tresolved\thit_rate\tseconds\tseconds_saved\n"]
+    spent = 0.0
+    saved = 0.0
+
+    for record in stats:
+        searched = record["queries"]
+        skipped = num_queries - searched
+        hit_rate = record["resolved"] / searched if searched else 0.0
+        stage_saved = record["seconds"] / searched * skipped if searched else 0.0
+
+        spent += record["seconds"]
+        saved += stage_saved
+
+        lines.append(
+            f"{record['stage']}\t{searched}\t{record['resolved']}\t"
+            f"{hit_rate:.1%}\t{record['seconds']:.1f}\t{stage_saved:.1f}\n"
+        )
+
+    resolved = sum(record["resolved"] for record in stats)
+    lines.append(
+        f"Resolved {resolved} of {num_queries} queries in {spent:.1f} s; "
+        f"estimated {saved:.1f} s saved versus searching every stage for every query.\n"
+    )
+    return "".join(lines)
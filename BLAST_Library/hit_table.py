@@ -0,0 +1,825 @@
+#!/usr/bin/env python3
+#By Isabella Zuluaga Yusti
+
+"""
+Columnar BLAST hit table.
+
+This module stores BLAST hits column by column instead of as one dictionary
+per hit. Numeric fields are NumPy arrays, and query, subject, and database
+IDs are stored once as category lists with integer codes per hit.
+
+A hit dictionary costs several hundred bytes; a row of a HitTable costs
+about 64 bytes, and filters run as vectorized array operations.
+
+Expected inputs:
+- per-query hit dictionaries, e.g. from BlastRunner or load_blast_results
+
+Expected outputs:
+- HitTable objects, with dictionary views for callers that need them
+
+HitTableWriter appends tables to the same on-disk format piece by piece,
+so a run can be saved while it is still searching.
+
+Typical usage:
+    table = HitTable.from_results(blast_results)
+    good = table.filter((table.columns["evalue"] <= 1e-5))
+    for query_id, hits in good.iter_query_hits():
+        ...
+"""
+
+import json
+import os
+import shutil
+from array import array
+from collections.abc import Sequence
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+
+# Numeric hit fields, their NumPy dtypes and array.array type codes
+NUMERIC_FIELDS: dict[str, tuple[type, str]] = {
+    "identity": (np.float64, "d"),
+    "alignment_length": (np.int32, "i"),
+    "mismatches": (np.int32, "i"),
+    "gap_opens": (np.int32, "i"),
+    "query_start": (np.int32, "i"),
+    "query_end": (np.int32, "i"),
+    "subject_start": (np.int32, "i"),
+    "subject_end": (np.int32, "i"),
+    "evalue": (np.float64, "d"),
+    "bitscore": (np.float64, "d"),
+}
+
+
+# Binary results format: one .npy file per column plus newline-separated ID
+# lists and a small JSON manifest, all inside one directory
+BINARY_FORMAT_VERSION: int = 1
+MANIFEST_NAME: str = "manifest.json"
+CODE_COLUMNS: tuple[str, ...] = ("query", "subject", "database")
+ID_LISTS: dict[str, str] = {
+    "query_ids": "query_ids.txt",
+    "subject_ids": "subject_ids.txt",
+    "databases": "databases.txt",
+}
+
+
+class LazyIdList(Sequence):
+    """
+    List of IDs read from a newline-separated file on first access.
+
+    Loading a saved HitTable only maps its numeric columns; ID strings are
+    read when something actually needs them.
+    """
+
+    def __init__(self, path: str, length: int) -> None:
+        self._path = path
+        self._length = length
+        self._values: list[str] | None = None
+
+    def _load(self) -> list[str]:
+        if self._values is None:
+            with open(self._path, "r", encoding="utf-8") as id_file:
+                text = id_file.read()
+            self._values = text.split("\n")[:self._length] if self._length else []
+        return self._values
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        return self._load()[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._load())
+
+
+class HitTableBuilder:
+    """
+    Accumulate hits row by row in compact buffers and build a HitTable.
+
+    IDs are interned as they arrive, and numeric values go straight into
+    typed array.array buffers, so no per-hit Python objects are kept.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize empty category lists and column buffers.
+        """
+        self._query_codes: dict[str, int] = {}
+        self._subject_codes: dict[str, int] = {}
+        self._database_codes: dict[str, int] = {}
+        self._query: array = array("i")
+        self._subject: array = array("i")
+        self._database: array = array("i")
+        self._numeric: dict[str, array] = {
+            name: array(type_code) for name, (_, type_code) in NUMERIC_FIELDS.items()
+        }
+
+    @staticmethod
+    def _code(categories: dict[str, int], value: str) -> int:
+        code = categories.get(value)
+
+        if code is None:
+            code = len(categories)
+            categories[value] = code
+
+        return code
+
+    def add_query(self, query_id: str) -> None:
+        """
+        Register a query so it is kept in the table even without hits.
+
+        Args:
+            query_id (str): Query sequence identifier.
+        """
+        self._code(self._query_codes, query_id)
+
+    def add_hit(self, query_id: str, hit: dict[str, Any]) -> None:
+        """
+        Append one hit.
+
+        Args:
+            query_id (str): Query the hit belongs to.
+            hit (dict[str, Any]): Hit dictionary. The source database may be
+                stored under 'database' (runner) or 'db' (results loader);
+                missing numeric fields are stored as 0.
+        """
+        self._query.append(self._code(self._query_codes, query_id))
+        self._subject.append(self._code(self._subject_codes, str(hit.get("subject_id", ""))))
+        database = hit.get("database", hit.get("db", ""))
+        self._database.append(self._code(self._database_codes, str(database)))
+
+        for name, column in self._numeric.items():
+            column.append(hit.get(name, 0))
+
+    def build(self) -> "HitTable":
+        """
+        Return the accumulated hits as a HitTable.
+        """
+        columns = {
+            name: np.frombuffer(buffer, dtype=NUMERIC_FIELDS[name][0]).copy()
+            for name, buffer in self._numeric.items()
+        }
+
+        return HitTable(
+            query_ids=list(self._query_codes),
+            subject_ids=list(self._subject_codes),
+            databases=list(self._database_codes),
+            query=np.frombuffer(self._query, dtype=np.int32).copy(),
+            subject=np.frombuffer(self._subject, dtype=np.int32).copy(),
+            database=np.frombuffer(self._database, dtype=np.int32).copy(),
+            columns=columns,
+        )
+
+
+class HitTable:
+    """
+    BLAST hits stored as columns.
+
+    Rows are grouped by query, in the order of query_ids, and within each
+    query keep the order in which hits were added (database by database).
+
+    Attributes:
+        query_ids (list[str]): Every query of the run, including queries without hits.
+        subject_ids (list[str]): Distinct subject IDs.
+        databases (list[str]): Distinct database names.
+        query (np.ndarray): Query code (index into query_ids) per hit.
+        subject (np.ndarray): Subject code (index into subject_ids) per hit.
+        database (np.ndarray): Database code (index into databases) per hit.
+        columns (dict[str, np.ndarray]): Numeric columns from NUMERIC_FIELDS.
+    """
+
+    def __init__(
+        self,
+        query_ids: list[str],
+        subject_ids: list[str],
+        databases: list[str],
+        query: np.ndarray,
+        subject: np.ndarray,
+        database: np.ndarray,
+        columns: dict[str, np.ndarray],
+    ) -> None:
+        self.query_ids = query_ids
+        self.subject_ids = subject_ids
+        self.databases = databases
+        self.query = query
+        self.subject = subject
+        self.database = database
+        self.columns = columns
+
+    # -----------------------------------------------------------------------
+    # Construction
+    # -----------------------------------------------------------------------
+
+    @classmethod
+    def empty(cls, query_ids: Iterable[str] = ()) -> "HitTable":
+        """
+        Return a table without hits for the given queries.
+        """
+        builder = HitTableBuilder()
+        for query_id in query_ids:
+            builder.add_query(query_id)
+        return builder.build()
+
+    @classmethod
+    def from_results(cls, results: dict[str, list[dict[str, Any]]]) -> "HitTable":
+        """
+        Build a table from the {query_id: [hit, ...]} dictionary form.
+
+        Args:
+            results (dict[str, list[dict[str, Any]]]): Hits per query.
+
+        Returns:
+            HitTable: Columnar copy of the hits.
+        """
+        builder = HitTableBuilder()
+
+        for query_id, hits in results.items():
+            builder.add_query(query_id)
+
+            for hit in hits:
+                builder.add_hit(query_id, hit)
+
+        return builder.build()
+
+    @classmethod
+    def concat(cls, tables: list["HitTable"]) -> "HitTable":
+        """
+        Concatenate tables, merging their category lists.
+
+        Queries are expected to be disjoint between tables (e.g. one table
+        per query chunk); rows keep their order.
+
+        Args:
+            tables (list[HitTable]): Tables to concatenate.
+
+        Returns:
+            HitTable: Combined table.
+        """
+        if not tables:
+            return cls.empty()
+
+        if len(tables) == 1:
+            return tables[0]
+
+        def merge(category_lists: list[list[str]]) -> tuple[list[str], list[np.ndarray]]:
+            merged: dict[str, int] = {}
+            remaps: list[np.ndarray] = []
+
+            for categories in category_lists:
+                remap = np.empty(len(categories), dtype=np.int32)
+                for index, value in enumerate(categories):
+                    remap[index] = merged.setdefault(value, len(merged))
+                remaps.append(remap)
+
+            return list(merged), remaps
+
+        query_ids, query_maps = merge([table.query_ids for table in tables])
+        subject_ids, subject_maps = merge([table.subject_ids for table in tables])
+        databases, database_maps = merge([table.databases for table in tables])
+
+        return cls(
+            query_ids=query_ids,
+            subject_ids=subject_ids,
+            databases=databases,
+            query=np.concatenate([m[t.query] for m, t in zip(query_maps, tables)]).astype(np.int32),
+            subject=np.concatenate([m[t.subject] for m, t in zip(subject_maps, tables)]).astype(np.int32),
+            database=np.concatenate([m[t.database] for m, t in zip(database_maps, tables)]).astype(np.int32),
+            columns={
+                name: np.concatenate([table.columns[name] for table in tables])
+                for name in NUMERIC_FIELDS
+            },
+        )
+
+    # -----------------------------------------------------------------------
+    # Binary storage
+    # -----------------------------------------------------------------------
+
+    def save(self, path: str, metadata: dict[str, Any] | None = None, copies: np.ndarray | None = None) -> str:
+        """
+        Save the table as a directory of .npy columns.
+
+        The directory is written under a temporary name and renamed into
+        place, so readers never see a half-written table.
+
+        Args:
+            path (str): Output directory, e.g. results/q1/q1_results.hits.
+            metadata (dict[str, Any] | None): Extra JSON-serializable values
+                for the manifest (e.g. parse-time filters).
+            copies (np.ndarray | None): Optional per-query copy counts,
+                aligned with query_ids.
+
+        Returns:
+            str: The output directory.
+        """
+        temp_path = path + ".tmp"
+
+        if os.path.exists(temp_path):
+            shutil.rmtree(temp_path)
+
+        os.makedirs(temp_path)
+
+        for name in CODE_COLUMNS:
+            np.save(os.path.join(temp_path, f"{name}.npy"), np.ascontiguousarray(getattr(self, name), dtype=np.int32))
+
+        for name, column in self.columns.items():
+            np.save(os.path.join(temp_path, f"{name}.npy"), np.ascontiguousarray(column))
+
+        for attribute, filename in ID_LISTS.items():
+            with open(os.path.join(temp_path, filename), "w", encoding="utf-8") as id_file:
+                id_file.write("\n".join(getattr(self, attribute)))
+
+        if copies is not None:
+            np.save(os.path.join(temp_path, "copies.npy"), np.asarray(copies, dtype=np.int32))
+
+        manifest = {
+            "format_version": BINARY_FORMAT_VERSION,
+            "rows": len(self),
+            "counts": {attribute: len(getattr(self, attribute)) for attribute in ID_LISTS},
+            "has_copies": copies is not None,
+            "metadata": metadata or {},
+        }
+
+        with open(os.path.join(temp_path, MANIFEST_NAME), "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+
+        os.replace(temp_path, path)
+        return path
+
+    @staticmethod
+    def read_manifest(path: str) -> dict[str, Any]:
+        """
+        Return the manifest of a saved table.
+
+        Raises:
+            FileNotFoundError: If path is not a saved HitTable directory.
+            ValueError: If the format version is not supported.
+        """
+        manifest_path = os.path.join(path, MANIFEST_NAME)
+
+        if not os.path.isfile(manifest_path):
+            raise FileNotFoundError(f"Binary results not found: {path}")
+
+        with open(manifest_path, "r", encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+
+        if manifest.get("format_version") != BINARY_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported binary results format version {manifest.get('format_version')} in {path}"
+            )
+
+        return manifest
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "HitTable":
+        """
+        Load a table saved with save().
+
+        With mmap=True the columns are memory-mapped read-only, so loading
+        costs almost nothing regardless of size; pages are read on use.
+
+        Args:
+            path (str): Directory written by save().
+            mmap (bool): Memory-map the columns instead of reading them.
+
+        Returns:
+            HitTable: The saved table.
+        """
+        manifest = cls.read_manifest(path)
+        mmap_mode = "r" if mmap else None
+
+        rows = manifest["rows"]
+
+        # Columns of a table still being appended to may hold a few rows
+        # beyond the last committed manifest; those are ignored.
+        def column(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)[:rows]
+
+        id_lists = {
+            attribute: LazyIdList(os.path.join(path, filename), manifest["counts"][attribute])
+            for attribute, filename in ID_LISTS.items()
+        }
+
+        return cls(
+            query_ids=id_lists["query_ids"],
+            subject_ids=id_lists["subject_ids"],
+            databases=id_lists["databases"],
+            query=column("query"),
+            subject=column("subject"),
+            database=column("database"),
+            columns={name: column(name) for name in NUMERIC_FIELDS},
+        )
+
+    @classmethod
+    def load_copies(cls, path: str) -> np.ndarray | None:
+        """
+        Return the per-query copy counts saved with a table, if any.
+        """
+        copies_path = os.path.join(path, "copies.npy")
+
+        if not os.path.isfile(copies_path):
+            return None
+
+        num_queries = cls.read_manifest(path)["counts"]["query_ids"]
+        return np.load(copies_path, mmap_mode="r")[:num_queries]
+
+    # -----------------------------------------------------------------------
+    # Row selection
+    # -----------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return int(self.query.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory used by the per-hit arrays, in bytes.
+        """
+        return int(
+            self.query.nbytes + self.subject.nbytes + self.database.nbytes
+            + sum(column.nbytes for column in self.columns.values())
+        )
+
+    def take(self, rows: np.ndarray) -> "HitTable":
+        """
+        Return a table with the selected rows. All queries are kept.
+
+        Args:
+            rows (np.ndarray): Boolean mask or integer row indices.
+
+        Returns:
+            HitTable: Table sharing this table's category lists.
+        """
+        return HitTable(
+            query_ids=self.query_ids,
+            subject_ids=self.subject_ids,
+            databases=self.databases,
+            query=self.query[rows],
+            subject=self.subject[rows],
+            database=self.database[rows],
+            columns={name: column[rows] for name, column in self.columns.items()},
+        )
+
+    def filter(self, mask: np.ndarray) -> "HitTable":
+        """
+        Return the rows where mask is True. Alias of take() for boolean masks.
+        """
+        return self.take(np.asarray(mask, dtype=bool))
+
+    def query_row_ranges(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Locate the rows of every query.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: (order, starts, counts)
+            where the rows of query code c are order[starts[c]:starts[c] + counts[c]].
+        """
+        order = np.argsort(self.query, kind="stable")
+        counts = np.bincount(self.query, minlength=len(self.query_ids))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1])) if len(counts) else counts
+        return order, starts, counts
+
+    def reindex_queries(self, source_ids: list[str], target_ids: list[str]) -> "HitTable":
+        """
+        Build a table whose i-th query is target_ids[i] with the hits of source_ids[i].
+
+        A source query may appear several times, which copies its hits to
+        several target queries (used to fan out dereplicated results).
+
+        Args:
+            source_ids (list[str]): Queries whose hits are taken.
+            target_ids (list[str]): New query IDs, same length as source_ids.
+
+        Returns:
+            HitTable: Reindexed table.
+        """
+        if not self.query_ids:
+            return HitTable.empty(target_ids)
+
+        order, starts, counts = self.query_row_ranges()
+        code_of = {query_id: code for code, query_id in enumerate(self.query_ids)}
+
+        source_codes = np.array(
+            [code_of.get(query_id, -1) for query_id in source_ids], dtype=np.int64
+        )
+        known = source_codes >= 0
+        safe_codes = np.where(known, source_codes, 0)
+
+        # Row i of the result is row `within` of its source query's block
+        lengths = np.where(known, counts[safe_codes], 0)
+        block_starts = np.repeat(starts[safe_codes], lengths)
+        within = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        rows = order[block_starts + within]
+        new_codes = np.repeat(np.arange(len(source_ids), dtype=np.int32), lengths)
+
+        reindexed = self.take(rows)
+        reindexed.query_ids = list(target_ids)
+        reindexed.query = new_codes
+        return reindexed
+
+    # -----------------------------------------------------------------------
+    # Dictionary views
+    # -----------------------------------------------------------------------
+
+    def row_dict(self, row: int) -> dict[str, Any]:
+        """
+        Return one row as a hit dictionary in the BlastRunner format.
+        """
+        hit: dict[str, Any] = {
+            "database": self.databases[self.database[row]],
+            "query_id": self.query_ids[self.query[row]],
+            "subject_id": self.subject_ids[self.subject[row]],
+        }
+
+        for name, column in self.columns.items():
+            hit[name] = column[row].item()
+
+        return hit
+
+    def iter_query_hits(self) -> Iterator[tuple[str, list[dict[str, Any]]]]:
+        """
+        Yield (query_id, [hit, ...]) for every query, including queries
+        without hits, in query order.
+        """
+        order, starts, counts = self.query_row_ranges()
+
+        for code, query_id in enumerate(self.query_ids):
+            rows = order[starts[code]:starts[code] + counts[code]]
+            yield query_id, [self.row_dict(int(row)) for row in rows]
+
+    def to_results(self) -> dict[str, list[dict[str, Any]]]:
+        """
+        Return the {query_id: [hit, ...]} dictionary form.
+        """
+        return dict(self.iter_query_hits())
+
+
+# ---------------------------------------------------------------------------
+# Incremental binary storage
+# ---------------------------------------------------------------------------
+
+# Fixed .npy header size, large enough for any 1-D shape, so the row count
+# can be rewritten in place after every append
+NPY_HEADER_SIZE: int = 128
+
+
+def _write_npy_header(npy_file, dtype: np.dtype, rows: int) -> None:
+    """
+    Write a version 1.0 .npy header for a 1-D array of the given length at
+    the start of an open file.
+    """
+    header = repr({"descr": np.dtype(dtype).str, "fortran_order": False, "shape": (rows,)})
+    header_length = NPY_HEADER_SIZE - 10
+    header = header.ljust(header_length - 1) + "\n"
+
+    npy_file.seek(0)
+    npy_file.write(b"\x93NUMPY\x01\x00")
+    npy_file.write(header_length.to_bytes(2, "little"))
+    npy_file.write(header.encode("latin1"))
+
+
+class HitTableWriter:
+    """
+    Append HitTables to a saved-table directory without holding them in memory.
+
+    Rows and IDs are appended to the column and ID files of
+    <path>.partial/, and the manifest is rewritten after every append, so
+    the partial directory can be loaded with HitTable.load() at any time.
+    finalize() renames it to <path>.
+
+    Attributes:
+        path (str): Final output directory.
+        partial_path (str): Directory written while the run is in progress.
+        rows (int): Number of hit rows written so far.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        metadata: dict[str, Any] | None = None,
+        with_copies: bool = False,
+        resume_state: dict[str, int] | None = None,
+    ) -> None:
+        """
+        Create an empty partial table directory, or reopen an existing one.
+
+        Args:
+            path (str): Final output directory, e.g. results/q1/q1_results.hits.
+            metadata (dict[str, Any] | None): Extra JSON-serializable values
+                for the manifest (e.g. parse-time filters).
+            with_copies (bool): Also store per-query copy counts.
+            resume_state (dict[str, int] | None): A state() recorded earlier.
+                The existing partial directory is reopened and cut back to
+                exactly that state, dropping anything appended after it.
+
+        Raises:
+            FileNotFoundError: If resuming and the partial directory is missing.
+        """
+        self.path = path
+        self.partial_path = path + ".partial"
+        self.rows = 0
+        self.metadata = metadata or {}
+        self.with_copies = with_copies
+        self._closed = False
+
+        if resume_state is None:
+            if os.path.exists(self.partial_path):
+                shutil.rmtree(self.partial_path)
+            os.makedirs(self.partial_path)
+        elif not os.path.isdir(self.partial_path):
+            raise FileNotFoundError(f"Partial binary results not found: {self.partial_path}")
+
+        self._codes: dict[str, dict[str, int]] = {attribute: {} for attribute in ID_LISTS}
+        self._id_files: dict[str, Any] = {}
+
+        for attribute, filename in ID_LISTS.items():
+            id_path = os.path.join(self.partial_path, filename)
+
+            if resume_state is None:
+                self._id_files[attribute] = open(id_path, "w", encoding="utf-8")
+                continue
+
+            self._id_files[attribute] = self._reopen_id_list(
+                id_path, self._codes[attribute], resume_state[attribute]
+            )
+
+        dtypes: dict[str, np.dtype] = {name: np.dtype(np.int32) for name in CODE_COLUMNS}
+        dtypes.update({name: np.dtype(dtype) for name, (dtype, _) in NUMERIC_FIELDS.items()})
+
+        if with_copies:
+            dtypes["copies"] = np.dtype(np.int32)
+
+        self._dtypes = dtypes
+        self._lengths: dict[str, int] = {name: 0 for name in dtypes}
+        self._columns: dict[str, Any] = {}
+
+        if resume_state is not None:
+            self.rows = resume_state["rows"]
+            self._lengths = {name: self.rows for name in dtypes}
+            if with_copies:
+                self._lengths["copies"] = resume_state["query_ids"]
+
+        for name, dtype in dtypes.items():
+            column_path = os.path.join(self.partial_path, f"{name}.npy")
+
+            if resume_state is None:
+                column_file = open(column_path, "w+b")
+            else:
+                column_file = open(column_path, "r+b")
+                column_file.truncate(NPY_HEADER_SIZE + self._lengths[name] * dtype.itemsize)
+
+            _write_npy_header(column_file, dtype, self._lengths[name])
+            self._columns[name] = column_file
+
+        self._write_manifest()
+
+    @staticmethod
+    def _reopen_id_list(id_path: str, codes: dict[str, int], count: int):
+        """
+        Read the first count IDs of an ID file into codes, cut the file
+        after them, and return it opened for appending.
+        """
+        size = 0
+
+        with open(id_path, "r+b") as id_file:
+            for _ in range(count):
+                line = id_file.readline()
+                if not line.endswith(b"\n"):
+                    raise ValueError(f"ID list {id_path} is shorter than its recorded state")
+                codes[line[:-1].decode("utf-8")] = len(codes)
+                size += len(line)
+
+            id_file.truncate(size)
+
+        return open(id_path, "a", encoding="utf-8")
+
+    def state(self) -> dict[str, int]:
+        """
+        Return the row and ID counts committed so far, for resume_state.
+        """
+        state = {attribute: len(codes) for attribute, codes in self._codes.items()}
+        state["rows"] = self.rows
+        return state
+
+    def _intern(self, attribute: str, values: Sequence) -> np.ndarray:
+        """
+        Map a table's category list to this writer's codes, appending new IDs.
+        """
+        codes = self._codes[attribute]
+        id_file = self._id_files[attribute]
+        remap = np.empty(len(values), dtype=np.int32)
+
+        for index, value in enumerate(values):
+            code = codes.get(value)
+
+            if code is None:
+                code = len(codes)
+                codes[value] = code
+                id_file.write(f"{value}\n")
+
+            remap[index] = code
+
+        return remap
+
+    def _append_column(self, name: str, values: np.ndarray) -> None:
+        column_file = self._columns[name]
+        column_file.seek(0, os.SEEK_END)
+        column_file.write(np.ascontiguousarray(values, dtype=self._dtypes[name]).tobytes())
+        self._lengths[name] += len(values)
+
+    def append(self, table: HitTable, copies: np.ndarray | None = None) -> None:
+        """
+        Append the rows and queries of a table and commit them.
+
+        Queries must not repeat between appended tables.
+
+        Args:
+            table (HitTable): Hits of the next queries.
+            copies (np.ndarray | None): Copy counts aligned with table.query_ids;
+                1 per query when omitted and the writer stores copies.
+        """
+        query_map = self._intern("query_ids", table.query_ids)
+        subject_map = self._intern("subject_ids", table.subject_ids)
+        database_map = self._intern("databases", table.databases)
+
+        self._append_column("query", query_map[table.query])
+        self._append_column("subject", subject_map[table.subject])
+        self._append_column("database", database_map[table.database])
+
+        for name in NUMERIC_FIELDS:
+            self._append_column(name, table.columns[name])
+
+        if self.with_copies:
+            if copies is None:
+                copies = np.ones(len(table.query_ids), dtype=np.int32)
+            self._append_column("copies", copies)
+
+        self.rows += len(table)
+        self.commit()
+
+    def commit(self) -> None:
+        """
+        Make everything appended so far visible to readers.
+
+        Data is flushed before the headers and the manifest are updated, so
+        a crash at any point leaves a loadable table.
+        """
+        for id_file in self._id_files.values():
+            id_file.flush()
+
+        for name, column_file in self._columns.items():
+            column_file.flush()
+            _write_npy_header(column_file, self._dtypes[name], self._lengths[name])
+            column_file.flush()
+
+        self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        manifest = {
+            "format_version": BINARY_FORMAT_VERSION,
+            "rows": self.rows,
+            "counts": {attribute: len(codes) for attribute, codes in self._codes.items()},
+            "has_copies": self.with_copies,
+            "metadata": self.metadata,
+        }
+
+        manifest_path = os.path.join(self.partial_path, MANIFEST_NAME)
+        temp_path = manifest_path + ".tmp"
+
+        with open(temp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+
+        os.replace(temp_path, manifest_path)
+
+    def close(self) -> None:
+        """
+        Commit and close all open files without renaming the directory.
+        """
+        if self._closed:
+            return
+
+        self.commit()
+
+        for handle in [*self._id_files.values(), *self._columns.values()]:
+            handle.close()
+
+        self._closed = True
+
+    def finalize(self) -> str:
+        """
+        Close the writer and rename the partial directory to its final path.
+
+        Returns:
+            str: The final output directory.
+        """
+        self.close()
+
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+
+        os.replace(self.partial_path, self.path)
+        return self.path
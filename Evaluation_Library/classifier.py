@@ -18,6 +18,11 @@ Conceptual outputs:
 import os
 import sys
 
+import numpy as np
+
+from hit_table import HitTable
+from results_handler import load_cluster_members, parse_filters_line
+
 
 def rank_hits(blast_results: list[dict]) -> list[dict]:
     """
@@ -136,6 +141,100 @@ def classify_sequences(
 
     return predictions
 
+def best_hit_rows(
+    table: HitTable,
+    evalue_threshold: float = 1e-5,
+    identity_threshold: float = 70.0,
+) -> np.ndarray:
+    """
+    Find the best acceptable hit of every query with grouped array operations.
+
+    This is the whole-run equivalent of filtering each query's hits and
+    calling select_best_hit on them:
+    1. keep hits within the E-value and identity thresholds
+    2. min-max normalize bit scores within each (query, database) group
+    3. order hits by normalized bit score (desc), E-value (asc),
+       identity (desc); ties keep their original order, as with sorted()
+
+    Inputs:
+    - table: HitTable with hits for every query.
+    - evalue_threshold: maximum E-value to accept a hit (default 1e-5).
+    - identity_threshold: minimum percent identity to accept a hit (default 70.0).
+
+    Outputs:
+    - array with one entry per query code: the row of its best hit,
+      or -1 if the query has no acceptable hit.
+    """
+    best_rows = np.full(len(table.query_ids), -1, dtype=np.int64)
+
+    evalues = table.columns["evalue"]
+    identities = table.columns["identity"]
+    bitscores = table.columns["bitscore"]
+
+    rows = np.flatnonzero((evalues <= evalue_threshold) & (identities >= identity_threshold))
+
+    if rows.size == 0:
+        return best_rows
+
+    queries = table.query[rows].astype(np.int64)
+    group_keys = queries * max(1, len(table.databases)) + table.database[rows]
+    _, groups = np.unique(group_keys, return_inverse=True)
+    groups = groups.ravel()
+
+    scores = bitscores[rows]
+    group_min = np.full(groups.max() + 1, np.inf)
+    group_max = np.full(groups.max() + 1, -np.inf)
+    np.minimum.at(group_min, groups, scores)
+    np.maximum.at(group_max, groups, scores)
+
+    lo = group_min[groups]
+    hi = group_max[groups]
+    same = hi == lo
+    normalized = np.where(same, 1.0, (scores - lo) / np.where(same, 1.0, hi - lo))
+
+    # np.lexsort sorts by the last key first and is stable
+    order = np.lexsort((-identities[rows], evalues[rows], -normalized, queries))
+    sorted_queries = queries[order]
+    first = np.ones(order.size, dtype=bool)
+    first[1:] = sorted_queries[1:] != sorted_queries[:-1]
+
+    best_rows[sorted_queries[first]] = rows[order[first]]
+    return best_rows
+
+
+def classify_hit_table(
+    table: HitTable,
+    evalue_threshold: float = 1e-5,
+    identity_threshold: float = 70.0,
+) -> dict[str, str]:
+    """
+    Assign a predicted identity/category to every query of a HitTable.
+
+    All queries are classified at once with best_hit_rows(); the labels
+    match classify_sequences on the same hits.
+
+    Inputs:
+    - table: HitTable with hits for every query (queries without hits included).
+    - evalue_threshold: maximum E-value to accept a hit (default 1e-5).
+    - identity_threshold: minimum percent identity to accept a hit (default 70.0).
+
+    Outputs:
+    - predictions: dict mapping query_id -> predicted label string
+        (subject ID of the best hit, or "Unclassified").
+    """
+    best_rows = best_hit_rows(table, evalue_threshold, identity_threshold)
+    subject_codes = table.subject[np.maximum(best_rows, 0)].tolist() if len(table) else []
+
+    predictions: dict[str, str] = {}
+
+    for code, query_id in enumerate(table.query_ids):
+        if best_rows[code] < 0:
+            predictions[query_id] = "Unclassified"
+        else:
+            predictions[query_id] = table.subject_ids[subject_codes[code]]
+
+    return predictions
+
 def load_blast_results(results_file: str) -> dict[str, list[dict]]:
     """
     Load BLAST results from a text file with this format:
@@ -187,67 +286,219 @@ def load_blast_results(results_file: str) -> dict[str, list[dict]]:
     return all_query_results
 
 
-
-def classify_results_file(results_file, evalue_threshold=1e-5, identity_threshold=70.0):
+def classification_path(results_file: str) -> str:
     """
-    Read a BLAST results file and classify all queries.
+    Return the classification file that belongs to a results file.
 
-    Output:
-    - dict mapping query_id -> predicted label
+    Example:
+    results/q1/q1_results.txt -> results/q1/q1_classification.txt
+    results/q1/q1_results.hits -> results/q1/q1_classification.txt
     """
-    all_query_results = load_blast_results(results_file)
+    results_file = results_file.rstrip(os.sep)
+    results_dir = os.path.dirname(results_file)
+    results_base = os.path.basename(results_file)
 
-    predictions = classify_sequences(
-        all_query_results,
-        evalue_threshold=evalue_threshold,
-        identity_threshold=identity_threshold
-    )
+    if results_base.endswith("_results.txt"):
+        output_name = results_base.replace("_results.txt", "_classification.txt")
+    elif results_base.endswith("_results.hits"):
+        output_name = results_base.replace("_results.hits", "_classification.txt")
+    else:
+        output_name = "classification.txt"
 
-    return predictions
+    return os.path.join(results_dir, output_name)
 
-def save_classification_results(predictions: dict[str, str], results_file: str) -> str:
+
+def save_classification_results(
+    predictions: dict[str, str],
+    results_file: str,
+    inferred: dict[str, str] | None = None,
+) -> str:
     """
     Save classification results in the same results directory.
 
+    Queries in inferred (member -> cluster representative) were not
+    searched themselves; their line gets a third column, e.g.
+    read_7<TAB>E. coli<TAB>inferred_from=read_2
+
     Example:
     results/q1/q1_results.txt -> results/q1/q1_classification.txt
+    results/q1/q1_results.hits -> results/q1/q1_classification.txt
     """
-    if not os.path.isfile(results_file):
+    if not os.path.exists(results_file):
         raise FileNotFoundError(f"Results file not found: {results_file}")
 
-    results_dir = os.path.dirname(results_file)
-    results_base = os.path.basename(results_file)
-
-    if results_base.endswith("_results.txt"):
-        output_name = results_base.replace("_results.txt", "_classification.txt")
-    else:
-        output_name = "classification.txt"
+    output_file = classification_path(results_file)
 
-    output_file = os.path.join(results_dir, output_name)
+    inferred = inferred or {}
 
     with open(output_file, "w", encoding="utf-8") as out:
         for query_id, label in predictions.items():
-            out.write(f"{query_id}\t{label}\n")
+            if query_id in inferred:
+                out.write(f"{query_id}\t{label}\tinferred_from={inferred[query_id]}\n")
+            else:
+                out.write(f"{query_id}\t{label}\n")
 
     sys.stdout.write(f"Classification results saved in: {output_file}\n")
     return output_file
 
 
+def load_result_filters(results_file: str) -> dict[str, float] | None:
+    """
+    Read the parse-time filters recorded in a results file, if any.
+
+    Output:
+    - dict with 'evalue', 'identity', and 'top_k', or None if the hits
+      were saved unfiltered
+    """
+    if os.path.isdir(results_file):
+        return HitTable.read_manifest(results_file)["metadata"].get("filters")
+
+    with open(results_file, "r", encoding="utf-8") as infile:
+        return parse_filters_line(infile.readline())
+
+
+def check_result_filters(
+    filters: dict[str, float] | None,
+    evalue_threshold: float,
+    identity_threshold: float,
+) -> None:
+    """
+    Make sure saved, pre-filtered hits can still be classified correctly.
+
+    Hits removed while parsing are gone for good, so thresholds may only be
+    stricter than the ones applied at search time. With a top-K filter the
+    kept hits depend on the thresholds themselves, so they must match.
+
+    Raises:
+    - ValueError if the requested thresholds could need hits that were dropped
+    """
+    if filters is None:
+        return
+
+    applied = f"evalue<={filters['evalue']}, identity>={filters['identity']}, top_k={int(filters['top_k'])}"
+
+    if filters.get("top_k", 0) > 0:
+        if evalue_threshold != filters["evalue"] or identity_threshold != filters["identity"]:
+            raise ValueError(
+                f"Results were filtered with top-K while parsing ({applied}); "
+                "reclassify with exactly the same thresholds or re-run BLAST."
+            )
+        return
+
+    if evalue_threshold > filters["evalue"] or identity_threshold < filters["identity"]:
+        raise ValueError(
+            f"Results were filtered while parsing ({applied}); "
+            "thresholds looser than these need a new BLAST run."
+        )
+
+
 def classify_results_file(
     results_file: str,
     evalue_threshold: float = 1e-5,
     identity_threshold: float = 70.0,
     save_output: bool = False,
 ) -> dict[str, str]:
-    all_query_results: dict[str, list[dict]] = load_blast_results(results_file)
+    """
+    Classify all queries of a saved results file or binary results directory.
 
-    predictions: dict[str, str] = classify_sequences(
-        all_query_results,
+    Binary results (<name>_results.hits) are memory-mapped and classified
+    directly; text results are parsed first.
+
+    Members of clustered runs (see load_cluster_members) take the label
+    of their representative and are flagged as inferred when saved.
+
+    Output:
+    - dict mapping query_id -> predicted label
+    """
+    check_result_filters(load_result_filters(results_file), evalue_threshold, identity_threshold)
+
+    if os.path.isdir(results_file):
+        table: HitTable = HitTable.load(results_file)
+    else:
+        table = HitTable.from_results(load_blast_results(results_file))
+
+    predictions: dict[str, str] = classify_hit_table(
+        table,
         evalue_threshold=evalue_threshold,
         identity_threshold=identity_threshold
     )
 
+    inferred: dict[str, str] = load_cluster_members(results_file)
+
+    for query_id, representative_id in inferred.items():
+        if query_id in predictions and representative_id in predictions:
+            predictions[query_id] = predictions[representative_id]
+
     if save_output:
-        save_classification_results(predictions, results_file)
+        save_classification_results(predictions, results_file, inferred)
 
     return predictions
+
+
+def update_classification(
+    table: HitTable,
+    query_ids: list[str],
+    results_file: str,
+    evalue_threshold: float = 1e-5,
+    identity_threshold: float = 70.0,
+) -> dict[str, str] | None:
+    """
+    Reclassify only the given queries and update the saved classification.
+
+    Used after hits from new databases were merged into saved results:
+    queries whose hits did not change keep their saved label.
+
+    Inputs:
+    - table: merged HitTable of the results.
+    - query_ids: queries whose hits changed.
+    - results_file: results file or binary results directory.
+
+    Outputs:
+    - dict mapping query_id -> new label for every query whose label
+      changed, or None if the results were never classified.
+    """
+    output_file = classification_path(results_file)
+
+    if not os.path.isfile(output_file):
+        return None
+
+    check_result_filters(load_result_filters(results_file), evalue_threshold, identity_threshold)
+
+    predictions: dict[str, str] = {}
+
+    with open(output_file, "r", encoding="utf-8") as saved:
+        for line in saved:
+            fields = line.rstrip("\n").split("\t")
+            predictions[fields[0]] = fields[1] if len(fields) > 1 else ""
+
+    if not query_ids:
+        return {}
+
+    new_labels = classify_hit_table(
+        table.reindex_queries(query_ids, query_ids),
+        evalue_threshold=evalue_threshold,
+        identity_threshold=identity_threshold,
+    )
+
+    inferred: dict[str, str] = load_cluster_members(results_file)
+
+    for query_id, representative_id in inferred.items():
+        if query_id not in new_labels:
+            continue
+
+        if representative_id in new_labels:
+            new_labels[query_id] = new_labels[representative_id]
+        elif representative_id in predictions:
+            new_labels[query_id] = predictions[representative_id]
+
+    changed = {
+        query_id: label
+        for query_id, label in new_labels.items()
+        if predictions.get(query_id) != label
+    }
+
+    if changed:
+        predictions.update(changed)
+        save_classification_results(predictions, results_file, inferred)
+
+    return changed
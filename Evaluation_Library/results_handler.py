@@ -8,58 +8,959 @@ Handles output file generation for the pipeline.
 
 Currently supports:
 - saving BLAST results into the results/ directory
+- a text format and a binary columnar format (HitTable directory)
+- writing results incrementally while a run is still searching
+- recording which queries were not searched but inferred from a cluster
+  representative (<query_name>_clusters.tsv)
 
 This module is intended for writing pipeline outputs in a consistent format
 so they can be reused by later stages such as classification.
 
 Functions:
-    save_results: Save BLAST results to a structured output file.
+    iter_hit_lines: Format the hits of each query as output lines.
+    format_filters_line: Format the header line recording parse-time filters.
+    parse_filters_line: Read the parse-time filters back from that line.
+    write_text_results: Write results in the tab-separated text format.
+    write_binary_results: Write results as a memory-mappable column directory.
+    results_paths: Output directory and file names for a query file.
+    clusters_path: Cluster membership file that belongs to a results file.
+    load_cluster_members: Read the inferred members of a results file.
+    load_text_results: Read text results back as a HitTable.
+    journal_path: Run journal that belongs to a results file.
+    saved_run_databases: Database fingerprints of finished results that
+                         can be updated.
+    update_results: Merge hits from new or rebuilt databases into saved
+                    results.
+    save_results: Save BLAST results (dictionary or HitTable) to a
+                  structured output file or directory.
+
+Classes:
+    ResultsWriter: Append results query by query with bounded buffering.
 
 Typical usage:
     save_results(blast_results, "queries/query1.fasta")
+
+    with ResultsWriter("queries/query1.fasta") as writer:
+        for piece in runner.iter_results(queries, databases):
+            writer.write(piece)
 """
 
+import json
 import os
 import shutil
 import sys
 
+import numpy as np
+
+from hit_table import HitTable, HitTableWriter
+
 
-def save_results(blast_results, query_file):
+# First-line marker for results that were filtered while parsing
+FILTERS_PREFIX = "# Filters:"
+
+# Header of the cluster membership file
+CLUSTERS_HEADER = "#member\trepresentative\testimated_identity\n"
+
+
+def iter_hit_lines(blast_results):
     """
-    Save BLAST results to:
+    Yield (query_id, [formatted hit line, ...]) for every query.
+
+    Accepts either the {query_id: [hit, ...]} dictionary form or a HitTable.
+    For a HitTable the lines are formatted straight from its columns.
+    """
+    if not isinstance(blast_results, HitTable):
+        for query_id, hits in blast_results.items():
+            yield query_id, [
+                f"{hit['database']}\t"
+                f"{hit['subject_id']}\t"
+                f"{hit['identity']}\t"
+                f"{hit['alignment_length']}\t"
+                f"{hit['evalue']}\t"
+                f"{hit['bitscore']}\n"
+                for hit in hits
+            ]
+        return
+
+    table = blast_results
+    order, starts, counts = table.query_row_ranges()
+
+    for code, query_id in enumerate(table.query_ids):
+        rows = order[starts[code]:starts[code] + counts[code]]
+
+        databases = table.database[rows].tolist()
+        subjects = table.subject[rows].tolist()
+        identities = table.columns["identity"][rows].tolist()
+        lengths = table.columns["alignment_length"][rows].tolist()
+        evalues = table.columns["evalue"][rows].tolist()
+        bitscores = table.columns["bitscore"][rows].tolist()
+
+        yield query_id, [
+            f"{table.databases[database]}\t{table.subject_ids[subject]}\t"
+            f"{identity}\t{length}\t{evalue}\t{bitscore}\n"
+            for database, subject, identity, length, evalue, bitscore
+            in zip(databases, subjects, identities, lengths, evalues, bitscores)
+        ]
+
+
+def format_filters_line(filters):
+    """
+    Return the header line recording parse-time filters, e.g.:
+    # Filters: evalue<=1e-05 identity>=70.0 top_k=5
+    """
+    return (
+        f"{FILTERS_PREFIX} evalue<={filters['evalue']} "
+        f"identity>={filters['identity']} top_k={int(filters['top_k'])}\n"
+    )
+
+
+def parse_filters_line(line):
+    """
+    Read back a line written by format_filters_line().
+
+    Output:
+    - dict with 'evalue', 'identity', and 'top_k', or None if line is not
+      a filters line
+    """
+    line = line.strip()
+
+    if not line.startswith(FILTERS_PREFIX):
+        return None
+
+    filters = {}
+
+    for field in line[len(FILTERS_PREFIX):].split():
+        for separator in ("<=", ">=", "="):
+            if separator in field:
+                name, value = field.split(separator, 1)
+                filters[name] = float(value)
+                break
+
+    return filters
+
+
+def write_text_results(blast_results, output_file, copy_counts=None, filters=None):
+    """
+    Write BLAST results in the tab-separated text format:
+
+    Query: query_name
+    database    subject_id    identity    alignment_length    evalue    bitscore
+    """
+    with open(output_file, "w", encoding="utf-8") as out:
+
+        if filters is not None:
+            out.write(format_filters_line(filters))
+
+        write_query_blocks(out, blast_results, copy_counts)
+
+
+def load_text_results(text_file):
+    """
+    Read results written by write_text_results() back as a HitTable.
+
+    Output:
+    - (HitTable with every query, including queries without hits,
+       dict mapping query_id -> copy count, or None if the file has no
+       "Copies:" lines,
+       parse-time filters recorded in the file, or None)
+    """
+    results = {}
+    copy_counts = {}
+    current_query = None
+
+    with open(text_file, "r", encoding="utf-8") as infile:
+        filters = parse_filters_line(infile.readline())
+        infile.seek(0)
+
+        for line in infile:
+            line = line.rstrip("\n")
+
+            if line.startswith("Query: "):
+                current_query = line[len("Query: "):]
+                results[current_query] = []
+                continue
+
+            if line.startswith("Copies: ") and current_query is not None:
+                copy_counts[current_query] = int(line[len("Copies: "):])
+                continue
+
+            parts = line.split("\t")
+
+            if len(parts) != 6 or parts[0] == "database" or current_query is None:
+                continue
+
+            results[current_query].append({
+                "database": parts[0],
+                "subject_id": parts[1],
+                "identity": float(parts[2]),
+                "alignment_length": int(parts[3]),
+                "evalue": float(parts[4]),
+                "bitscore": float(parts[5]),
+            })
+
+    return HitTable.from_results(results), (copy_counts or None), filters
+
+
+def write_query_blocks(out, blast_results, copy_counts=None):
+    """
+    Write the text block of every query in blast_results to an open file.
+    """
+    for query_id, hit_lines in iter_hit_lines(blast_results):
+        out.write(f"Query: {query_id}\n")
+
+        if copy_counts is not None:
+            out.write(f"Copies: {copy_counts.get(query_id, 1)}\n")
+
+        out.write("database\tsubject_id\tidentity\talignment_length\tevalue\tbitscore\n")
+
+        if not hit_lines:
+            out.write("No hits found\n\n")
+            continue
+
+        for line in hit_lines:
+            out.write(line)
+
+        out.write("\n")
+
+
+def write_binary_results(blast_results, output_dir, copy_counts=None, filters=None):
+    """
+    Write BLAST results as a memory-mappable HitTable directory that keeps
+    every BLAST field and reloads without a parse step.
+    """
+    if isinstance(blast_results, HitTable):
+        table = blast_results
+    else:
+        table = HitTable.from_results(blast_results)
+
+    copies = None
+    if copy_counts is not None:
+        copies = np.array([copy_counts.get(query_id, 1) for query_id in table.query_ids], dtype=np.int32)
+
+    table.save(output_dir, metadata={"filters": filters}, copies=copies)
+
+
+def results_paths(query_file, run_name=None):
+    """
+    Return (results_dir, text_file, binary_dir) for a query file:
+    results/<query_name>/
     results/<query_name>/<query_name>_results.txt
+    results/<query_name>/<query_name>_results.hits
+
+    run_name replaces <query_name> when given.
     """
+    query_name = os.path.basename(query_file)
+
+    if query_name.endswith(".gz"):
+        query_name = query_name[:-len(".gz")]
+
+    query_name = os.path.splitext(query_name)[0]
+
+    if run_name:
+        query_name = run_name
 
-    query_name = os.path.splitext(os.path.basename(query_file))[0]
     results_dir = os.path.join("results", query_name)
 
+    return (
+        results_dir,
+        os.path.join(results_dir, f"{query_name}_results.txt"),
+        os.path.join(results_dir, f"{query_name}_results.hits"),
+    )
+
+
+def clusters_path(results_file):
+    """
+    Return the cluster membership file that belongs to a results file.
+
+    Example:
+    results/q1/q1_results.txt -> results/q1/q1_clusters.tsv
+    results/q1/q1_results.hits -> results/q1/q1_clusters.tsv
+    """
+    results_file = results_file.rstrip(os.sep)
+
+    for suffix in ("_results.txt", "_results.hits"):
+        if results_file.endswith(suffix):
+            return results_file[:-len(suffix)] + "_clusters.tsv"
+
+    return os.path.join(os.path.dirname(results_file), "clusters.tsv")
+
+
+def journal_path(results_file):
+    """
+    Return the run journal that belongs to a results file.
+
+    Example:
+    results/q1/q1_results.txt -> results/q1/q1_journal.tsv
+    """
+    return clusters_path(results_file)[:-len("_clusters.tsv")] + "_journal.tsv"
+
+
+def load_cluster_members(results_file):
+    """
+    Read the queries whose hits were inferred from a cluster representative.
+
+    Output:
+    - dict mapping member query_id -> representative query_id (empty if
+      the run was not clustered)
+    """
+    path = clusters_path(results_file)
+    members = {}
+
+    if not os.path.isfile(path):
+        return members
+
+    with open(path, "r", encoding="utf-8") as infile:
+        for line in infile:
+            if line.startswith("#"):
+                continue
+
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) >= 2:
+                members[fields[0]] = fields[1]
+
+    return members
+
+
+def check_results_format(results_format):
+    """
+    Raise ValueError unless results_format is 'text', 'binary', or 'both'.
+    """
+    if results_format not in ("text", "binary", "both"):
+        raise ValueError(f"Unknown results format '{results_format}'. Use 'text', 'binary', or 'both'.")
+
+
+def save_results(
+    blast_results,
+    query_file,
+    copy_counts=None,
+    run_name=None,
+    filters=None,
+    results_format="text",
+):
+    """
+    Save BLAST results to:
+    results/<query_name>/<query_name>_results.txt   (text format)
+    results/<query_name>/<query_name>_results.hits/ (binary format)
+
+    results_format is 'text', 'binary', or 'both'. The binary format keeps
+    all BLAST fields and is what --classify loads fastest; the text format
+    remains available for reading and export.
+
+    filters (from BlastRunner.hit_filters) is recorded with the results
+    when hits were filtered while parsing, so reclassification can check
+    that its thresholds are still valid for the saved hits.
+
+    run_name replaces <query_name> when given, e.g. for partial re-runs
+    that must not overwrite the results of the full query file.
+
+    If copy_counts is given (query_id -> number of identical sequences in
+    the run, from dereplication), it is saved with the results; the text
+    format writes a "Copies: <n>" line under each query header.
+
+    Returns the path of the saved results (the binary directory when both
+    formats are written).
+    """
+    check_results_format(results_format)
+
+    results_dir, output_file, binary_dir = results_paths(query_file, run_name)
+
     if os.path.exists(results_dir):
         shutil.rmtree(results_dir)
 
     os.makedirs(results_dir, exist_ok=True)
 
-    output_file = os.path.join(results_dir, f"{query_name}_results.txt")
+    if results_format in ("text", "both"):
+        write_text_results(blast_results, output_file, copy_counts, filters)
+        sys.stdout.write(f"Results saved in: {output_file}\n")
 
-    with open(output_file, "w", encoding="utf-8") as out:
+    if results_format in ("binary", "both"):
+        write_binary_results(blast_results, binary_dir, copy_counts, filters)
+        sys.stdout.write(f"Results saved in: {binary_dir}\n")
+        return binary_dir
 
-        for query_id, hits in blast_results.items():
-            out.write(f"Query: {query_id}\n")
-            out.write("database\tsubject_id\tidentity\talignment_length\tevalue\tbitscore\n")
+    return output_file
+
+
+def saved_run_databases(query_file, fingerprint, run_name=None):
+    """
+    Return the database fingerprints that finished results were searched
+    against, after checking that they can be updated by a run with the
+    given fingerprint (see ResultsWriter).
+
+    New hits are only comparable with the saved ones if they come from the
+    same query file and configuration, so both must match the journal of
+    the saved run; only the databases may differ.
+
+    Raises FileNotFoundError if there are no finished results to update,
+    and ValueError if the query file or configuration changed.
+    """
+    _, text_file, binary_dir = results_paths(query_file, run_name)
+    journal_file = journal_path(text_file)
+
+    if not (os.path.isfile(text_file) or os.path.isdir(binary_dir)) or not os.path.isfile(journal_file):
+        raise FileNotFoundError(
+            f"No finished results to update in {os.path.dirname(text_file)}. Run --run_blast first."
+        )
+
+    journal = RunJournal(journal_file)
+    journal.read()
+
+    if not journal.finished:
+        raise ValueError(
+            f"The run in {os.path.dirname(text_file)} did not finish. "
+            "Complete it with --resume before updating it."
+        )
+
+    changes = journal.changes({key: value for key, value in fingerprint.items() if key != "databases"})
 
-            if not hits:
-                out.write("No hits found\n\n")
+    if changes:
+        raise ValueError(
+            f"Cannot update the results in {os.path.dirname(text_file)}: "
+            f"inputs changed since they were saved ({', '.join(changes)}). "
+            "Run again without --update to start over."
+        )
+
+    return journal.fingerprint["databases"]
+
+
+def update_results(query_file, new_table, replaced_databases, fingerprint, run_name=None):
+    """
+    Merge the hits of new or rebuilt databases into saved results.
+
+    Rows from the databases in replaced_databases (rebuilt or no longer
+    present) are dropped, new_table is merged in query by query, and every
+    saved format (binary and text) is rewritten. The run journal is
+    restarted with fingerprint, so the next update compares against the
+    new database set.
+
+    new_table must hold hits for the same queries as the saved results;
+    database names are the basenames used in the 'database' hit field.
+
+    Returns (merged HitTable, IDs of the queries whose hits changed).
+    Raises ValueError if new_table holds queries the results do not.
+    """
+    _, text_file, binary_dir = results_paths(query_file, run_name)
+    has_binary = os.path.isdir(binary_dir)
+    has_text = os.path.isfile(text_file)
+
+    if has_binary:
+        metadata = HitTable.read_manifest(binary_dir)["metadata"]
+        saved = HitTable.load(binary_dir)
+        copies = HitTable.load_copies(binary_dir)
+        copies = np.array(copies) if copies is not None else None
+    else:
+        saved, copy_counts, filters = load_text_results(text_file)
+        metadata = {"filters": filters}
+        copies = None
+        if copy_counts is not None:
+            copies = np.array([copy_counts.get(query_id, 1) for query_id in saved.query_ids], dtype=np.int32)
+
+    replaced_codes = [
+        code for code, name in enumerate(saved.databases) if name in replaced_databases
+    ]
+    dropped = np.isin(saved.database, replaced_codes)
+
+    changed = np.zeros(len(saved.query_ids), dtype=bool)
+    changed[saved.query[dropped]] = True
+
+    merged = HitTable.concat([saved.take(~dropped), new_table])
+
+    if list(merged.query_ids) != list(saved.query_ids):
+        raise ValueError(f"New hits do not match the queries of {os.path.dirname(text_file)}")
+
+    if len(new_table):
+        code_of = {query_id: code for code, query_id in enumerate(merged.query_ids)}
+        new_codes = np.array([code_of[query_id] for query_id in new_table.query_ids], dtype=np.int64)
+        changed[new_codes[np.unique(new_table.query)]] = True
+
+    merged = merged.take(np.argsort(merged.query, kind="stable"))
+
+    if has_binary:
+        metadata = {**metadata, "databases": fingerprint["databases"]}
+        merged.save(binary_dir, metadata=metadata, copies=copies)
+
+    if has_text:
+        copy_counts = dict(zip(merged.query_ids, copies.tolist())) if copies is not None else None
+        write_text_results(merged, text_file + ".tmp", copy_counts, metadata.get("filters"))
+        os.replace(text_file + ".tmp", text_file)
+
+    # A finished journal is never resumed, so its commit needs no output sizes
+    journal = RunJournal(journal_path(text_file))
+    journal.start(fingerprint)
+    journal.commit(list(merged.query_ids), {})
+    journal.finish()
+
+    changed_ids = [query_id for code, query_id in enumerate(merged.query_ids) if changed[code]]
+    return merged, changed_ids
+
+
+# ---------------------------------------------------------------------------
+# Incremental writing
+# ---------------------------------------------------------------------------
+
+JOURNAL_HEADER = "#blast_journal\tversion=1"
+
+
+class RunJournal:
+    """
+    Append-only record of the queries whose results are safely on disk.
+
+    The journal starts with the fingerprint of the run (query file,
+    database fingerprints, configuration). Each commit appends the IDs of
+    the queries just written, followed by a '#commit' line holding the
+    output sizes at that point. Query lines after the last '#commit' line
+    were never confirmed and are ignored, so a crash at any point leaves
+    a consistent journal.
+
+    Format:
+        #blast_journal  version=1
+        #fingerprint    {"query_file": ..., "databases": {...}, "config": ...}
+        query_id
+        ...
+        #commit         {"queries": ..., "rows": ..., ...}
+        #finished
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fingerprint = None
+        self.completed = []
+        self.state = None
+        self.finished = False
+        self._out = None
+
+    def read(self):
+        """
+        Load the journal and cut off anything after the last commit.
+        """
+        pending = []
+        committed_size = 0
+
+        with open(self.path, "r+b") as journal_file:
+            if journal_file.readline().decode("utf-8").rstrip("\n") != JOURNAL_HEADER:
+                raise ValueError(f"Not a run journal: {self.path}")
+
+            for raw_line in iter(journal_file.readline, b""):
+                if not raw_line.endswith(b"\n"):
+                    break
+
+                line = raw_line.decode("utf-8").rstrip("\n")
+
+                if line.startswith("#fingerprint\t"):
+                    self.fingerprint = json.loads(line.split("\t", 1)[1])
+                    committed_size = journal_file.tell()
+                elif line.startswith("#commit\t"):
+                    self.completed.extend(pending)
+                    pending = []
+                    self.state = json.loads(line.split("\t", 1)[1])
+                    committed_size = journal_file.tell()
+                elif line == "#finished":
+                    self.finished = True
+                    committed_size = journal_file.tell()
+                else:
+                    pending.append(line)
+
+            if self.fingerprint is None:
+                raise ValueError(f"Run journal has no fingerprint: {self.path}")
+
+            journal_file.truncate(committed_size)
+
+    def start(self, fingerprint):
+        """
+        Begin a new journal for a run with the given fingerprint.
+        """
+        self.fingerprint = fingerprint
+
+        with open(self.path, "w", encoding="utf-8") as journal_file:
+            journal_file.write(f"{JOURNAL_HEADER}\n")
+            journal_file.write(f"#fingerprint\t{json.dumps(fingerprint, sort_keys=True)}\n")
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+
+    def changes(self, fingerprint):
+        """
+        Return a description of every part of fingerprint that differs
+        from the journal's (empty when the run can be resumed).
+        """
+        changes = []
+
+        for key, value in fingerprint.items():
+            recorded = self.fingerprint.get(key)
+
+            if recorded == value:
                 continue
 
-            for hit in hits:
-                out.write(
-                    f"{hit['database']}\t"
-                    f"{hit['subject_id']}\t"
-                    f"{hit['identity']}\t"
-                    f"{hit['alignment_length']}\t"
-                    f"{hit['evalue']}\t"
-                    f"{hit['bitscore']}\n"
-                )
+            if isinstance(value, dict) and isinstance(recorded, dict):
+                for name in sorted(set(value) | set(recorded)):
+                    if value.get(name) != recorded.get(name):
+                        changes.append(f"{key}: {name}")
+            else:
+                changes.append(key)
+
+        return changes
+
+    def commit(self, query_ids, state):
+        """
+        Record that query_ids are written and the outputs have reached state.
+        """
+        if self._out is None:
+            self._out = open(self.path, "a", encoding="utf-8")
+
+        for query_id in query_ids:
+            self._out.write(f"{query_id}\n")
+
+        self._out.write(f"#commit\t{json.dumps(state, sort_keys=True)}\n")
+        self._out.flush()
+        os.fsync(self._out.fileno())
+        self.completed.extend(query_ids)
+        self.state = state
+
+    def finish(self):
+        """
+        Mark the run as complete and close the journal.
+        """
+        if self._out is None:
+            self._out = open(self.path, "a", encoding="utf-8")
+
+        self._out.write("#finished\n")
+        self.close()
+        self.finished = True
+
+    def close(self):
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+
+class ResultsWriter:
+    """
+    Write results while a run is still searching.
+
+    Each call to write() hands over queries that are finished on every
+    database. They are buffered until about buffer_hits rows (hits plus
+    queries) are waiting, then appended to the output, so memory stays
+    bounded no matter how long the run is.
+
+    Output goes to <file>.partial (text) and <dir>.partial/ (binary).
+    Both are valid results at every flush: the text file only ever ends
+    after a complete query block, and the binary directory can be loaded
+    or classified directly. finalize() renames them to their final names;
+    if the run fails, the partial output is left in place.
+
+    With with_clusters=True, queries whose hits were copied from a cluster
+    representative are listed in <query_name>_clusters.tsv, written and
+    journaled along with the results.
+
+    When a run fingerprint is given, every flush is also recorded in a run
+    journal (<query_name>_journal.tsv). With resume=True an interrupted
+    run is picked up where its journal ends: the partial outputs are cut
+    back to the last commit and appended to, and completed_queries lists
+    the queries that do not need to be searched again.
+
+    Attributes:
+        results_dir (str): results/<query_name>
+        text_file (str): Final text results path.
+        binary_dir (str): Final binary results directory.
+        clusters_file (str): Final cluster membership file path.
+        journal_file (str): Run journal path.
+        completed_queries (set[str]): Queries already written by an
+            earlier attempt of a resumed run.
+        finished (bool): True if a resumed run had already completed.
+    """
+
+    def __init__(
+        self,
+        query_file,
+        run_name=None,
+        filters=None,
+        results_format="text",
+        with_copies=False,
+        buffer_hits=100000,
+        fingerprint=None,
+        resume=False,
+        with_clusters=False,
+    ):
+        """
+        Prepare the results directory and open the partial outputs.
+
+        Arguments match save_results(). The database fingerprints in
+        fingerprint are also saved with binary results; the run journal
+        keeps the whole fingerprint, which saved_run_databases() reads back
+        to update finished results. with_copies stores copy counts
+        (from dereplication); buffer_hits bounds the number of buffered
+        rows before they are written out. fingerprint (a JSON-serializable
+        dict describing the run's inputs) turns on the run journal, and
+        resume continues the journaled run instead of starting over.
+        with_clusters writes the cluster membership file.
+
+        Raises ValueError if resume is requested and the fingerprint does
+        not match the journal of the interrupted run.
+        """
+        check_results_format(results_format)
+
+        self.results_dir, self.text_file, self.binary_dir = results_paths(query_file, run_name)
+        self.journal_file = journal_path(self.text_file)
+        self.clusters_file = clusters_path(self.text_file)
+        self.results_format = results_format
+        self.with_copies = with_copies
+        self.buffer_hits = max(1, int(buffer_hits))
+        self.completed_queries = set()
+        self.finished = False
+
+        self._pieces = []
+        self._buffered = 0
+        self._text_out = None
+        self._clusters_out = None
+        self._binary_writer = None
+        self._journal = None
+        self._metadata = {"filters": filters}
+
+        if fingerprint is not None:
+            self._metadata["databases"] = fingerprint["databases"]
+
+        if fingerprint is not None:
+            self._journal = RunJournal(self.journal_file)
+
+        if resume and self._journal is not None and os.path.isfile(self.journal_file):
+            if self._resume(fingerprint, filters):
+                return
+            self._journal = RunJournal(self.journal_file)
+
+        if resume and not self.completed_queries:
+            sys.stdout.write(f"Nothing to resume in {self.results_dir}; starting a new run.\n")
+
+        if os.path.exists(self.results_dir):
+            shutil.rmtree(self.results_dir)
+
+        os.makedirs(self.results_dir, exist_ok=True)
+
+        if self._journal is not None:
+            self._journal.start(fingerprint)
+
+        if results_format in ("text", "both"):
+            self._text_out = open(self.text_file + ".partial", "w", encoding="utf-8")
+
+            if filters is not None:
+                self._text_out.write(format_filters_line(filters))
+
+        if with_clusters:
+            self._clusters_out = open(self.clusters_file + ".partial", "w", encoding="utf-8")
+            self._clusters_out.write(CLUSTERS_HEADER)
+
+        if results_format in ("binary", "both"):
+            self._binary_writer = HitTableWriter(
+                self.binary_dir,
+                metadata=self._metadata,
+                with_copies=with_copies,
+            )
+
+        # The filters line is part of the first commit, so a run that dies
+        # before any query finishes resumes with the same text header
+        self._commit_journal([])
+
+    def _resume(self, fingerprint, filters):
+        """
+        Reopen the partial outputs of an interrupted run at its last commit.
+
+        Returns False if the journal holds no commit yet, in which case
+        the run is simply started over.
+        """
+        journal = self._journal
+        journal.read()
+
+        changes = journal.changes(fingerprint)
+        if changes:
+            raise ValueError(
+                f"Cannot resume the run in {self.results_dir}: "
+                f"inputs changed since it started ({', '.join(changes)}). "
+                "Run again without --resume to start over."
+            )
+
+        self.completed_queries = set(journal.completed)
+
+        if journal.finished:
+            self.finished = True
+            sys.stdout.write(f"Run in {self.results_dir} is already complete.\n")
+            return True
+
+        if journal.state is None:
+            return False
+
+        state = journal.state
+
+        if self.results_format in ("text", "both"):
+            partial_text = self.text_file + ".partial"
+
+            if not os.path.isfile(partial_text):
+                raise FileNotFoundError(f"Partial text results not found: {partial_text}")
+
+            self._text_out = open(partial_text, "r+", encoding="utf-8")
+            self._text_out.truncate(state["text_bytes"])
+            self._text_out.seek(state["text_bytes"])
+
+        if state.get("clusters_bytes") is not None:
+            partial_clusters = self.clusters_file + ".partial"
+
+            if not os.path.isfile(partial_clusters):
+                raise FileNotFoundError(f"Partial cluster file not found: {partial_clusters}")
+
+            self._clusters_out = open(partial_clusters, "r+", encoding="utf-8")
+            self._clusters_out.truncate(state["clusters_bytes"])
+            self._clusters_out.seek(state["clusters_bytes"])
+
+        if self.results_format in ("binary", "both"):
+            self._binary_writer = HitTableWriter(
+                self.binary_dir,
+                metadata=self._metadata,
+                with_copies=self.with_copies,
+                resume_state=state["binary"],
+            )
+
+        sys.stdout.write(
+            f"Resuming run in {self.results_dir}: "
+            f"{len(self.completed_queries)} queries already completed.\n"
+        )
+        return True
+
+    def _commit_journal(self, query_ids):
+        """
+        Record the queries just written, with the current output sizes.
+        """
+        if self._journal is None:
+            return
+
+        state = {"text_bytes": None, "binary": None, "clusters_bytes": None}
+
+        if self._text_out is not None:
+            state["text_bytes"] = self._text_out.tell()
+
+        if self._clusters_out is not None:
+            state["clusters_bytes"] = self._clusters_out.tell()
+
+        if self._binary_writer is not None:
+            state["binary"] = self._binary_writer.state()
+
+        self._journal.commit(query_ids, state)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.finalize()
+        else:
+            self.close()
+        return False
+
+    def write(self, blast_results, copy_counts=None, inferred=None):
+        """
+        Add finished queries (dictionary or HitTable) to the output.
+
+        copy_counts maps query_id -> number of identical sequences for
+        the queries in blast_results. inferred maps query_id ->
+        (representative_id, estimated identity) for queries whose hits
+        were copied from a cluster representative; it may cover more
+        queries than blast_results.
+        """
+        table = blast_results if isinstance(blast_results, HitTable) else HitTable.from_results(blast_results)
+
+        copies = None
+        if self.with_copies:
+            copy_counts = copy_counts or {}
+            copies = np.array([copy_counts.get(query_id, 1) for query_id in table.query_ids], dtype=np.int32)
+
+        members = []
+        if self._clusters_out is not None and inferred:
+            members = [
+                (query_id, *inferred[query_id]) for query_id in table.query_ids if query_id in inferred
+            ]
+
+        self._pieces.append((table, copies, members))
+        self._buffered += len(table) + len(table.query_ids)
+
+        if self._buffered >= self.buffer_hits:
+            self.flush()
+
+    def flush(self):
+        """
+        Append all buffered queries to the partial outputs and journal them.
+        """
+        if not self._pieces:
+            return
+
+        table = HitTable.concat([piece for piece, _, _ in self._pieces])
+        members = [member for _, _, piece_members in self._pieces for member in piece_members]
+        copies = None
+
+        if self.with_copies:
+            copies = np.concatenate([piece_copies for _, piece_copies, _ in self._pieces])
+
+        self._pieces = []
+        self._buffered = 0
+
+        if self._text_out is not None:
+            copy_counts = dict(zip(table.query_ids, copies.tolist())) if copies is not None else None
+            write_query_blocks(self._text_out, table, copy_counts)
+            self._text_out.flush()
+
+        if self._binary_writer is not None:
+            self._binary_writer.append(table, copies)
+
+        if self._clusters_out is not None:
+            for query_id, representative_id, identity in members:
+                self._clusters_out.write(f"{query_id}\t{representative_id}\t{identity}\n")
+            self._clusters_out.flush()
+
+        self._commit_journal(list(table.query_ids))
+
+    def close(self):
+        """
+        Flush and close the partial outputs without renaming them.
+        """
+        self.flush()
+
+        if self._text_out is not None and not self._text_out.closed:
+            self._text_out.close()
+
+        if self._clusters_out is not None and not self._clusters_out.closed:
+            self._clusters_out.close()
+
+        if self._binary_writer is not None:
+            self._binary_writer.close()
+
+        if self._journal is not None:
+            self._journal.close()
+
+    def finalize(self):
+        """
+        Flush everything and move the outputs to their final names.
+
+        Returns the path of the saved results (the binary directory when
+        both formats are written).
+        """
+        if self.finished:
+            return self.binary_dir if self.results_format != "text" else self.text_file
+
+        self.close()
+
+        if self._text_out is not None:
+            os.replace(self.text_file + ".partial", self.text_file)
+            sys.stdout.write(f"Results saved in: {self.text_file}\n")
+
+        if self._clusters_out is not None:
+            os.replace(self.clusters_file + ".partial", self.clusters_file)
+            sys.stdout.write(f"Cluster members saved in: {self.clusters_file}\n")
+
+        if self._binary_writer is not None:
+            self._binary_writer.finalize()
+
+        if self._journal is not None:
+            self._journal.finish()
+
+        self.finished = True
 
-            out.write("\n")
+        if self._binary_writer is not None:
+            sys.stdout.write(f"Results saved in: {self.binary_dir}\n")
+            return self.binary_dir
 
-    sys.stdout.write(f"Results saved in: {output_file}\n")
+        return self.text_file
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# By Isabella Zuluaga
+
+"""
+clustering.py
+
+Groups near-identical query sequences so only one per group is searched.
+
+Currently supports:
+- collapsing exact duplicates first (see dereplication.py)
+- greedy, CD-HIT-like clustering of the remaining sequences: sequences
+  are visited from longest to shortest, and each one joins the first
+  representative it matches at or above the identity threshold, or
+  becomes a new representative
+- estimating identity from shared k-mers through an in-memory index of
+  each representative's smallest k-mer hashes (seeds)
+
+Exact dereplication misses reads that differ by a single sequencing
+error. Clustering them with their representative cuts the number of
+searches further; the members inherit the representative's hits and
+classification, and are reported as inferred.
+
+Identity is estimated, not aligned: a member sharing a fraction f of its
+k-mers with the representative is given identity f ** (1 / k). This is
+only an approximation: it matches the expected k-mer loss for independent,
+scattered substitutions, is optimistic when errors cluster together, and
+is pessimistic for insertions and deletions.
+
+Clustering covers the sequences passed in one call; callers that read
+queries in chunks cluster each chunk on its own.
+
+Functions:
+    estimated_identity: Identity implied by a shared k-mer fraction.
+    cluster_sequences: Cluster sequences around greedy representatives.
+
+Typical usage:
+    representatives, assignment, inferred = cluster_sequences(queries, 0.97, "nucl")
+"""
+
+import numpy as np
+
+from dereplication import dereplicate_sequences
+from sketch import BUILD_CHUNK_BASES, kmer_hashes
+
+
+# k-mer length per sequence type, and the number of smallest k-mer hashes
+# of each representative kept in the seed index
+CLUSTER_K: dict[str, int] = {"nucl": 11, "prot": 5}
+NUM_SEEDS: int = 8
+
+# Candidate representatives compared per sequence, most shared seeds first
+MAX_CANDIDATES: int = 20
+
+
+def estimated_identity(shared_fraction: float, k: int) -> float:
+    """
+    Return the identity implied by the fraction of k-mers two sequences share.
+
+    A k-mer survives only if all of its k positions match, so with
+    independent substitutions at identity p about p ** k of the k-mers are
+    shared; inverting that gives an estimate, not a measured identity.
+
+    Args:
+        shared_fraction (float): Fraction of a sequence's k-mers found in
+            the other sequence.
+        k (int): k-mer length.
+
+    Returns:
+        float: Estimated identity between 0 and 1.
+    """
+    return float(shared_fraction) ** (1.0 / k)
+
+
+def _length_batches(order: list[str], sequences: dict[str, str]):
+    """
+    Split IDs into consecutive batches of about BUILD_CHUNK_BASES bases.
+    """
+    batch: list[str] = []
+    batch_bases = 0
+
+    for query_id in order:
+        batch.append(query_id)
+        batch_bases += len(sequences[query_id])
+
+        if batch_bases >= BUILD_CHUNK_BASES:
+            yield batch
+            batch, batch_bases = [], 0
+
+    if batch:
+        yield batch
+
+
+def cluster_sequences(
+    sequences: dict[str, str],
+    identity: float,
+    db_type: str = "nucl",
+) -> tuple[dict[str, str], dict[str, str], dict[str, tuple[str, float]]]:
+    """
+    Cluster sequences at or above an identity threshold.
+
+    Representatives are always at least as long as their members. The
+    k-mers of each sequence are hashed in vectorized batches; the greedy
+    pass then only compares a sequence with representatives sharing one of
+    its seeds, so it scales with the number of sequences, not its square.
+
+    Args:
+        sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+        identity (float): Minimum estimated identity (0-1) to join a cluster.
+        db_type (str): 'nucl' or 'prot'.
+
+    Returns:
+        tuple[dict[str, str], dict[str, str], dict[str, tuple[str, float]]]:
+            - representatives {representative_id: sequence}, in input order
+            - representative of every query {query_id: representative_id},
+              in input order
+            - inferred members {query_id: (representative_id, identity)}:
+              queries whose sequence differs from their representative's
+              (exact duplicates are not listed)
+
+    Example:
+        Input (identity 0.97):
+            {"r1": <250 bp>, "r2": <r1 with one substitution>, "r3": <r1>}
+
+        Output:
+            ({"r1": ...},
+             {"r1": "r1", "r2": "r1", "r3": "r1"},
+             {"r2": ("r1", 0.996)})
+    """
+    k = CLUSTER_K[db_type]
+    unique, duplicates_of = dereplicate_sequences(sequences)
+    position = {query_id: index for index, query_id in enumerate(unique)}
+    order = sorted(unique, key=lambda query_id: (-len(unique[query_id]), position[query_id]))
+
+    cluster_of: dict[str, str] = {}
+    inferred_identity: dict[str, float] = {}
+    representative_ids: list[str] = []
+    representative_hashes: list[np.ndarray] = []
+    seed_index: dict[int, list[int]] = {}
+
+    for batch in _length_batches(order, unique):
+        hashes, owners = kmer_hashes([unique[query_id] for query_id in batch], db_type, k, 1)
+        bounds = np.searchsorted(owners, np.arange(len(batch) + 1))
+
+        for row, query_id in enumerate(batch):
+            kmers = np.unique(hashes[bounds[row]:bounds[row + 1]])
+            seeds = kmers[:NUM_SEEDS].tolist()
+            match: int | None = None
+
+            if len(kmers):
+                votes: dict[int, int] = {}
+                for seed in seeds:
+                    for candidate in seed_index.get(seed, ()):
+                        votes[candidate] = votes.get(candidate, 0) + 1
+
+                candidates = sorted(votes, key=lambda candidate: (-votes[candidate], candidate))
+
+                for candidate in candidates[:MAX_CANDIDATES]:
+                    target = representative_hashes[candidate]
+                    found = np.searchsorted(target, kmers)
+                    found[found == len(target)] = 0
+                    shared = np.count_nonzero(target[found] == kmers) / len(kmers)
+                    estimate = estimated_identity(shared, k)
+
+                    if estimate >= identity:
+                        match = candidate
+                        inferred_identity[query_id] = estimate
+                        break
+
+            if match is not None:
+                cluster_of[query_id] = representative_ids[match]
+                continue
+
+            cluster_of[query_id] = query_id
+            representative_hashes.append(kmers)
+            representative_ids.append(query_id)
+
+            for seed in seeds:
+                seed_index.setdefault(seed, []).append(len(representative_ids) - 1)
+
+    representatives = {
+        query_id: sequence for query_id, sequence in unique.items() if cluster_of[query_id] == query_id
+    }
+    assignment: dict[str, str] = {}
+    inferred: dict[str, tuple[str, float]] = {}
+
+    for query_id, duplicate_of in duplicates_of.items():
+        assignment[query_id] = cluster_of[duplicate_of]
+
+        if duplicate_of in inferred_identity:
+            inferred[query_id] = (assignment[query_id], round(inferred_identity[duplicate_of], 4))
+
+    return representatives, assignment, inferred
@@ -16,6 +16,10 @@ pipeline can be controlled without changing the source code.
 
 Functions:
     load_config: Load configuration values from a text file.
+    config_flag: Read a yes/no configuration value as a boolean.
+    config_list: Read a semicolon-separated configuration value as a list.
+    classifier_thresholds: Read the E-value and identity thresholds used
+                           to classify hits.
     print_config: Print configuration values in a readable format.
 
 Typical usage:
@@ -65,6 +69,71 @@ def load_config(config_path):
     return config_dict
 
 
+def config_flag(config_dict, key, default=False):
+    """
+    Read a yes/no style configuration value as a boolean.
+
+    Input:
+    - config_dict: dict returned by load_config
+    - key: parameter name
+    - default: value used when the parameter is missing
+
+    Output:
+    - True for yes/true/on/1, False otherwise
+    """
+    if key not in config_dict:
+        return default
+
+    return str(config_dict[key]).strip().lower() in ("yes", "true", "on", "1")
+
+
+def config_list(config_dict, key):
+    """
+    Read a semicolon-separated configuration value as a list of strings.
+
+    Input:
+    - config_dict: dict returned by load_config
+    - key: parameter name
+
+    Output:
+    - list of non-empty, stripped items; empty if the parameter is missing
+      or blank
+    """
+    value = config_dict.get(key)
+
+    if value is None or value != value:  # missing or blank (NaN)
+        return []
+
+    return [item.strip() for item in str(value).split(";") if item.strip()]
+
+
+def classifier_thresholds(config_dict):
+    """
+    Read the thresholds a hit must pass to be used for classification.
+
+    'classify_evalue' and 'classify_identity' set them explicitly; when they
+    are missing or blank, the BLAST 'evalue' and 'perc_identity' settings
+    are used, as before.
+
+    Input:
+    - config_dict: dict returned by load_config
+
+    Output:
+    - (evalue_threshold, identity_threshold) as floats
+    """
+    def value(key, fallback_key, default):
+        for name in (key, fallback_key):
+            setting = config_dict.get(name)
+            if setting is not None and setting == setting and str(setting).strip():
+                return float(setting)
+        return default
+
+    return (
+        value("classify_evalue", "evalue", 1e-5),
+        value("classify_identity", "perc_identity", 70.0),
+    )
+
+
 def print_config(config_dict):
     """
     Print loaded configuration nicely.
@@ -17,9 +17,21 @@ This merged version keeps:
     * reuse existing databases if already present
     * download NCBI databases into their own folders
     * support both single-part and multi-part NCBI BLAST databases
+    * maintain one alias database (.nal/.pal) per type spanning every
+      local database of that type, plus a subject-ID -> database map
+    * build a k-mer sketch of each database for the search prefilter,
+      when the prefilter is enabled
+    * build large databases as N volumes in parallel makeblastdb
+      processes, joined by an alias file like a multi-volume NCBI database
+    * update a database from a new version of its FASTA file, rebuilding
+      only the volumes whose records were added, removed, or changed
+    * keep a catalog of every database (type, volumes, sizes, build time,
+      fingerprint) in databases/.catalog/, so listing databases does not
+      rescan the whole tree
 
 Classes:
     DatabaseManager: Handles database creation, retrieval, and downloading.
+    SubjectDatabaseMap: Look up the source database of alias search hits.
 
 Typical usage:
     manager = DatabaseManager()
@@ -29,13 +41,29 @@ Functional usage:
     db_path = get_database("seqs.fasta", "my_db", "nucleotide")
 """
 
+import hashlib
+import json
 import os
 import shutil
+import sqlite3
 import subprocess
 import sys
-import tarfile
-import urllib.request
+import tempfile
+import time
+import uuid
 import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; the catalog is then unlocked
+    fcntl = None
+
+from fasta_index import FastaIndex
+from ncbi_download import DEFAULT_CONNECTIONS, DEFAULT_MODE, NcbiDownloader, install_pending
+from file_handler import iter_fasta
+from sketch import build_sketch, merge_sketches, sketch_path
 
 
 # ---------------------------------------------------------------------------
@@ -66,6 +94,152 @@ PROT_EXTENSIONS: list[str] = [
 # Base URL for NCBI BLAST database FTP downloads
 NCBI_FTP_BASE_URL: str = "https://ftp.ncbi.nlm.nih.gov/blast/db"
 
+# Extension of the stamp file written next to a database every time it is
+# built or downloaded, so its fingerprint changes even if file sizes do not
+BUILD_STAMP_EXTENSION: str = ".build"
+
+# Files whose name, size, and modification time make up a database's
+# fingerprint: BLAST volume and alias files and the build stamp. Sidecars
+# (sketch, record manifest, a FASTA named after the database and its index)
+# are left out, since they can change while the BLAST database does not
+FINGERPRINT_EXTENSIONS: frozenset[str] = frozenset(
+    NUCL_EXTENSIONS + PROT_EXTENSIONS + [".nal", ".pal", BUILD_STAMP_EXTENSION]
+)
+
+# Alias databases spanning every database of one type live in a hidden
+# directory inside download_dir, so catalog scans do not list them
+ALIAS_DIR_NAME: str = ".alias"
+ALIAS_EXTENSIONS: dict[str, str] = {"nucl": ".nal", "prot": ".pal"}
+
+# Member list (prefix and fingerprint per line) the alias was built from,
+# and the subject-ID -> source database map built with it
+ALIAS_MEMBERS_EXTENSION: str = ".members"
+SUBJECT_MAP_EXTENSION: str = ".subjects.sqlite"
+SUBJECT_MAP_VERSION: int = 2
+
+# Catalog of every database in download_dir (type, volumes, sizes, build
+# time, fingerprint), kept in a hidden directory so that rewriting it does
+# not change the modification time of download_dir itself
+CATALOG_DIR_NAME: str = ".catalog"
+CATALOG_FILE_NAME: str = "catalog.json"
+CATALOG_LOCK_NAME: str = "catalog.lock"
+CATALOG_VERSION: int = 1
+
+# Volume list and per-volume content of a database built in shards, and
+# the per-record content digests of every database built from FASTA
+SHARD_MANIFEST_EXTENSION: str = ".shards"
+RECORD_MANIFEST_EXTENSION: str = ".records.sqlite"
+SHARD_COPY_BYTES: int = 1 << 20
+
+
+# ---------------------------------------------------------------------------
+# Parallel volume builds
+# ---------------------------------------------------------------------------
+
+def shard_of(sequence_id: str, num_shards: int) -> int:
+    """
+    Return the volume a record belongs to in a database built in shards.
+
+    Records are assigned by a hash of their ID, so a record stays in the
+    same volume when other records are added or removed, and an update of
+    the FASTA file only touches the volumes of the records that changed.
+
+    Args:
+        sequence_id (str): Record ID.
+        num_shards (int): Number of volumes.
+
+    Returns:
+        int: Volume number in 0..num_shards-1.
+    """
+    digest = hashlib.blake2b(sequence_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % num_shards
+
+
+def _iter_range_sequences(fasta_path: str, byte_ranges: list[tuple[int, int]]):
+    """
+    Yield the sequences of the FASTA records stored in the given byte ranges.
+    """
+    with open(fasta_path, "rb") as fasta_file:
+        for start_byte, end_byte in byte_ranges:
+            fasta_file.seek(start_byte)
+            sequence: list[str] = []
+
+            for raw_line in fasta_file.read(end_byte - start_byte).decode("utf-8").splitlines():
+                if raw_line.startswith(">"):
+                    if sequence:
+                        yield "".join(sequence)
+                    sequence = []
+                else:
+                    sequence.append(raw_line.strip())
+
+            if sequence:
+                yield "".join(sequence)
+
+
+def _build_volume(
+    fasta_path: str,
+    byte_ranges: list[tuple[int, int]],
+    volume_prefix: str,
+    db_type_flag: str,
+    title: str,
+    with_sketch: bool = False,
+) -> None:
+    """
+    Worker entry point: build one volume, and optionally its sketch, from
+    FASTA records.
+
+    Every byte range holds whole records (header to end of sequence), so
+    they are streamed to makeblastdb's stdin without a temporary copy.
+    Defined at module level so it can be pickled by ProcessPoolExecutor.
+
+    Raises:
+        RuntimeError: If makeblastdb exits with a non-zero return code.
+    """
+    # Output goes to temporary files: makeblastdb may write more than a
+    # pipe holds while its stdin is still being fed
+    with tempfile.TemporaryFile() as output:
+        process = subprocess.Popen(
+            [
+                "makeblastdb",
+                "-in", "-",
+                "-dbtype", db_type_flag,
+                "-title", title,
+                "-out", volume_prefix,
+            ],
+            stdin=subprocess.PIPE,
+            stdout=output,
+            stderr=subprocess.STDOUT,
+        )
+
+        try:
+            with open(fasta_path, "rb") as fasta_file:
+                for start_byte, end_byte in byte_ranges:
+                    fasta_file.seek(start_byte)
+                    remaining = end_byte - start_byte
+
+                    while remaining > 0:
+                        block = fasta_file.read(min(SHARD_COPY_BYTES, remaining))
+                        if not block:
+                            break
+                        process.stdin.write(block)
+                        remaining -= len(block)
+        except BrokenPipeError:
+            pass
+        finally:
+            process.stdin.close()
+
+        if process.wait() != 0:
+            output.seek(0)
+            raise RuntimeError(
+                f"makeblastdb failed for volume '{volume_prefix}' with return code {process.returncode}.\n"
+                f"OUTPUT:\n{output.read().decode('utf-8', 'replace')}"
+            )
+
+    if with_sketch:
+        build_sketch(_iter_range_sequences(fasta_path, byte_ranges), db_type_flag, sketch_path(volume_prefix))
+    elif os.path.isfile(sketch_path(volume_prefix)):
+        os.remove(sketch_path(volume_prefix))
+
 
 # ---------------------------------------------------------------------------
 # DatabaseManager class
@@ -82,17 +256,24 @@ class DatabaseManager:
 
     Attributes:
         download_dir (str): Directory where databases are stored.
+        build_sketches (bool): Whether to build prefilter sketches when a
+                               database is created, updated, or downloaded.
     """
 
-    def __init__(self, download_dir: str = "databases") -> None:
+    def __init__(self, download_dir: str = "databases", build_sketches: bool = False) -> None:
         """
         Initialize the DatabaseManager.
 
         Args:
             download_dir (str): Directory to store all databases.
                                 Defaults to 'databases'.
+            build_sketches (bool): Build prefilter sketches along with
+                                   databases (with 'prefilter' enabled).
+                                   Defaults to False; --build_sketches
+                                   sketches existing databases later.
         """
         self.download_dir = download_dir
+        self.build_sketches = build_sketches
 
     # -----------------------------------------------------------------------
     # Private helpers
@@ -177,203 +358,722 @@ class DatabaseManager:
         db_prefix = os.path.join(db_dir, db_name)
         return db_dir, db_prefix
 
-    @staticmethod
-    def _download_progress(block_num: int, block_size: int, total_size: int) -> None:
+    def _write_build_stamp(self, db_prefix: str) -> None:
         """
-        Print a download progress bar to stdout.
+        Write a fresh build stamp next to the database files.
+
+        The stamp is part of the database fingerprint, so any rebuild or
+        re-download invalidates results cached for the previous version.
 
         Args:
-            block_num (int):  Current block number being downloaded.
-            block_size (int): Size of each block in bytes.
-            total_size (int): Total file size in bytes.
-        """
-        downloaded = block_num * block_size
-        if total_size > 0:
-            percent = min(100.0, downloaded * 100 / total_size)
-            mb_done = downloaded / 1_000_000
-            mb_total = total_size / 1_000_000
-            sys.stdout.write(f"\r  {percent:.1f}%  {mb_done:.1f} / {mb_total:.1f} MB")
-            sys.stdout.flush()
+            db_prefix (str): Full path prefix of the database.
+        """
+        with open(db_prefix + BUILD_STAMP_EXTENSION, "w", encoding="utf-8") as stamp:
+            stamp.write(f"{uuid.uuid4().hex}\t{time.time()}\n")
 
-    def _downloaded_db_exists(self, db_name: str, db_type_flag: str, db_dir: str) -> bool:
+    def _check_blastdbcmd_installed(self) -> None:
         """
-        Check whether a downloaded NCBI BLAST database exists.
+        Verify that blastdbcmd is available on the system PATH.
 
-        Supports:
-        - alias files (.nal/.pal)
-        - single-volume BLAST files (e.g. swissprot.phr)
-        - multi-volume BLAST files (e.g. nt.000.nhr)
+        Raises:
+            EnvironmentError: If blastdbcmd is not found.
+        """
+        if not shutil.which("blastdbcmd"):
+            raise EnvironmentError(
+                "blastdbcmd not found. It is part of the NCBI BLAST+ toolkit:\n"
+                "  conda install -c bioconda blast"
+            )
+
+    def _alias_prefix(self, db_type_flag: str) -> str:
+        """
+        Return the path prefix of the alias database for one type.
 
         Args:
-            db_name (str): Database name.
             db_type_flag (str): Normalized database type, 'nucl' or 'prot'.
-            db_dir (str): Directory where the downloaded database is stored.
 
         Returns:
-            bool: True if downloaded BLAST files are detected, False otherwise.
+            str: e.g. 'databases/.alias/all_nucl'.
         """
-        if not os.path.isdir(db_dir):
-            return False
+        return os.path.join(self.download_dir, ALIAS_DIR_NAME, f"all_{db_type_flag}")
 
-        files = os.listdir(db_dir)
+    def _build_subject_map(self, alias_prefix: str, members: list[str], fingerprints: dict[str, str]) -> None:
+        """
+        Write the subject-ID -> database map of an alias database.
 
-        if db_type_flag == "nucl":
-            alias_ext = "nal"
-            extensions = [ext.lstrip(".") for ext in NUCL_EXTENSIONS]
-        else:
-            alias_ext = "pal"
-            extensions = [ext.lstrip(".") for ext in PROT_EXTENSIONS]
+        Subject IDs are listed with blastdbcmd, one member at a time. Every
+        (subject ID, database) pair is stored, so an ID shared by several
+        members is recorded as ambiguous instead of being credited to one
+        of them (see SubjectDatabaseMap.ambiguous).
 
-        ext_pattern = "|".join(re.escape(ext) for ext in extensions)
+        Members whose fingerprint is unchanged since the previous build are
+        copied from the previous map instead, so updating one database does
+        not list every other database again.
 
-        pattern = rf"^{re.escape(db_name)}(\.{alias_ext}|\.(?:{ext_pattern})|\.\d+\.(?:{ext_pattern}))$"
-        regex = re.compile(pattern)
+        Args:
+            alias_prefix (str): Alias database prefix.
+            members (list[str]): Member database prefixes.
+            fingerprints (dict[str, str]): Current fingerprint of every member.
 
-        return any(regex.match(filename) for filename in files)
+        Raises:
+            RuntimeError: If blastdbcmd fails for a member.
+        """
+        map_path = alias_prefix + SUBJECT_MAP_EXTENSION
+        temp_path = map_path + ".tmp"
+        members_path = alias_prefix + ALIAS_MEMBERS_EXTENSION
+
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        # Members of the previous build that can be copied. Maps written
+        # before SUBJECT_MAP_VERSION 2 kept one database per ID and may
+        # miss pairs, so they are never reused.
+        reusable: set[str] = set()
+
+        if os.path.isfile(map_path) and os.path.isfile(members_path):
+            previous = sqlite3.connect(f"file:{os.path.abspath(map_path)}?mode=ro", uri=True)
+            try:
+                version = previous.execute("PRAGMA user_version").fetchone()[0]
+            finally:
+                previous.close()
+
+            if version >= SUBJECT_MAP_VERSION:
+                with open(members_path, "r", encoding="utf-8") as members_file:
+                    for line in members_file:
+                        member, _, fingerprint = line.rstrip("\n").partition("\t")
+                        if fingerprints.get(member) == fingerprint:
+                            reusable.add(member)
+
+        connection = sqlite3.connect(temp_path)
+        connection.execute(f"PRAGMA user_version = {SUBJECT_MAP_VERSION}")
+        connection.execute(
+            "CREATE TABLE subjects (subject_id TEXT NOT NULL, database TEXT NOT NULL, "
+            "PRIMARY KEY (subject_id, database)) WITHOUT ROWID"
+        )
+
+        if reusable:
+            connection.execute("ATTACH DATABASE ? AS previous", (os.path.abspath(map_path),))
+
+        for member in members:
+            db_name = os.path.basename(member)
+
+            if member in reusable:
+                connection.execute(
+                    "INSERT OR IGNORE INTO subjects SELECT subject_id, database FROM previous.subjects WHERE database = ?",
+                    (db_name,),
+                )
+                continue
+
+            sys.stdout.write(f"Indexing subject IDs of '{db_name}'...\n")
+
+            # stderr goes to a temporary file: a full, unread stderr pipe
+            # would block blastdbcmd while stdout is being read
+            with tempfile.TemporaryFile(mode="w+", encoding="utf-8") as stderr_file:
+                process = subprocess.Popen(
+                    ["blastdbcmd", "-db", member, "-entry", "all", "-outfmt", "%i"],
+                    stdout=subprocess.PIPE,
+                    stderr=stderr_file,
+                    text=True,
+                )
 
-    def _url_exists(self, url: str) -> bool:
+                batch: list[tuple[str, str]] = []
+
+                for line in process.stdout:
+                    subject_id = line.strip()
+                    if subject_id:
+                        batch.append((subject_id, db_name))
+
+                    if len(batch) >= 100000:
+                        connection.executemany("INSERT OR IGNORE INTO subjects VALUES (?, ?)", batch)
+                        batch = []
+
+                connection.executemany("INSERT OR IGNORE INTO subjects VALUES (?, ?)", batch)
+
+                if process.wait() != 0:
+                    stderr_file.seek(0)
+                    stderr_text = stderr_file.read()
+                    connection.close()
+                    os.remove(temp_path)
+                    raise RuntimeError(
+                        f"blastdbcmd failed for '{member}' with return code {process.returncode}.\n"
+                        f"STDERR:\n{stderr_text}"
+                    )
+
+        connection.commit()
+
+        if reusable:
+            connection.execute("DETACH DATABASE previous")
+
+        connection.close()
+        os.replace(temp_path, map_path)
+
+    def _build_alias_database(
+        self,
+        alias_prefix: str,
+        db_type_flag: str,
+        members: list[str],
+        fingerprints: dict[str, str],
+        record: str,
+    ) -> None:
         """
-        Check whether a remote URL exists.
+        Write the alias file, subject map, and member record of an alias database.
 
-        Uses curl if available, otherwise urllib.
+        The member record is written last, so an interrupted build is
+        simply repeated on next use.
 
         Args:
-            url (str): URL to test.
+            alias_prefix (str): Alias database prefix.
+            db_type_flag (str): Normalized database type, 'nucl' or 'prot'.
+            members (list[str]): Member database prefixes.
+            fingerprints (dict[str, str]): Current fingerprint of every member.
+            record (str): Member record to store once the build succeeded.
+        """
+        self._check_blastdbcmd_installed()
+        os.makedirs(os.path.dirname(alias_prefix), exist_ok=True)
 
-        Returns:
-            bool: True if the URL exists, False otherwise.
+        sys.stdout.write(
+            f"Building alias database over {len(members)} {db_type_flag} databases...\n"
+        )
+
+        self._build_subject_map(alias_prefix, members, fingerprints)
+
+        alias_file = alias_prefix + ALIAS_EXTENSIONS[db_type_flag]
+        dblist = " ".join(f'"{os.path.abspath(member)}"' for member in members)
+
+        with open(alias_file + ".tmp", "w", encoding="utf-8") as alias:
+            alias.write("#\n# Alias file spanning every local database of one type\n#\n")
+            alias.write(f"TITLE All local {db_type_flag} databases\n")
+            alias.write(f"DBLIST {dblist}\n")
+
+        os.replace(alias_file + ".tmp", alias_file)
+        self._write_build_stamp(alias_prefix)
+
+        with open(alias_prefix + ALIAS_MEMBERS_EXTENSION, "w", encoding="utf-8") as members_file:
+            members_file.write(record)
+
+    def _refresh_alias_database(self, db_type_flag: str) -> None:
         """
-        try:
-            if shutil.which("curl"):
-                cmd = ["curl", "-I", "-L", "-s", url]
-                result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-                return "200 OK" in result.stdout
-            else:
-                request = urllib.request.Request(url, method="HEAD")
-                with urllib.request.urlopen(request):
-                    return True
-        except Exception:
-            return False
+        Rebuild the alias database of a type after its catalog changed,
+        if that alias database is in use.
+
+        Args:
+            db_type_flag (str): Normalized database type, 'nucl' or 'prot'.
+        """
+        alias_prefix = self._alias_prefix(db_type_flag)
+
+        if os.path.exists(alias_prefix + ALIAS_EXTENSIONS[db_type_flag]):
+            self.get_alias_database(db_type_flag)
+
+    def _refresh_sketch(self, db_prefix: str, db_type_flag: str, fasta_path: str | None = None) -> None:
+        """
+        Rebuild the prefilter sketch of a database that was just built or
+        downloaded, or remove its old sketch if sketches are not built.
+
+        Args:
+            db_prefix (str):    Full path prefix of the database.
+            db_type_flag (str): Normalized database type, 'nucl' or 'prot'.
+            fasta_path (str | None): FASTA file the database was built from.
+        """
+        if self.build_sketches:
+            self._build_sketch(db_prefix, db_type_flag, fasta_path)
+        elif os.path.isfile(sketch_path(db_prefix)):
+            os.remove(sketch_path(db_prefix))
+
+    def _build_sketch(self, db_prefix: str, db_type_flag: str, fasta_path: str | None = None) -> None:
+        """
+        Build the prefilter sketch of a database.
+
+        Sequences are read from the source FASTA file when there is one,
+        otherwise they are dumped with blastdbcmd. A failed sketch build
+        only disables the prefilter for this database, so it is reported
+        as a warning.
+
+        Args:
+            db_prefix (str):    Full path prefix of the database.
+            db_type_flag (str): Normalized database type, 'nucl' or 'prot'.
+            fasta_path (str | None): FASTA file the database was built from.
+        """
+        db_name = os.path.basename(db_prefix)
+        sys.stdout.write(f"Building prefilter sketch of '{db_name}'...\n")
+
+        if fasta_path is not None:
+            build_sketch(
+                (sequence for _, sequence in iter_fasta(fasta_path)),
+                db_type_flag,
+                sketch_path(db_prefix),
+            )
+            return
+
+        if not shutil.which("blastdbcmd"):
+            sys.stdout.write(
+                f"Warning: blastdbcmd not found; no prefilter sketch for '{db_name}'.\n"
+            )
+            return
+
+        temp_path = sketch_path(db_prefix) + ".building.npz"
 
-    def _download_archive(self, url: str, archive_path: str) -> None:
+        # stderr goes to a temporary file: a full, unread stderr pipe
+        # would block blastdbcmd while stdout is being read
+        with tempfile.TemporaryFile(mode="w+", encoding="utf-8") as stderr_file:
+            process = subprocess.Popen(
+                ["blastdbcmd", "-db", db_prefix, "-entry", "all", "-outfmt", "%s"],
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=True,
+            )
+
+            build_sketch((line.strip() for line in process.stdout), db_type_flag, temp_path)
+
+            if process.wait() != 0:
+                stderr_file.seek(0)
+                stderr_text = stderr_file.read()
+                os.remove(temp_path)
+                sys.stdout.write(
+                    f"Warning: blastdbcmd failed for '{db_name}'; no prefilter sketch.\n"
+                    f"STDERR:\n{stderr_text}"
+                )
+                return
+
+        os.replace(temp_path, sketch_path(db_prefix))
+
+    def _volume_prefixes(self, db_prefix: str, num_shards: int) -> list[str]:
         """
-        Download one archive file using curl if available, otherwise urllib.
+        Return the volume prefixes of a database built in num_shards volumes.
+
+        A single-volume database is its own volume.
+        """
+        if num_shards <= 1:
+            return [db_prefix]
+
+        width = max(2, len(str(num_shards - 1)))
+        return [f"{db_prefix}.{number:0{width}d}" for number in range(num_shards)]
+
+    def _scan_records(self, fasta_path: str, num_shards: int) -> tuple[FastaIndex, dict[tuple[str, int], tuple[str, int]]] | None:
+        """
+        Index a FASTA file and hash the content of every record.
+
+        Records are assigned to volumes by ID, so a file whose IDs are not
+        unique cannot be split into volumes: records sharing an ID would
+        collapse into one entry and be left out of every volume.
 
         Args:
-            url (str): Remote file URL.
-            archive_path (str): Local output path.
+            fasta_path (str): FASTA file inside the database directory.
+            num_shards (int): Number of volumes the records are spread over.
+
+        Returns:
+            tuple[FastaIndex, dict[tuple[str, int], tuple[str, int]]] | None: The index
+            and {(sequence_id, occurrence): (content digest, volume number)},
+            or None if the file is gzip-compressed and cannot be indexed.
+            occurrence numbers the records sharing an ID in file order
+            (0 for the first), so every record has its own key.
 
         Raises:
-            RuntimeError: If the download fails.
+            ValueError: If num_shards > 1 and a sequence ID occurs in more
+                        than one record.
+        """
+        try:
+            index = FastaIndex.open(fasta_path)
+        except ValueError:
+            return None
+
+        duplicates = index.duplicate_ids()
+
+        if duplicates and num_shards > 1:
+            index.close()
+            raise ValueError(
+                f"{len(duplicates)} sequence IDs occur in more than one record of "
+                f"'{os.path.basename(fasta_path)}' (e.g. '{duplicates[0]}'); "
+                "records are assigned to volumes by ID, so this file can only be "
+                "built as a single volume."
+            )
+
+        records: dict[tuple[str, int], tuple[str, int]] = {}
+        occurrences: dict[str, int] = {}
+
+        for sequence_id in index.ids():
+            occurrence = occurrences.get(sequence_id, 0)
+            occurrences[sequence_id] = occurrence + 1
+
+            content = index.fetch(sequence_id, occurrence).upper().encode("utf-8")
+            records[(sequence_id, occurrence)] = (
+                hashlib.blake2b(content, digest_size=16).hexdigest(),
+                shard_of(sequence_id, num_shards),
+            )
+
+        return index, records
+
+    def _read_record_manifest(self, db_prefix: str) -> tuple[str, dict[tuple[str, int], tuple[str, int]]] | None:
+        """
+        Read the per-record content manifest of a database built from FASTA.
+
+        Returns:
+            tuple[str, dict[tuple[str, int], tuple[str, int]]] | None: (FASTA
+            file name, {(sequence_id, occurrence): (content digest, volume
+            number)}), or None if the database has no manifest. Manifests
+            written before occurrences were recorded list occurrence 0 only.
         """
-        sys.stdout.write(f"Fetching: {url}\n")
+        manifest_path = db_prefix + RECORD_MANIFEST_EXTENSION
+
+        if not os.path.isfile(manifest_path):
+            return None
+
+        connection = sqlite3.connect(f"file:{os.path.abspath(manifest_path)}?mode=ro", uri=True)
 
         try:
-            if shutil.which("curl"):
-                sys.stdout.write("Using curl for download.\n")
-                cmd = ["curl", "-L", url, "-o", archive_path]
-                result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+            fasta_name = connection.execute("SELECT value FROM info WHERE key = 'fasta'").fetchone()[0]
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(records)")}
+            occurrence_column = "occurrence" if "occurrence" in columns else "0"
+            records = {
+                (sequence_id, occurrence): (digest, shard)
+                for sequence_id, occurrence, digest, shard in connection.execute(
+                    f"SELECT sequence_id, {occurrence_column}, digest, shard FROM records"
+                )
+            }
+        finally:
+            connection.close()
 
-                if result.returncode != 0:
-                    raise RuntimeError(
-                        f"curl download failed with return code {result.returncode}.\n"
-                        f"STDOUT:\n{result.stdout}\n"
-                        f"STDERR:\n{result.stderr}"
-                    )
+        return fasta_name, records
+
+    def _write_content_manifests(
+        self,
+        db_prefix: str,
+        db_type_flag: str,
+        fasta_path: str,
+        index: FastaIndex,
+        records: dict[tuple[str, int], tuple[str, int]],
+        volumes: list[str],
+    ) -> None:
+        """
+        Save the per-record manifest and, for sharded databases, the
+        per-volume manifest (content digest, sequence and letter counts).
+
+        Both are written to temporary files and moved into place, after
+        the volumes they describe have been built.
+        """
+        manifest_path = db_prefix + RECORD_MANIFEST_EXTENSION
+        temp_path = manifest_path + ".tmp"
+
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        connection = sqlite3.connect(temp_path)
+        connection.execute("CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        connection.execute(
+            "CREATE TABLE records ("
+            "sequence_id TEXT NOT NULL, occurrence INTEGER NOT NULL, digest TEXT NOT NULL, "
+            "shard INTEGER NOT NULL, length INTEGER NOT NULL, PRIMARY KEY (sequence_id, occurrence)"
+            ") WITHOUT ROWID"
+        )
+        connection.execute("INSERT INTO info VALUES ('fasta', ?)", (os.path.basename(fasta_path),))
+        connection.executemany(
+            "INSERT INTO records VALUES (?, ?, ?, ?, ?)",
+            (
+                (sequence_id, occurrence, digest, shard, index.entry(sequence_id, occurrence)[0])
+                for (sequence_id, occurrence), (digest, shard) in records.items()
+            ),
+        )
+        connection.commit()
+        connection.close()
+        os.replace(temp_path, manifest_path)
+
+        if len(volumes) == 1:
+            return
+
+        shard_digests = [hashlib.sha256() for _ in volumes]
+        shard_sequences = [0] * len(volumes)
+        shard_letters = [0] * len(volumes)
+
+        # Sharded databases have unique IDs (see _scan_records), so every
+        # occurrence is 0
+        for sequence_id, occurrence in sorted(records):
+            digest, shard = records[(sequence_id, occurrence)]
+            shard_digests[shard].update(f"{sequence_id}\t{digest}\n".encode("utf-8"))
+            shard_sequences[shard] += 1
+            shard_letters[shard] += index.entry(sequence_id, occurrence)[0]
+
+        manifest = {
+            "db_type": db_type_flag,
+            "volumes": [os.path.basename(volume) for volume in volumes],
+            "num_sequences": sum(shard_sequences),
+            "total_letters": sum(shard_letters),
+            "shards": [
+                {
+                    "volume": os.path.basename(volume),
+                    "digest": shard_digests[shard].hexdigest(),
+                    "num_sequences": shard_sequences[shard],
+                    "letters": shard_letters[shard],
+                }
+                for shard, volume in enumerate(volumes)
+            ],
+        }
+
+        with open(db_prefix + SHARD_MANIFEST_EXTENSION + ".tmp", "w", encoding="utf-8") as manifest_file:
+            json.dump(manifest, manifest_file, indent=1)
+
+        os.replace(db_prefix + SHARD_MANIFEST_EXTENSION + ".tmp", db_prefix + SHARD_MANIFEST_EXTENSION)
+
+    def _build_volumes(
+        self,
+        fasta_path: str,
+        db_name: str,
+        db_prefix: str,
+        db_type_flag: str,
+        volumes: list[str],
+        index: FastaIndex | None,
+        records: dict[tuple[str, int], tuple[str, int]] | None,
+        shards: set[int],
+    ) -> None:
+        """
+        Build the given volumes of a database and refresh its sketch.
+
+        A single-volume database is built by one makeblastdb call over the
+        whole file. Otherwise each volume listed in shards is built from
+        its records by its own makeblastdb process, in parallel, along with
+        the volume's sketch; an alias file (<db_name>.nal/.pal) joins the
+        volumes like a multi-volume NCBI database, and the database sketch
+        is the union of the volume sketches. Sketches are only built with
+        build_sketches set; otherwise outdated ones are removed.
+
+        Raises:
+            RuntimeError: If makeblastdb fails.
+        """
+        if len(volumes) == 1:
+            cmd: list[str] = [
+                "makeblastdb",
+                "-in", fasta_path,
+                "-dbtype", db_type_flag,
+                "-out", db_prefix,
+            ]
+
+            sys.stdout.write(f"Creating BLAST database '{db_name}' from '{fasta_path}'...\n")
+            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+
+            if result.returncode != 0:
+                raise RuntimeError(
+                    f"makeblastdb failed with return code {result.returncode}.\n"
+                    f"STDOUT:\n{result.stdout}\n"
+                    f"STDERR:\n{result.stderr}"
+                )
+
+            self._refresh_sketch(db_prefix, db_type_flag, fasta_path)
+            return
+
+        # Byte ranges of every volume's records in file order, with
+        # neighbouring records merged into one range
+        byte_ranges: list[list[tuple[int, int]]] = [[] for _ in volumes]
+
+        for (sequence_id, occurrence), (_, shard) in records.items():
+            _, header_offset, _, sequence_end, _, _ = index.entry(sequence_id, occurrence)
+            ranges = byte_ranges[shard]
+
+            if ranges and ranges[-1][1] == header_offset:
+                ranges[-1] = (ranges[-1][0], sequence_end)
             else:
-                sys.stdout.write("Using urllib for download.\n")
-                urllib.request.urlretrieve(
-                    url,
-                    archive_path,
-                    reporthook=self._download_progress
+                ranges.append((header_offset, sequence_end))
+
+        workers = max(1, min(len(shards), os.cpu_count() or 1))
+
+        sys.stdout.write(
+            f"Building {len(shards)} of {len(volumes)} volumes of '{db_name}' "
+            f"with {workers} parallel makeblastdb processes...\n"
+        )
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _build_volume,
+                    fasta_path,
+                    byte_ranges[shard],
+                    volumes[shard],
+                    db_type_flag,
+                    os.path.basename(volumes[shard]),
+                    self.build_sketches,
                 )
-                sys.stdout.write("\n")
+                for shard in sorted(shards)
+            ]
 
-        except Exception as e:
-            raise RuntimeError(
-                "Download failed. Python SSL may not trust the certificate chain in this environment.\n"
-                "A curl-based download is recommended on this system.\n"
-                f"Original error: {e}"
-            )
+            for future in futures:
+                future.result()
+
+        alias_file = db_prefix + ALIAS_EXTENSIONS[db_type_flag]
+        dblist = " ".join(os.path.basename(volume) for volume in volumes)
+
+        with open(alias_file + ".tmp", "w", encoding="utf-8") as alias:
+            alias.write(f"#\n# Alias file joining the volumes of '{db_name}'\n#\n")
+            alias.write(f"TITLE {db_name}\n")
+            alias.write(f"DBLIST {dblist}\n")
+
+        os.replace(alias_file + ".tmp", alias_file)
 
-    def _extract_archive(self, archive_path: str, db_dir: str) -> None:
+        merge_sketches([sketch_path(volume) for volume in volumes], sketch_path(db_prefix))
+
+    def _update_from_fasta(
+        self,
+        fasta_path: str,
+        db_name: str,
+        db_dir: str,
+        db_prefix: str,
+        db_type_flag: str,
+    ) -> str:
         """
-        Extract one .tar.gz archive into the database directory.
+        Bring an existing database up to date with a new version of its FASTA file.
+
+        Record contents are compared with the manifest saved at the last
+        build: only the volumes holding added, removed, or changed records
+        are rebuilt, keeping the database's volume layout. Without a
+        manifest (databases built before manifests existed) or for a
+        single-volume database, any change rebuilds the whole database.
 
         Args:
-            archive_path (str): Path to archive file.
-            db_dir (str): Target extraction directory.
+            fasta_path (str): Path to the new FASTA file.
+            db_name (str): Name of the database.
+            db_dir (str): Database directory.
+            db_prefix (str): Full path prefix of the database.
+            db_type_flag (str): Normalized database type, 'nucl' or 'prot'.
+
+        Returns:
+            str: Path prefix of the database.
 
         Raises:
-            RuntimeError: If extraction fails.
+            ValueError: If a sharded database is updated from a compressed
+                        file, or from one with duplicate sequence IDs.
         """
+        layout = shard_volumes(db_prefix)
+        num_shards = len(layout[0]) if layout is not None else 1
+        volumes = self._volume_prefixes(db_prefix, num_shards)
+        saved = self._read_record_manifest(db_prefix)
+
+        new_fasta_path = self._move_fasta(fasta_path, db_dir)
+
+        if saved is not None and saved[0] != os.path.basename(new_fasta_path):
+            old_fasta_path = os.path.join(db_dir, saved[0])
+            for stale in (old_fasta_path, old_fasta_path + ".fxi"):
+                if os.path.isfile(stale):
+                    os.remove(stale)
+
+        scanned = self._scan_records(new_fasta_path, num_shards)
+
+        if scanned is None:
+            if num_shards > 1:
+                raise ValueError(
+                    f"Database '{db_name}' is built in {num_shards} volumes; "
+                    "decompress the FASTA file to update it."
+                )
+
+            if os.path.exists(db_prefix + RECORD_MANIFEST_EXTENSION):
+                os.remove(db_prefix + RECORD_MANIFEST_EXTENSION)
+
+            sys.stdout.write(f"Rebuilding '{db_name}' from compressed FASTA...\n")
+            self._build_volumes(new_fasta_path, db_name, db_prefix, db_type_flag, volumes, None, None, {0})
+            self._write_build_stamp(db_prefix)
+            self._update_catalog(db_name)
+            self._refresh_alias_database(db_type_flag)
+            return db_prefix
+
+        index, records = scanned
+
         try:
-            with tarfile.open(archive_path, "r:gz") as tar:
-                tar.extractall(path=db_dir)
-        except Exception as e:
-            raise RuntimeError(f"Extraction failed for '{archive_path}': {e}")
+            if saved is None:
+                sys.stdout.write(f"No content manifest for '{db_name}'; rebuilding every volume.\n")
+                shards = set(range(num_shards))
+            else:
+                old_records = saved[1]
+                added = [key for key in records if key not in old_records]
+                removed = [key for key in old_records if key not in records]
+                changed = [
+                    key for key in records
+                    if key in old_records and old_records[key][0] != records[key][0]
+                ]
+
+                shards = {records[key][1] for key in added + changed}
+                shards.update(old_records[key][1] for key in removed)
+
+                sys.stdout.write(
+                    f"'{db_name}': {len(added)} added, {len(removed)} removed, "
+                    f"{len(changed)} changed sequences.\n"
+                )
+
+            if not shards:
+                # Rewriting unchanged manifests would change the database
+                # fingerprint, so they are only renewed for a renamed file
+                if saved[0] != os.path.basename(new_fasta_path):
+                    self._write_content_manifests(db_prefix, db_type_flag, new_fasta_path, index, records, volumes)
+                sys.stdout.write(f"BLAST database '{db_name}' is up to date.\n")
+                return db_prefix
+
+            self._build_volumes(new_fasta_path, db_name, db_prefix, db_type_flag, volumes, index, records, shards)
+            self._write_content_manifests(db_prefix, db_type_flag, new_fasta_path, index, records, volumes)
+        finally:
+            index.close()
+
+        self._write_build_stamp(db_prefix)
+        self._update_catalog(db_name)
+        self._refresh_alias_database(db_type_flag)
+
+        sys.stdout.write(f"BLAST database '{db_name}' updated ({len(shards)} of {num_shards} volumes rebuilt).\n")
+        return db_prefix
+
+    def _built_from_fasta(self, db_name: str, db_prefix: str) -> bool:
+        """
+        Check whether an existing database was built from a FASTA file
+        (and can be updated from one) rather than downloaded from NCBI.
+        """
+        return os.path.isfile(db_prefix + RECORD_MANIFEST_EXTENSION) or db_name not in NCBI_DATABASES
 
-    def _download_singlepart_database(self, db_name: str, db_dir: str) -> None:
+    def _move_fasta(self, fasta_path: str, db_dir: str) -> str:
         """
-        Download and extract a single-part NCBI BLAST database archive.
+        Move a FASTA file into the database directory, replacing an older
+        file of the same name.
 
-        Args:
-            db_name (str): Database name.
-            db_dir (str): Local database directory.
+        Returns:
+            str: New path of the FASTA file.
         """
-        filename = f"{db_name}.tar.gz"
-        url = f"{NCBI_FTP_BASE_URL}/{filename}"
-        archive_path = os.path.join(db_dir, filename)
+        new_fasta_path = os.path.join(db_dir, os.path.basename(fasta_path))
+
+        if os.path.abspath(fasta_path) != os.path.abspath(new_fasta_path):
+            shutil.move(fasta_path, new_fasta_path)
+            sys.stdout.write(
+                f"Moved FASTA file from '{fasta_path}' to '{new_fasta_path}'.\n"
+            )
+        else:
+            sys.stdout.write("FASTA file is already in the database directory.\n")
 
-        self._download_archive(url, archive_path)
-        sys.stdout.write(f"Extracting '{filename}' into '{db_dir}'...\n")
-        self._extract_archive(archive_path, db_dir)
-        os.remove(archive_path)
-        sys.stdout.write(f"Cleaned up '{filename}'.\n")
+        return new_fasta_path
 
-    def _download_multipart_database(self, db_name: str, db_dir: str) -> None:
+    def _downloaded_db_exists(self, db_name: str, db_type_flag: str, db_dir: str) -> bool:
         """
-        Download and extract a multi-part NCBI BLAST database.
+        Check whether a downloaded NCBI BLAST database exists.
 
-        Example:
-            refseq_rna.00.tar.gz
-            refseq_rna.01.tar.gz
-            ...
+        Supports:
+        - alias files (.nal/.pal)
+        - single-volume BLAST files (e.g. swissprot.phr)
+        - multi-volume BLAST files (e.g. nt.000.nhr)
 
         Args:
             db_name (str): Database name.
-            db_dir (str): Local database directory.
+            db_type_flag (str): Normalized database type, 'nucl' or 'prot'.
+            db_dir (str): Directory where the downloaded database is stored.
 
-        Raises:
-            RuntimeError: If no parts are found.
+        Returns:
+            bool: True if downloaded BLAST files are detected, False otherwise.
         """
-        part_index = 0
-        downloaded_any = False
-
-        while True:
-            part_name = f"{db_name}.{part_index:02d}.tar.gz"
-            url = f"{NCBI_FTP_BASE_URL}/{part_name}"
+        if not os.path.isdir(db_dir):
+            return False
 
-            if not self._url_exists(url):
-                if part_index == 0:
-                    raise RuntimeError(
-                        f"No single-part or multi-part archives were found for database '{db_name}'."
-                    )
-                break
+        files = os.listdir(db_dir)
 
-            archive_path = os.path.join(db_dir, part_name)
+        if db_type_flag == "nucl":
+            alias_ext = "nal"
+            extensions = [ext.lstrip(".") for ext in NUCL_EXTENSIONS]
+        else:
+            alias_ext = "pal"
+            extensions = [ext.lstrip(".") for ext in PROT_EXTENSIONS]
 
-            self._download_archive(url, archive_path)
-            sys.stdout.write(f"Extracting '{part_name}' into '{db_dir}'...\n")
-            self._extract_archive(archive_path, db_dir)
-            os.remove(archive_path)
-            sys.stdout.write(f"Cleaned up '{part_name}'.\n")
+        ext_pattern = "|".join(re.escape(ext) for ext in extensions)
 
-            downloaded_any = True
-            part_index += 1
+        pattern = rf"^{re.escape(db_name)}(\.{alias_ext}|\.(?:{ext_pattern})|\.\d+\.(?:{ext_pattern}))$"
+        regex = re.compile(pattern)
 
-        if not downloaded_any:
-            raise RuntimeError(f"No archive parts were downloaded for '{db_name}'.")
+        return any(regex.match(filename) for filename in files)
 
     # -----------------------------------------------------------------------
     # Public methods
@@ -384,19 +1084,29 @@ class DatabaseManager:
         fasta_path: str,
         db_name: str,
         db_type: str,
+        num_shards: int = 1,
     ) -> str:
         """
         Create a local BLAST database from a FASTA file using makeblastdb.
 
         The FASTA file is moved into the database directory before
         the database is built. If the database already exists, creation
-        is skipped.
+        is skipped, unless it was built from FASTA and a FASTA file is
+        supplied again: then only the volumes whose records changed are
+        rebuilt (see _update_from_fasta).
+
+        With num_shards > 1, the database is built as that many volumes
+        in parallel (see _build_volumes). Each record's volume follows
+        from a hash of its ID (see shard_of), and a content digest of
+        every record is saved in <db_prefix>.records.sqlite. A FASTA file
+        with duplicate sequence IDs is always built as a single volume.
 
         Args:
             fasta_path (str): Path to the input FASTA file.
             db_name (str):    Name to give the resulting database.
             db_type (str):    Type of sequences in the FASTA file.
                               Accepts 'nucl', 'nucleotide', 'prot', or 'protein'.
+            num_shards (int): Number of volumes to build in parallel.
 
         Returns:
             str: Path prefix of the created BLAST database.
@@ -411,7 +1121,11 @@ class DatabaseManager:
         db_type_flag = self._normalize_db_type(db_type)
         db_dir, db_prefix = self._db_prefix(db_name)
 
-        if self._db_exists(db_prefix, db_type_flag):
+        exists = self._db_exists(db_prefix, db_type_flag) or self._downloaded_db_exists(db_name, db_type_flag, db_dir)
+
+        # A database built from FASTA is brought up to date with a FASTA
+        # file supplied again; downloaded NCBI databases are left alone
+        if exists and not (os.path.isfile(fasta_path) and self._built_from_fasta(db_name, db_prefix)):
             sys.stdout.write(
                 f"BLAST database '{db_name}' already exists. Skipping creation.\n"
             )
@@ -420,38 +1134,41 @@ class DatabaseManager:
         if not os.path.isfile(fasta_path):
             raise FileNotFoundError(f"FASTA file not found: {fasta_path}")
 
+        if exists:
+            return self._update_from_fasta(fasta_path, db_name, db_dir, db_prefix, db_type_flag)
+
         os.makedirs(db_dir, exist_ok=True)
 
         # Move FASTA file into the database directory
-        fasta_filename = os.path.basename(fasta_path)
-        new_fasta_path = os.path.join(db_dir, fasta_filename)
+        new_fasta_path = self._move_fasta(fasta_path, db_dir)
 
-        if os.path.abspath(fasta_path) != os.path.abspath(new_fasta_path):
-            shutil.move(fasta_path, new_fasta_path)
-            sys.stdout.write(
-                f"Moved FASTA file from '{fasta_path}' to '{new_fasta_path}'.\n"
-            )
+        try:
+            scanned = self._scan_records(new_fasta_path, max(1, num_shards))
+        except ValueError as error:
+            sys.stdout.write(f"{error}\nBuilding '{db_name}' as a single volume.\n")
+            num_shards = 1
+            scanned = self._scan_records(new_fasta_path, num_shards)
+
+        if scanned is None:
+            if num_shards > 1:
+                sys.stdout.write("Compressed FASTA files cannot be sharded; building a single volume.\n")
+            self._build_volumes(new_fasta_path, db_name, db_prefix, db_type_flag, [db_prefix], None, None, {0})
         else:
-            sys.stdout.write("FASTA file is already in the database directory.\n")
+            index, records = scanned
+            volumes = self._volume_prefixes(db_prefix, num_shards)
 
-        cmd: list[str] = [
-            "makeblastdb",
-            "-in", new_fasta_path,
-            "-dbtype", db_type_flag,
-            "-out", db_prefix,
-        ]
+            try:
+                self._build_volumes(
+                    new_fasta_path, db_name, db_prefix, db_type_flag,
+                    volumes, index, records, set(range(len(volumes))),
+                )
+                self._write_content_manifests(db_prefix, db_type_flag, new_fasta_path, index, records, volumes)
+            finally:
+                index.close()
 
-        sys.stdout.write(
-            f"Creating BLAST database '{db_name}' from '{new_fasta_path}'...\n"
-        )
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-
-        if result.returncode != 0:
-            raise RuntimeError(
-                f"makeblastdb failed with return code {result.returncode}.\n"
-                f"STDOUT:\n{result.stdout}\n"
-                f"STDERR:\n{result.stderr}"
-            )
+        self._write_build_stamp(db_prefix)
+        self._update_catalog(db_name)
+        self._refresh_alias_database(db_type_flag)
 
         sys.stdout.write(f"BLAST database '{db_name}' created successfully.\n")
         return db_prefix
@@ -461,12 +1178,14 @@ class DatabaseManager:
         fasta_path: str,
         db_name: str,
         db_type: str,
+        num_shards: int = 1,
     ) -> str:
         """
         Return the path to a BLAST database, creating it first if needed.
 
-        If the database already exists on disk, returns its path immediately.
-        Otherwise, builds it from the provided FASTA file.
+        If the database already exists on disk, returns its path immediately,
+        after bringing it up to date if it was built from FASTA and the FASTA
+        file is supplied again. Otherwise, builds it from the provided FASTA file.
 
         Args:
             fasta_path (str): Path to the FASTA file used to create the
@@ -474,21 +1193,27 @@ class DatabaseManager:
             db_name (str):    Name of the database to use or create.
             db_type (str):    Type of sequences. Accepts 'nucl', 'nucleotide',
                               'prot', or 'protein'.
+            num_shards (int): Number of volumes to build in parallel if the
+                              database has to be created.
 
         Returns:
             str: Path prefix of the BLAST database.
         """
         db_type_flag = self._normalize_db_type(db_type)
-        _, db_prefix = self._db_prefix(db_name)
+        db_dir, db_prefix = self._db_prefix(db_name)
+
+        if self._db_exists(db_prefix, db_type_flag) or self._downloaded_db_exists(db_name, db_type_flag, db_dir):
+            if os.path.isfile(fasta_path) and self._built_from_fasta(db_name, db_prefix):
+                sys.stdout.write(f"Checking BLAST database '{db_name}' against '{fasta_path}'...\n")
+                return self.create_from_fasta(fasta_path, db_name, db_type, num_shards)
 
-        if self._db_exists(db_prefix, db_type_flag):
             sys.stdout.write(f"Using existing BLAST database '{db_name}'.\n")
             return db_prefix
 
         sys.stdout.write(f"BLAST database '{db_name}' not found. Creating now...\n")
-        return self.create_from_fasta(fasta_path, db_name, db_type)
+        return self.create_from_fasta(fasta_path, db_name, db_type, num_shards)
 
-    def download_ncbi(self, db_name: str) -> str:
+    def download_ncbi(self, db_name: str, connections: int = DEFAULT_CONNECTIONS, mode: str = DEFAULT_MODE) -> str:
         """
         Download a prebuilt NCBI BLAST database from the NCBI FTP server.
 
@@ -499,8 +1224,16 @@ class DatabaseManager:
         - single-part archives: db_name.tar.gz
         - multi-part archives: db_name.00.tar.gz, db_name.01.tar.gz, ...
 
+        The archives are fetched concurrently, verified against their
+        published MD5 digests, and extracted while the remaining ones
+        download; an interrupted download resumes where it stopped (see
+        ncbi_download.NcbiDownloader). In 'stream' mode archives are
+        extracted while they download instead of being saved first.
+
         Args:
             db_name (str): Name of the NCBI database to download.
+            connections (int): Maximum number of simultaneous downloads.
+            mode (str): 'stream' or 'staged'.
 
         Returns:
             str: Path prefix of the downloaded BLAST database.
@@ -524,7 +1257,7 @@ class DatabaseManager:
 
         os.makedirs(db_dir, exist_ok=True)
 
-        if self._downloaded_db_exists(db_name, db_type_flag, db_dir):
+        if self._downloaded_db_exists(db_name, db_type_flag, db_dir) and not install_pending(db_name, db_dir):
             sys.stdout.write(
                 f"Database '{db_name}' already exists in '{db_dir}'. Skipping download.\n"
             )
@@ -539,12 +1272,7 @@ class DatabaseManager:
                 "Note: this database may be very large and may require multiple downloads.\n"
             )
 
-        single_url = f"{NCBI_FTP_BASE_URL}/{db_name}.tar.gz"
-
-        if self._url_exists(single_url):
-            self._download_singlepart_database(db_name, db_dir)
-        else:
-            self._download_multipart_database(db_name, db_dir)
+        NcbiDownloader(NCBI_FTP_BASE_URL, connections, mode).install(db_name, db_type_flag, db_dir)
 
         if not self._downloaded_db_exists(db_name, db_type_flag, db_dir):
             extracted = os.listdir(db_dir)
@@ -553,35 +1281,280 @@ class DatabaseManager:
                 f"Files in '{db_dir}': {extracted}"
             )
 
+        self._refresh_sketch(db_prefix, db_type_flag)
+        self._write_build_stamp(db_prefix)
+        self._update_catalog(db_name)
+        self._refresh_alias_database(db_type_flag)
+
         sys.stdout.write(f"Database '{db_name}' ready at '{db_prefix}'.\n")
         return db_prefix
 
-    def get_all_database_names(self) -> list[str]:
+    # -----------------------------------------------------------------------
+    # Database catalog
+    # -----------------------------------------------------------------------
+
+    def _catalog_path(self) -> str:
         """
-        Return a list of all available BLAST database names in self.download_dir.
+        Return the path of the catalog file.
         """
-        if not os.path.isdir(self.download_dir):
-            return []
+        return os.path.join(self.download_dir, CATALOG_DIR_NAME, CATALOG_FILE_NAME)
 
-        found_databases: list[str] = []
+    def _describe_database(self, db_name: str) -> dict:
+        """
+        Scan one entry of download_dir and describe the database in it.
 
-        for entry in sorted(os.listdir(self.download_dir)):
-            entry_path = os.path.join(self.download_dir, entry)
+        Sequence and letter counts come from the shard or record manifest
+        if there is one, else from 'blastdbcmd -info' when BLAST+ is
+        installed; they are None if neither is available.
 
-            if not os.path.isdir(entry_path):
-                continue
+        Args:
+            db_name (str): Name of the entry (directory) in download_dir.
+
+        Returns:
+            dict: Catalog entry. 'db_type' is None if the directory holds
+            no BLAST database.
+        """
+        db_dir, db_prefix = self._db_prefix(db_name)
+        entry: dict = {
+            "dir_mtime_ns": os.stat(db_dir).st_mtime_ns,
+            "db_type": None,
+        }
+
+        for db_type_flag in ("nucl", "prot"):
+            if self._db_exists(db_prefix, db_type_flag) or self._downloaded_db_exists(db_name, db_type_flag, db_dir):
+                entry["db_type"] = db_type_flag
+                break
 
-            nucl_exists = self._db_exists(os.path.join(entry_path, entry), "nucl")
-            prot_exists = self._db_exists(os.path.join(entry_path, entry), "prot")
+        if entry["db_type"] is None:
+            return entry
+
+        volumes = [db_name]
+        num_sequences: int | None = None
+        total_letters: int | None = None
+        alias_file = db_prefix + ALIAS_EXTENSIONS[entry["db_type"]]
+
+        if os.path.isfile(db_prefix + SHARD_MANIFEST_EXTENSION):
+            with open(db_prefix + SHARD_MANIFEST_EXTENSION, "r", encoding="utf-8") as manifest_file:
+                manifest = json.load(manifest_file)
+            volumes = manifest["volumes"]
+            num_sequences = int(manifest["num_sequences"])
+            total_letters = int(manifest["total_letters"])
+        elif os.path.isfile(db_prefix + RECORD_MANIFEST_EXTENSION):
+            connection = sqlite3.connect(f"file:{os.path.abspath(db_prefix + RECORD_MANIFEST_EXTENSION)}?mode=ro", uri=True)
+            try:
+                num_sequences, total_letters = connection.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM records"
+                ).fetchone()
+            except sqlite3.OperationalError:
+                pass
+            finally:
+                connection.close()
+        elif os.path.isfile(alias_file):
+            with open(alias_file, "r", encoding="utf-8") as alias:
+                for line in alias:
+                    if line.startswith("DBLIST"):
+                        volumes = [volume.strip('"') for volume in line.split()[1:]]
+
+        if num_sequences is None and shutil.which("blastdbcmd"):
+            result = subprocess.run(
+                ["blastdbcmd", "-db", db_prefix, "-info"],
+                capture_output=True, text=True, check=False,
+            )
+            match = re.search(r"([\d,]+) sequences; ([\d,]+) total (?:bases|residues|letters)", result.stdout)
+
+            if result.returncode == 0 and match:
+                num_sequences = int(match.group(1).replace(",", ""))
+                total_letters = int(match.group(2).replace(",", ""))
+
+        size_bytes = 0
+        built = 0.0
+
+        for filename in os.listdir(db_dir):
+            file_stat = os.stat(os.path.join(db_dir, filename))
+            size_bytes += file_stat.st_size
+            built = max(built, file_stat.st_mtime)
+
+        if os.path.isfile(db_prefix + BUILD_STAMP_EXTENSION):
+            with open(db_prefix + BUILD_STAMP_EXTENSION, "r", encoding="utf-8") as stamp:
+                fields = stamp.read().split()
+            if len(fields) == 2:
+                built = float(fields[1])
+
+        entry.update({
+            "volumes": volumes,
+            "num_sequences": num_sequences,
+            "total_letters": total_letters,
+            "size_bytes": size_bytes,
+            "built": built,
+            "fingerprint": database_fingerprint(db_prefix),
+        })
+        return entry
+
+    @contextmanager
+    def _catalog_lock(self):
+        """
+        Hold an exclusive lock on the catalog while it is read, rescanned,
+        and saved, so that processes building different databases at the
+        same time do not overwrite each other's entries.
+
+        Without fcntl (Windows), or if the lock file cannot be created
+        (read-only tree), the catalog is used unlocked.
+        """
+        lock_file = None
+
+        if fcntl is not None:
+            lock_path = os.path.join(self.download_dir, CATALOG_DIR_NAME, CATALOG_LOCK_NAME)
+            try:
+                os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+                lock_file = open(lock_path, "a", encoding="utf-8")
+            except OSError:
+                lock_file = None
+
+        try:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+    def _save_catalog(self, catalog: dict) -> None:
+        """
+        Write the catalog atomically: a reader sees the old or the new
+        version, never a partial file.
 
-            if nucl_exists or prot_exists:
-                found_databases.append(entry)
+        The catalog is only a cache, so a tree that cannot be written
+        (e.g. a read-only shared database directory) is used without
+        saving it.
+        """
+        catalog_path = self._catalog_path()
+        temp_path = f"{catalog_path}.{os.getpid()}.tmp"
+
+        try:
+            os.makedirs(os.path.dirname(catalog_path), exist_ok=True)
+
+            with open(temp_path, "w", encoding="utf-8") as catalog_file:
+                json.dump(catalog, catalog_file, indent=1, sort_keys=True)
+
+            os.replace(temp_path, catalog_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def _refresh_catalog(self) -> tuple[dict, bool]:
+        """
+        Read the stored catalog and rescan the entries that are stale.
+
+        Returns:
+            tuple[dict, bool]: The catalog as it should be stored, and
+            whether it differs from the stored one.
+        """
+        stored: dict = {}
+
+        if os.path.isfile(self._catalog_path()):
+            try:
+                with open(self._catalog_path(), "r", encoding="utf-8") as catalog_file:
+                    stored = json.load(catalog_file)
+            except ValueError:
+                stored = {}
+
+        if stored.get("version") != CATALOG_VERSION:
+            stored = {}
+
+        entries: dict[str, dict] = stored.get("databases", {})
+        dir_mtime_ns = os.stat(self.download_dir).st_mtime_ns
+        changed = stored.get("dir_mtime_ns") != dir_mtime_ns
+
+        if changed:
+            names = [
+                entry for entry in os.listdir(self.download_dir)
+                if not entry.startswith(".") and os.path.isdir(os.path.join(self.download_dir, entry))
+            ]
+        else:
+            names = list(entries)
+
+        current: dict[str, dict] = {}
+
+        for db_name in sorted(names):
+            try:
+                entry_mtime_ns = os.stat(os.path.join(self.download_dir, db_name)).st_mtime_ns
+            except FileNotFoundError:
+                changed = True
                 continue
 
-            if self._downloaded_db_exists(entry, "nucl", entry_path) or self._downloaded_db_exists(entry, "prot", entry_path):
-                found_databases.append(entry)
+            entry = entries.get(db_name)
+
+            if entry is None or entry["dir_mtime_ns"] != entry_mtime_ns:
+                entry = self._describe_database(db_name)
+                changed = True
 
-        return found_databases
+            current[db_name] = entry
+
+        changed = changed or len(current) != len(entries)
+        return {"version": CATALOG_VERSION, "dir_mtime_ns": dir_mtime_ns, "databases": current}, changed
+
+    def catalog(self) -> dict[str, dict]:
+        """
+        Return the catalog of every database in download_dir.
+
+        The catalog is read from disk and checked for staleness with one
+        stat of download_dir and one per database directory: entries are
+        only rescanned if their directory changed (files added, removed,
+        or renamed), and download_dir is only listed again if databases
+        were added or removed. Databases built or downloaded by this
+        manager update their entry directly (see _update_catalog).
+
+        A stale catalog is refreshed again under the catalog lock before
+        it is saved, so a concurrent update is not overwritten.
+
+        Returns:
+            dict[str, dict]: {db_name: entry}, sorted by name. Each entry
+            holds db_type, volumes, num_sequences, total_letters,
+            size_bytes, built (Unix time), and fingerprint.
+        """
+        if not os.path.isdir(self.download_dir):
+            return {}
+
+        stored, changed = self._refresh_catalog()
+
+        if changed:
+            with self._catalog_lock():
+                stored, changed = self._refresh_catalog()
+
+                if changed:
+                    self._save_catalog(stored)
+
+        return {
+            db_name: entry for db_name, entry in stored["databases"].items() if entry["db_type"] is not None
+        }
+
+    def _update_catalog(self, db_name: str) -> None:
+        """
+        Refresh the catalog entry of a database after it was built,
+        updated, or downloaded.
+
+        A rebuild may rewrite files in place without changing the
+        directory's modification time, so the entry is replaced directly
+        rather than left to the staleness check. The read, rescan, and
+        save happen under the catalog lock.
+
+        Args:
+            db_name (str): Name of the database.
+        """
+        with self._catalog_lock():
+            stored, _ = self._refresh_catalog()
+            stored["databases"][db_name] = self._describe_database(db_name)
+            self._save_catalog(stored)
+
+    def get_all_database_names(self) -> list[str]:
+        """
+        Return a list of all available BLAST database names in self.download_dir.
+        """
+        return list(self.catalog())
 
     def get_all_database_paths(self) -> list[str]:
         """
@@ -603,27 +1576,86 @@ class DatabaseManager:
             list[str]: List of matching database prefix paths.
         """
         db_type_flag = self._normalize_db_type(db_type)
-        matching_paths: list[str] = []
 
-        if not os.path.isdir(self.download_dir):
-            return matching_paths
+        return [
+            os.path.join(self.download_dir, db_name, db_name)
+            for db_name, entry in self.catalog().items()
+            if entry["db_type"] == db_type_flag
+        ]
+
+    def get_alias_database(self, db_type: str) -> str:
+        """
+        Return the alias database spanning every database of one type,
+        building or rebuilding it if the catalog changed.
 
-        for entry in sorted(os.listdir(self.download_dir)):
-            entry_path = os.path.join(self.download_dir, entry)
+        The alias is rebuilt whenever a database of that type is added,
+        removed, rebuilt, or re-downloaded (compared via the database
+        fingerprints recorded at build time).
 
-            if not os.path.isdir(entry_path):
-                continue
+        Args:
+            db_type (str): 'nucl'/'nucleotide' or 'prot'/'protein'
 
-            db_prefix = os.path.join(entry_path, entry)
+        Returns:
+            str: Path prefix of the alias database.
 
-            if self._db_exists(db_prefix, db_type_flag):
-                matching_paths.append(db_prefix)
-                continue
+        Raises:
+            RuntimeError: If there are no databases of that type.
+            EnvironmentError: If blastdbcmd is needed and not installed.
+        """
+        db_type_flag = self._normalize_db_type(db_type)
+        members = self.get_all_database_paths_by_type(db_type_flag)
+
+        if not members:
+            raise RuntimeError(f"No {db_type_flag} databases to build an alias database from.")
 
-            if self._downloaded_db_exists(entry, db_type_flag, entry_path):
-                matching_paths.append(db_prefix)
+        alias_prefix = self._alias_prefix(db_type_flag)
+        fingerprints = {member: database_fingerprint(member) for member in members}
+        record = "".join(f"{member}\t{fingerprints[member]}\n" for member in members)
+        members_path = alias_prefix + ALIAS_MEMBERS_EXTENSION
 
-        return matching_paths
+        if os.path.isfile(members_path) and os.path.isfile(alias_prefix + ALIAS_EXTENSIONS[db_type_flag]):
+            with open(members_path, "r", encoding="utf-8") as members_file:
+                if members_file.read() == record:
+                    return alias_prefix
+
+        self._build_alias_database(alias_prefix, db_type_flag, members, fingerprints, record)
+        return alias_prefix
+
+    @staticmethod
+    def alias_members(alias_prefix: str) -> list[str]:
+        """
+        Return the member database prefixes of an alias database.
+
+        Args:
+            alias_prefix (str): Alias database prefix.
+
+        Returns:
+            list[str]: Member prefixes in catalog order.
+        """
+        with open(alias_prefix + ALIAS_MEMBERS_EXTENSION, "r", encoding="utf-8") as members_file:
+            return [line.split("\t", 1)[0] for line in members_file if line.strip()]
+
+    def build_missing_sketches(self) -> list[str]:
+        """
+        Build the prefilter sketch of every database that has none yet
+        (databases created before the prefilter existed).
+
+        Returns:
+            list[str]: Prefixes of the databases that were sketched.
+        """
+        built: list[str] = []
+
+        for db_type_flag in ("nucl", "prot"):
+            for db_prefix in self.get_all_database_paths_by_type(db_type_flag):
+                if os.path.isfile(sketch_path(db_prefix)):
+                    continue
+
+                self._build_sketch(db_prefix, db_type_flag)
+
+                if os.path.isfile(sketch_path(db_prefix)):
+                    built.append(db_prefix)
+
+        return built
 
     def list_databases(self) -> None:
         """
@@ -640,11 +1672,147 @@ class DatabaseManager:
             sys.stdout.write(f"{db_name}\n")
 
 
+# ---------------------------------------------------------------------------
+# Subject-ID -> database map of an alias database
+# ---------------------------------------------------------------------------
+
+class SubjectDatabaseMap:
+    """
+    Read-only lookup of the source database of subjects in an alias database.
+
+    Attributes:
+        alias_prefix (str): Alias database prefix.
+    """
+
+    def __init__(self, alias_prefix: str) -> None:
+        """
+        Open the subject map built with the alias database.
+
+        Args:
+            alias_prefix (str): Alias database prefix.
+
+        Raises:
+            FileNotFoundError: If the alias database has no subject map.
+        """
+        map_path = alias_prefix + SUBJECT_MAP_EXTENSION
+
+        if not os.path.isfile(map_path):
+            raise FileNotFoundError(f"Subject map not found: {map_path}")
+
+        self.alias_prefix = alias_prefix
+        self._connection = sqlite3.connect(f"file:{os.path.abspath(map_path)}?mode=ro", uri=True)
+
+    def _sources(self, subject_ids: list[str]) -> dict[str, list[str]]:
+        """
+        Return {subject_id: [database name, ...]} for the known subject IDs.
+        """
+        found: dict[str, list[str]] = {}
+        unique_ids = list(dict.fromkeys(subject_ids))
+
+        for start in range(0, len(unique_ids), 500):
+            batch = unique_ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+
+            for subject_id, database in self._connection.execute(
+                f"SELECT subject_id, database FROM subjects WHERE subject_id IN ({placeholders})",
+                batch,
+            ):
+                found.setdefault(subject_id, []).append(database)
+
+        return found
+
+    def lookup(self, subject_ids: list[str]) -> dict[str, str]:
+        """
+        Return {subject_id: database name} for the subject IDs that are known
+        and belong to exactly one member database.
+
+        Args:
+            subject_ids (list[str]): Subject IDs from BLAST hits.
+
+        Returns:
+            dict[str, str]: Source database name (basename of the member
+            prefix) per unambiguous subject ID.
+        """
+        return {
+            subject_id: databases[0]
+            for subject_id, databases in self._sources(subject_ids).items()
+            if len(databases) == 1
+        }
+
+    def ambiguous(self, subject_ids: list[str]) -> set[str]:
+        """
+        Return the subject IDs that occur in more than one member database.
+
+        Hits on these subjects cannot be attributed from the alias search.
+
+        Args:
+            subject_ids (list[str]): Subject IDs from BLAST hits.
+
+        Returns:
+            set[str]: Subject IDs shared by several member databases.
+        """
+        return {
+            subject_id
+            for subject_id, databases in self._sources(subject_ids).items()
+            if len(databases) > 1
+        }
+
+    def close(self) -> None:
+        """
+        Close the underlying SQLite connection.
+        """
+        self._connection.close()
+
+
 # ---------------------------------------------------------------------------
 # Module-level convenience functions (used by main.py imports)
 # ---------------------------------------------------------------------------
 
-def create_local_database(fasta_path: str, db_name: str, db_type: str) -> str:
+def database_fingerprint(db_prefix: str) -> str:
+    """
+    Return a fingerprint identifying the current version of a database.
+
+    The fingerprint hashes the name, size, and modification time of the
+    BLAST files of the database prefix (volumes, alias files, and the build
+    stamp; see FINGERPRINT_EXTENSIONS). Rebuilding or re-downloading the
+    database changes it; building its sketch or indexing its FASTA file
+    does not.
+
+    Args:
+        db_prefix (str): Full path prefix of the database
+                         (e.g. 'databases/my_db/my_db').
+
+    Returns:
+        str: Hex digest fingerprint. Missing databases hash to the digest
+             of an empty file list.
+    """
+    db_dir = os.path.dirname(db_prefix) or "."
+    db_base = os.path.basename(db_prefix)
+    digest = hashlib.sha256()
+
+    if os.path.isdir(db_dir):
+        for filename in sorted(os.listdir(db_dir)):
+            if not filename.startswith(db_base + "."):
+                continue
+
+            if os.path.splitext(filename)[1] not in FINGERPRINT_EXTENSIONS:
+                continue
+
+            file_stat = os.stat(os.path.join(db_dir, filename))
+            digest.update(
+                f"{filename}\t{file_stat.st_size}\t{file_stat.st_mtime_ns}\n".encode("utf-8")
+            )
+
+    return digest.hexdigest()
+
+
+def create_local_database(
+    fasta_path: str,
+    db_name: str,
+    db_type: str,
+    num_shards: int = 1,
+    build_sketches: bool = False,
+) -> str:
     """
     Module-level wrapper around DatabaseManager.create_from_fasta.
 
@@ -652,14 +1820,22 @@ def create_local_database(fasta_path: str, db_name: str, db_type: str) -> str:
         fasta_path (str): Path to the input FASTA file.
         db_name (str):    Name of the database to create.
         db_type (str):    Type of sequences ('nucl', 'nucleotide', 'prot', 'protein').
+        num_shards (int): Number of volumes to build in parallel.
+        build_sketches (bool): Also build the prefilter sketch.
 
     Returns:
         str: Path prefix of the created BLAST database.
     """
-    return DatabaseManager().create_from_fasta(fasta_path, db_name, db_type)
+    return DatabaseManager(build_sketches=build_sketches).create_from_fasta(fasta_path, db_name, db_type, num_shards)
 
 
-def get_database(fasta_path: str, db_name: str, db_type: str) -> str:
+def get_database(
+    fasta_path: str,
+    db_name: str,
+    db_type: str,
+    num_shards: int = 1,
+    build_sketches: bool = False,
+) -> str:
     """
     Module-level wrapper around DatabaseManager.get_database.
 
@@ -667,24 +1843,64 @@ def get_database(fasta_path: str, db_name: str, db_type: str) -> str:
         fasta_path (str): Path to the FASTA file (used only if DB does not exist).
         db_name (str):    Name of the database to use or create.
         db_type (str):    Type of sequences ('nucl', 'nucleotide', 'prot', 'protein').
+        num_shards (int): Number of volumes to build in parallel if created.
+        build_sketches (bool): Also build the prefilter sketch if (re)built.
 
     Returns:
         str: Path prefix of the BLAST database.
     """
-    return DatabaseManager().get_database(fasta_path, db_name, db_type)
+    return DatabaseManager(build_sketches=build_sketches).get_database(fasta_path, db_name, db_type, num_shards)
+
+
+def shard_volumes(db_prefix: str) -> tuple[list[str], int] | None:
+    """
+    Return the volumes of a database built in shards, with its total letters.
+
+    Args:
+        db_prefix (str): Full path prefix of the database.
+
+    Returns:
+        tuple[list[str], int] | None: (volume prefixes, total letters), or
+        None if the database was built as a single volume.
+    """
+    manifest_path = db_prefix + SHARD_MANIFEST_EXTENSION
+
+    if not os.path.isfile(manifest_path):
+        return None
+
+    with open(manifest_path, "r", encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file)
 
+    db_dir = os.path.dirname(db_prefix)
+    return [os.path.join(db_dir, volume) for volume in manifest["volumes"]], int(manifest["total_letters"])
 
-def download_ncbi_database(db_name: str) -> str:
+
+def download_ncbi_database(
+    db_name: str,
+    connections: int = DEFAULT_CONNECTIONS,
+    mode: str = DEFAULT_MODE,
+    build_sketches: bool = False,
+) -> str:
     """
     Module-level wrapper around DatabaseManager.download_ncbi.
 
     Args:
         db_name (str): Name of the NCBI database to download.
+        connections (int): Maximum number of simultaneous downloads.
+        mode (str): 'stream' or 'staged'.
+        build_sketches (bool): Also build the prefilter sketch.
 
     Returns:
         str: Path prefix of the downloaded BLAST database.
     """
-    return DatabaseManager().download_ncbi(db_name)
+    return DatabaseManager(build_sketches=build_sketches).download_ncbi(db_name, connections, mode)
+
+
+def database_catalog(download_dir: str = "databases") -> dict[str, dict]:
+    """
+    Module-level wrapper around DatabaseManager.catalog.
+    """
+    return DatabaseManager(download_dir=download_dir).catalog()
 
 
 def get_all_database_names(download_dir: str = "databases") -> list[str]:
@@ -715,3 +1931,24 @@ def list_databases(download_dir: str = "databases") -> None:
     Module-level wrapper around DatabaseManager.list_databases.
     """
     DatabaseManager(download_dir=download_dir).list_databases()
+
+
+def get_alias_database(db_type: str, download_dir: str = "databases") -> str:
+    """
+    Module-level wrapper around DatabaseManager.get_alias_database.
+    """
+    return DatabaseManager(download_dir=download_dir).get_alias_database(db_type)
+
+
+def alias_members(alias_prefix: str) -> list[str]:
+    """
+    Module-level wrapper around DatabaseManager.alias_members.
+    """
+    return DatabaseManager.alias_members(alias_prefix)
+
+
+def build_missing_sketches(download_dir: str = "databases") -> list[str]:
+    """
+    Module-level wrapper around DatabaseManager.build_missing_sketches.
+    """
+    return DatabaseManager(download_dir=download_dir).build_missing_sketches()
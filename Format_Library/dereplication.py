@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# By Isabella Zuluaga
+
+"""
+dereplication.py
+
+Collapses exact-duplicate query sequences before searching.
+
+Currently supports:
+- grouping queries that carry an identical sequence
+- fanning BLAST results for each unique sequence back out to every
+  original query ID
+- counting how many copies of each sequence were present
+
+Amplicon runs contain many identical reads. Searching each unique sequence
+once and copying its hits to the duplicates gives the same results while
+cutting search time roughly in proportion to the duplication rate.
+
+Functions:
+    sequence_digest: Hash used to compare sequences for exact identity.
+    dereplicate_sequences: Collapse identical sequences to one representative.
+    expand_results: Copy representative hits back to every original query.
+    expand_table: Same as expand_results for a columnar HitTable.
+    iter_expanded_tables: Fan out representative tables as they arrive,
+                          in the original query order.
+    duplicate_counts: Number of copies of each query's sequence.
+
+Typical usage:
+    unique, representatives = dereplicate_sequences(queries)
+    rep_results = runner.run_blast_across_databases(unique, databases)
+    blast_results = expand_results(rep_results, representatives)
+"""
+
+import hashlib
+from typing import Any, Iterable, Iterator
+
+
+# ---------------------------------------------------------------------------
+# Dereplication
+# ---------------------------------------------------------------------------
+
+def sequence_digest(sequence: str) -> bytes:
+    """
+    Return the hash used to compare sequences for exact identity.
+
+    Comparison is case-insensitive, since FASTA files mix soft-masked
+    lowercase and uppercase bases freely.
+
+    Args:
+        sequence (str): Sequence string.
+
+    Returns:
+        bytes: SHA-256 digest of the upper-cased sequence.
+    """
+    return hashlib.sha256(sequence.upper().encode("utf-8")).digest()
+
+
+def dereplicate_sequences(
+    sequences: dict[str, str],
+) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Collapse identical sequences to a single representative query.
+
+    The first query carrying a given sequence becomes its representative.
+
+    Args:
+        sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+
+    Returns:
+        tuple[dict[str, str], dict[str, str]]:
+            - unique sequences {representative_id: sequence}, in input order
+            - representative of every query {query_id: representative_id},
+              in input order
+
+    Example:
+        Input:
+            {"r1": "ACGT", "r2": "TTAA", "r3": "acgt"}
+
+        Output:
+            ({"r1": "ACGT", "r2": "TTAA"},
+             {"r1": "r1", "r2": "r2", "r3": "r1"})
+    """
+    unique: dict[str, str] = {}
+    representatives: dict[str, str] = {}
+    seen: dict[bytes, str] = {}
+
+    for query_id, sequence in sequences.items():
+        digest = sequence_digest(sequence)
+        representative_id = seen.get(digest)
+
+        if representative_id is None:
+            representative_id = query_id
+            seen[digest] = query_id
+            unique[query_id] = sequence
+
+        representatives[query_id] = representative_id
+
+    return unique, representatives
+
+
+def duplicate_counts(representatives: dict[str, str]) -> dict[str, int]:
+    """
+    Count how many queries share each query's sequence.
+
+    Args:
+        representatives (dict[str, str]): Mapping from dereplicate_sequences().
+
+    Returns:
+        dict[str, int]: {query_id: number of identical copies in the run},
+        including the query itself.
+    """
+    group_sizes: dict[str, int] = {}
+
+    for representative_id in representatives.values():
+        group_sizes[representative_id] = group_sizes.get(representative_id, 0) + 1
+
+    return {
+        query_id: group_sizes[representative_id]
+        for query_id, representative_id in representatives.items()
+    }
+
+
+def expand_results(
+    representative_results: dict[str, list[dict[str, Any]]],
+    representatives: dict[str, str],
+) -> dict[str, list[dict[str, Any]]]:
+    """
+    Fan hits for each representative back out to every original query ID.
+
+    Each duplicate gets its own copy of the hit dicts with 'query_id'
+    rewritten, so later stages can modify hits independently.
+
+    Args:
+        representative_results (dict[str, list[dict[str, Any]]]):
+            BLAST results keyed by representative ID.
+        representatives (dict[str, str]): Mapping from dereplicate_sequences().
+
+    Returns:
+        dict[str, list[dict[str, Any]]]: BLAST results keyed by every
+        original query ID, in the original input order.
+    """
+    expanded: dict[str, list[dict[str, Any]]] = {}
+
+    for query_id, representative_id in representatives.items():
+        hits = representative_results.get(representative_id, [])
+
+        if query_id == representative_id:
+            expanded[query_id] = hits
+        else:
+            expanded[query_id] = [{**hit, "query_id": query_id} for hit in hits]
+
+    return expanded
+
+
+def expand_table(representative_table, representatives: dict[str, str]):
+    """
+    Fan the rows of a HitTable back out to every original query ID.
+
+    Args:
+        representative_table (HitTable): BLAST hits keyed by representative ID.
+        representatives (dict[str, str]): Mapping from dereplicate_sequences().
+
+    Returns:
+        HitTable: Hits for every original query ID, in the original input order.
+    """
+    return representative_table.reindex_queries(
+        list(representatives.values()),
+        list(representatives.keys()),
+    )
+
+
+def iter_expanded_tables(representative_tables: Iterable, representatives: dict[str, str]) -> Iterator:
+    """
+    Fan out HitTables of representatives to every original query as they arrive.
+
+    Queries are yielded in their original input order as soon as their
+    representative has been searched, so results can be written while the
+    search is still running. A representative's table is released once its
+    last duplicate has been yielded.
+
+    Args:
+        representative_tables (Iterable[HitTable]): Hits of representatives,
+            piece by piece, in representative order.
+        representatives (dict[str, str]): Mapping from dereplicate_sequences().
+
+    Yields:
+        HitTable: Hits of the next queries in input order.
+    """
+    waiting: list[tuple[str, str]] = list(representatives.items())
+    last_use: dict[str, int] = {
+        representative_id: position
+        for position, (_, representative_id) in enumerate(waiting)
+    }
+    table_of: dict[str, Any] = {}
+    position = 0
+
+    for table in representative_tables:
+        for representative_id in table.query_ids:
+            table_of[representative_id] = table
+
+        ready = position
+        while ready < len(waiting) and waiting[ready][1] in table_of:
+            ready += 1
+
+        if ready == position:
+            continue
+
+        # Reindex runs of consecutive queries served by the same table
+        segments = []
+        start = position
+
+        for current in range(position + 1, ready + 1):
+            if current == ready or table_of[waiting[current][1]] is not table_of[waiting[start][1]]:
+                run = waiting[start:current]
+                segments.append(table_of[run[0][1]].reindex_queries(
+                    [representative_id for _, representative_id in run],
+                    [query_id for query_id, _ in run],
+                ))
+                start = current
+
+        for current in range(position, ready):
+            representative_id = waiting[current][1]
+            if last_use[representative_id] == current:
+                del table_of[representative_id]
+
+        position = ready
+        yield type(segments[0]).concat(segments)
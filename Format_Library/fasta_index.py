@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+# By Isabella Zuluaga
+
+"""
+fasta_index.py
+
+Random access to records of large FASTA files through an offset index.
+
+Currently supports:
+- building a faidx-style index (ID -> offsets, length, line width) in one pass
+- saving it as a sidecar file next to the FASTA and reusing it while the
+  FASTA file's size and modification time are unchanged (when the sidecar
+  cannot be written, the index is kept in memory only)
+- fetching arbitrary records through a memory-mapped view of the file
+- splitting a file into byte-range shards at record boundaries
+
+Sidecar format (<fasta>.fxi), tab-separated, after one header line:
+    sequence_id  length  header_offset  sequence_offset  sequence_end
+    line_bases  line_width
+
+line_bases and line_width are 0 when the record's lines are not all the
+same width; whole-record fetches work either way. The ID is the only
+column that may contain tabs, so lines are split from the right.
+
+If an ID occurs more than once, lookups by ID return its first record
+unless an occurrence number is given (see entry() and fetch()); every
+occurrence is still listed by ids() and yielded by iter_range(), and
+duplicate_ids() names the IDs concerned.
+
+Classes:
+    FastaIndex: Persistent offset index with mmap-backed record fetches.
+
+Typical usage:
+    index = FastaIndex.open("reads.fasta")
+    sequence = index.fetch("read_42")
+    for start, end in index.partition(8):
+        ...
+"""
+
+import bisect
+import mmap
+import os
+from typing import Iterator
+
+from file_handler import GZIP_MAGIC
+
+
+INDEX_EXTENSION: str = ".fxi"
+INDEX_HEADER_PREFIX: str = "#fasta_index"
+
+
+class FastaIndex:
+    """
+    Offset index over one uncompressed FASTA file.
+
+    Attributes:
+        fasta_path (str): Path to the indexed FASTA file.
+        index_path (str): Path to the sidecar index file.
+        records (dict[str, tuple[int, int, int, int, int, int]]):
+            sequence_id -> (length, header_offset, sequence_offset,
+            sequence_end, line_bases, line_width) of the first record
+            with that ID.
+    """
+
+    def __init__(self, fasta_path: str) -> None:
+        """
+        Create an empty index for a FASTA file. Use FastaIndex.open() to
+        load or build the index.
+
+        Args:
+            fasta_path (str): Path to the FASTA file.
+        """
+        self.fasta_path = fasta_path
+        self.index_path = fasta_path + INDEX_EXTENSION
+        self.records: dict[str, tuple[int, int, int, int, int, int]] = {}
+        self._header_offsets: list[int] = []
+        self._ordered_ids: list[str] = []
+        self._entries: list[tuple[int, int, int, int, int, int]] = []
+        self._duplicates: dict[str, list[tuple[int, int, int, int, int, int]]] = {}
+        self._file = None
+        self._mmap: mmap.mmap | None = None
+
+    # -----------------------------------------------------------------------
+    # Building and loading
+    # -----------------------------------------------------------------------
+
+    @classmethod
+    def open(cls, fasta_path: str) -> "FastaIndex":
+        """
+        Load the sidecar index if it is current, otherwise build it and try
+        to save it (see _save()).
+
+        Args:
+            fasta_path (str): Path to an uncompressed FASTA file.
+
+        Returns:
+            FastaIndex: Ready-to-use index.
+
+        Raises:
+            FileNotFoundError: If the FASTA file does not exist.
+            ValueError: If the FASTA file is gzip-compressed.
+        """
+        if not os.path.isfile(fasta_path):
+            raise FileNotFoundError(f"FASTA file not found: {fasta_path}")
+
+        with open(fasta_path, "rb") as probe:
+            if probe.read(2) == GZIP_MAGIC:
+                raise ValueError(
+                    f"Cannot index compressed FASTA file '{fasta_path}'. "
+                    "Decompress it first to use random access."
+                )
+
+        index = cls(fasta_path)
+
+        if not index._load():
+            index._build()
+            index._save()
+
+        return index
+
+    def _file_signature(self) -> str:
+        """
+        Return the size/mtime signature that marks the index as current.
+        """
+        file_stat = os.stat(self.fasta_path)
+        return f"size={file_stat.st_size}\tmtime_ns={file_stat.st_mtime_ns}"
+
+    def _load(self) -> bool:
+        """
+        Load the sidecar index if it matches the current FASTA file.
+
+        Returns:
+            bool: True if a current index was loaded, False otherwise.
+        """
+        if not os.path.isfile(self.index_path):
+            return False
+
+        with open(self.index_path, "r", encoding="utf-8") as index_file:
+            header = index_file.readline().rstrip("\n")
+
+            if header != f"{INDEX_HEADER_PREFIX}\t{self._file_signature()}":
+                return False
+
+            for line in index_file:
+                parts = line.rstrip("\n").rsplit("\t", 6)
+
+                if len(parts) != 7:
+                    return False
+
+                self._add_record(parts[0], tuple(int(value) for value in parts[1:]))
+
+        return True
+
+    def _build(self) -> None:
+        """
+        Scan the FASTA file once and record the offsets of every record.
+        """
+        self.records = {}
+        self._header_offsets = []
+        self._ordered_ids = []
+        self._entries = []
+        self._duplicates = {}
+
+        current_id: str | None = None
+        header_offset = sequence_offset = sequence_end = 0
+        length = 0
+        line_bases: int | None = None
+        line_width: int | None = None
+        uniform = True
+        last_line_short = False
+
+        def finish() -> None:
+            if current_id is None:
+                return
+            bases = line_bases if uniform and line_bases else 0
+            width = line_width if uniform and line_width else 0
+            self._add_record(
+                current_id,
+                (length, header_offset, sequence_offset, sequence_end, bases, width),
+            )
+
+        offset = 0
+
+        with open(self.fasta_path, "rb") as fasta_file:
+            for raw_line in fasta_file:
+                line_start = offset
+                offset += len(raw_line)
+
+                if raw_line.startswith(b">"):
+                    finish()
+                    current_id = raw_line[1:].strip().decode("utf-8")
+                    header_offset = line_start
+                    sequence_offset = sequence_end = offset
+                    length = 0
+                    line_bases = line_width = None
+                    uniform = True
+                    last_line_short = False
+                    continue
+
+                bases = len(raw_line.strip())
+
+                if current_id is None or bases == 0:
+                    continue
+
+                if line_bases is None:
+                    line_bases, line_width = bases, len(raw_line)
+                elif last_line_short or bases > line_bases or len(raw_line) - bases != line_width - line_bases:
+                    uniform = False
+
+                last_line_short = bases < line_bases
+                length += bases
+                sequence_end = offset
+
+        finish()
+
+    def _add_record(self, sequence_id: str, entry: tuple) -> None:
+        """
+        Register one record in the in-memory lookup structures.
+        """
+        if sequence_id in self.records:
+            self._duplicates.setdefault(sequence_id, [self.records[sequence_id]]).append(entry)
+        else:
+            self.records[sequence_id] = entry
+
+        self._header_offsets.append(entry[1])
+        self._ordered_ids.append(sequence_id)
+        self._entries.append(entry)
+
+    def _save(self) -> None:
+        """
+        Write the sidecar index next to the FASTA file atomically.
+
+        The index is only a cache: if the FASTA file's directory is
+        read-only or the sidecar cannot be written for another reason,
+        it is kept in memory only and built again on the next open().
+        """
+        temp_path = self.index_path + ".tmp"
+
+        try:
+            with open(temp_path, "w", encoding="utf-8") as index_file:
+                index_file.write(f"{INDEX_HEADER_PREFIX}\t{self._file_signature()}\n")
+
+                for sequence_id, entry in zip(self._ordered_ids, self._entries):
+                    values = "\t".join(str(value) for value in entry)
+                    index_file.write(f"{sequence_id}\t{values}\n")
+
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            if os.path.isfile(temp_path):
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    # -----------------------------------------------------------------------
+    # Record access
+    # -----------------------------------------------------------------------
+
+    def _view(self) -> mmap.mmap:
+        """
+        Return the read-only memory map of the FASTA file, opening it once.
+        """
+        if self._mmap is None:
+            self._file = open(self.fasta_path, "rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, sequence_id: str) -> bool:
+        return sequence_id in self.records
+
+    def ids(self) -> list[str]:
+        """
+        Return all sequence IDs in file order, one per record (an ID
+        occurring several times is listed each time).
+        """
+        return list(self._ordered_ids)
+
+    def duplicate_ids(self) -> list[str]:
+        """
+        Return the IDs shared by more than one record, in file order.
+        """
+        return list(self._duplicates)
+
+    def _sequence(self, entry: tuple[int, int, int, int, int, int]) -> str:
+        """
+        Return the sequence of the record described by an index entry.
+        """
+        _, _, sequence_offset, sequence_end, _, _ = entry
+        raw = self._view()[sequence_offset:sequence_end]
+        return raw.decode("utf-8").replace("\n", "").replace("\r", "").replace(" ", "")
+
+    def entry(self, sequence_id: str, occurrence: int = 0) -> tuple[int, int, int, int, int, int]:
+        """
+        Return the index entry of one record.
+
+        Args:
+            sequence_id (str): Record ID (the full header line without '>').
+            occurrence (int): Which record with this ID, counted from 0 in
+                file order; only IDs listed by duplicate_ids() have more
+                than one.
+
+        Returns:
+            tuple[int, int, int, int, int, int]: (length, header_offset,
+            sequence_offset, sequence_end, line_bases, line_width).
+
+        Raises:
+            KeyError: If the ID, or that occurrence of it, is not in the index.
+        """
+        if sequence_id not in self.records:
+            raise KeyError(f"Sequence '{sequence_id}' not found in {self.fasta_path}")
+
+        if occurrence == 0:
+            return self.records[sequence_id]
+
+        occurrences = self._duplicates.get(sequence_id, [])
+
+        if occurrence >= len(occurrences):
+            raise KeyError(
+                f"Sequence '{sequence_id}' occurs {max(1, len(occurrences))} times in {self.fasta_path}"
+            )
+
+        return occurrences[occurrence]
+
+    def fetch(self, sequence_id: str, occurrence: int = 0) -> str:
+        """
+        Return the full sequence of one record.
+
+        Args:
+            sequence_id (str): Record ID (the full header line without '>').
+            occurrence (int): Which record with this ID (see entry()).
+
+        Returns:
+            str: Sequence string.
+
+        Raises:
+            KeyError: If the ID is not in the index.
+        """
+        return self._sequence(self.entry(sequence_id, occurrence))
+
+    def fetch_region(self, sequence_id: str, start: int, end: int) -> str:
+        """
+        Return a 0-based, end-exclusive slice of one record's sequence.
+
+        Records with uniform line widths are sliced directly in the memory
+        map; others fall back to fetching the whole record.
+
+        Args:
+            sequence_id (str): Record ID.
+            start (int): Start position (0-based, inclusive).
+            end (int): End position (0-based, exclusive).
+
+        Returns:
+            str: Subsequence string.
+        """
+        if sequence_id not in self.records:
+            raise KeyError(f"Sequence '{sequence_id}' not found in {self.fasta_path}")
+
+        length, _, sequence_offset, _, line_bases, line_width = self.records[sequence_id]
+        start = max(0, start)
+        end = min(length, end)
+
+        if start >= end:
+            return ""
+
+        if not line_bases:
+            return self.fetch(sequence_id)[start:end]
+
+        def byte_position(position: int) -> int:
+            return sequence_offset + (position // line_bases) * line_width + position % line_bases
+
+        raw = self._view()[byte_position(start):byte_position(end - 1) + 1]
+        return raw.decode("utf-8").replace("\n", "").replace("\r", "")
+
+    def fetch_many(self, sequence_ids: list[str]) -> dict[str, str]:
+        """
+        Fetch several records by ID.
+
+        Args:
+            sequence_ids (list[str]): Record IDs.
+
+        Returns:
+            dict[str, str]: Dictionary like {sequence_id: sequence}, in the
+            requested order.
+        """
+        return {sequence_id: self.fetch(sequence_id) for sequence_id in sequence_ids}
+
+    # -----------------------------------------------------------------------
+    # Sharding
+    # -----------------------------------------------------------------------
+
+    def partition(self, num_shards: int) -> list[tuple[int, int]]:
+        """
+        Split the file into byte ranges of roughly equal size.
+
+        Every range starts at a record header, so each record belongs to
+        exactly one shard.
+
+        Args:
+            num_shards (int): Number of shards wanted.
+
+        Returns:
+            list[tuple[int, int]]: (start_byte, end_byte) per shard. Fewer
+            shards are returned if the file has fewer records.
+        """
+        if not self._header_offsets:
+            return []
+
+        file_size = os.path.getsize(self.fasta_path)
+        num_shards = max(1, min(num_shards, len(self._header_offsets)))
+        boundaries: list[int] = [self._header_offsets[0]]
+
+        for shard in range(1, num_shards):
+            target = file_size * shard // num_shards
+            position = bisect.bisect_left(self._header_offsets, target)
+
+            if position < len(self._header_offsets):
+                boundary = self._header_offsets[position]
+                if boundary > boundaries[-1]:
+                    boundaries.append(boundary)
+
+        boundaries.append(file_size)
+        return list(zip(boundaries[:-1], boundaries[1:]))
+
+    def iter_range(self, start_byte: int, end_byte: int) -> Iterator[tuple[str, str]]:
+        """
+        Yield the records whose header lies in [start_byte, end_byte).
+
+        Args:
+            start_byte (int): Start of the byte range.
+            end_byte (int): End of the byte range (exclusive).
+
+        Yields:
+            tuple[str, str]: (sequence_id, sequence) in file order.
+        """
+        first = bisect.bisect_left(self._header_offsets, start_byte)
+        last = bisect.bisect_left(self._header_offsets, end_byte)
+
+        for position in range(first, last):
+            yield self._ordered_ids[position], self._sequence(self._entries[position])
+
+    def close(self) -> None:
+        """
+        Release the memory map and file handle.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
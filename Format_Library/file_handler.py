@@ -8,62 +8,87 @@ Handles general file input operations for the pipeline.
 
 Currently supports:
 - reading FASTA query files into dictionaries
+- streaming FASTA records or fixed-size chunks lazily
+- reading gzip-compressed FASTA files transparently
 
 This module is intended for input/output helper functions that do not
 belong specifically to BLAST execution, classification, or database
 management.
 
 Functions:
+    open_fasta: Open a plain or gzip-compressed FASTA file as text.
+    iter_fasta: Yield (sequence_id, sequence) records one at a time.
+    chunk_records: Group records into dictionaries of at most chunk_size.
+    iter_fasta_chunks: Yield dictionaries of at most chunk_size records.
+    prefetch_chunks: Read the next chunk in the background while the
+                     current one is being processed.
     load_fasta: Load a FASTA file into a dictionary of sequences.
 
 Typical usage:
     queries = load_fasta("queries/query1.fasta")
+
+    for chunk in iter_fasta_chunks("reads.fasta.gz", 10000):
+        ...
 """
 
+import gzip
 import os
+import queue
+import threading
+from typing import Iterable, Iterator, TextIO
+
+
+GZIP_MAGIC: bytes = b"\x1f\x8b"
 
 
 # ---------------------------------------------------------------------------
 # FASTA input handling
 # ---------------------------------------------------------------------------
 
-def load_fasta(file_path: str) -> dict[str, str]:
+def open_fasta(file_path: str) -> TextIO:
     """
-    Load a FASTA file into a dictionary.
+    Open a FASTA file for reading, decompressing gzip input transparently.
 
-    Each record in the FASTA file is converted into:
-        {sequence_id: sequence_string}
+    Compression is detected from the file's magic bytes, not its extension.
 
     Args:
         file_path (str): Path to the FASTA file.
 
     Returns:
-        dict[str, str]: Dictionary mapping sequence IDs to sequence strings.
+        TextIO: Text stream over the (decompressed) file contents.
 
     Raises:
         FileNotFoundError: If the FASTA file does not exist.
-
-    Example:
-        FASTA input:
-            >seq1
-            ACTG
-            >seq2
-            TTAA
-
-        Output:
-            {
-                "seq1": "ACTG",
-                "seq2": "TTAA"
-            }
     """
     if not os.path.isfile(file_path):
         raise FileNotFoundError(f"Query FASTA file not found: {file_path}")
 
-    sequences: dict[str, str] = {}
+    with open(file_path, "rb") as probe:
+        magic = probe.read(2)
+
+    if magic == GZIP_MAGIC:
+        return gzip.open(file_path, "rt", encoding="utf-8")
+
+    return open(file_path, "r", encoding="utf-8")
+
+
+def iter_fasta(file_path: str) -> Iterator[tuple[str, str]]:
+    """
+    Yield FASTA records one at a time without loading the whole file.
+
+    Args:
+        file_path (str): Path to a plain or gzip-compressed FASTA file.
+
+    Yields:
+        tuple[str, str]: (sequence_id, sequence_string) for each record.
+
+    Raises:
+        FileNotFoundError: If the FASTA file does not exist.
+    """
     current_id: str | None = None
     seq_lines: list[str] = []
 
-    with open(file_path, "r", encoding="utf-8") as fasta_file:
+    with open_fasta(file_path) as fasta_file:
         for line in fasta_file:
             line = line.strip()
 
@@ -72,7 +97,7 @@ def load_fasta(file_path: str) -> dict[str, str]:
 
             if line.startswith(">"):
                 if current_id is not None:
-                    sequences[current_id] = "".join(seq_lines)
+                    yield current_id, "".join(seq_lines)
 
                 current_id = line[1:]
                 seq_lines = []
@@ -80,6 +105,136 @@ def load_fasta(file_path: str) -> dict[str, str]:
                 seq_lines.append(line)
 
     if current_id is not None:
-        sequences[current_id] = "".join(seq_lines)
+        yield current_id, "".join(seq_lines)
+
+
+def chunk_records(
+    records: Iterable[tuple[str, str]],
+    chunk_size: int,
+) -> Iterator[dict[str, str]]:
+    """
+    Group (sequence_id, sequence) records into dictionaries of at most chunk_size.
+
+    Args:
+        records (Iterable[tuple[str, str]]): Records, e.g. from iter_fasta().
+        chunk_size (int): Maximum number of records per chunk.
+
+    Yields:
+        dict[str, str]: Dictionary mapping sequence IDs to sequence strings.
+    """
+    chunk_size = max(1, int(chunk_size))
+    chunk: dict[str, str] = {}
+
+    for sequence_id, sequence in records:
+        chunk[sequence_id] = sequence
+
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = {}
+
+    if chunk:
+        yield chunk
+
+
+def iter_fasta_chunks(file_path: str, chunk_size: int) -> Iterator[dict[str, str]]:
+    """
+    Yield the records of a FASTA file in dictionaries of at most chunk_size.
+
+    Only one chunk is held in memory at a time, so peak memory depends on
+    the chunk size and not on the file size.
+
+    Args:
+        file_path (str): Path to a plain or gzip-compressed FASTA file.
+        chunk_size (int): Maximum number of records per chunk.
+
+    Yields:
+        dict[str, str]: Dictionary mapping sequence IDs to sequence strings.
+    """
+    return chunk_records(iter_fasta(file_path), chunk_size)
+
+
+def prefetch_chunks(chunks: Iterator[dict[str, str]], depth: int = 1) -> Iterator[dict[str, str]]:
+    """
+    Read chunks ahead in a background thread.
+
+    While the caller searches one chunk, the next `depth` chunks are already
+    being parsed, so reading and searching overlap. At most depth + 1 chunks
+    are held in memory by this function.
+
+    Args:
+        chunks (Iterator[dict[str, str]]): Chunk iterator, e.g. from iter_fasta_chunks().
+        depth (int): Number of chunks to read ahead.
+
+    Yields:
+        dict[str, str]: The same chunks, in the same order.
+
+    Raises:
+        Exception: Any error raised while reading is re-raised in the caller.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=max(1, depth))
+    finished = object()
+    stop = threading.Event()
+
+    def reader() -> None:
+        try:
+            for chunk in chunks:
+                while not stop.is_set():
+                    try:
+                        buffer.put(chunk, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            buffer.put(finished)
+        except Exception as error:
+            buffer.put(error)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = buffer.get()
+
+            if item is finished:
+                return
+
+            if isinstance(item, Exception):
+                raise item
+
+            yield item
+    finally:
+        stop.set()
+
+
+def load_fasta(file_path: str) -> dict[str, str]:
+    """
+    Load a FASTA file into a dictionary.
+
+    Each record in the FASTA file is converted into:
+        {sequence_id: sequence_string}
+
+    Args:
+        file_path (str): Path to the FASTA file (plain or gzip-compressed).
+
+    Returns:
+        dict[str, str]: Dictionary mapping sequence IDs to sequence strings.
+
+    Raises:
+        FileNotFoundError: If the FASTA file does not exist.
 
-    return sequences
+    Example:
+        FASTA input:
+            >seq1
+            ACTG
+            >seq2
+            TTAA
+
+        Output:
+            {
+                "seq1": "ACTG",
+                "seq2": "TTAA"
+            }
+    """
+    return dict(iter_fasta(file_path))
@@ -0,0 +1,720 @@
+#!/usr/bin/env python3
+# By Patrick Bircher
+
+"""
+ncbi_download.py
+
+Download engine for prebuilt NCBI BLAST databases.
+
+Currently supports:
+- finding every archive of a database up front, from the metadata file
+  NCBI publishes next to it (<db>-<type>-metadata.json), or by probing
+  <db>.tar.gz and the parts <db>.00.tar.gz, <db>.01.tar.gz, ... several
+  at a time
+- fetching the archives concurrently, with a configurable number of
+  connections
+- extracting every finished archive while the remaining ones download
+- resuming interrupted downloads with HTTP Range requests, from the
+  partial file (<archive>.part) and its journal (<archive>.journal)
+- verifying every archive against the .md5 file NCBI publishes next to
+  it, hashing in a worker thread while the download is still running,
+  and fetching again only the archives that fail
+- resuming an interrupted install: archives already extracted are listed
+  in <db_name>.download and are not fetched again
+- streaming: piping each download straight through a gzip/tar stream
+  extractor, so archives are never written to disk; the MD5 digest is
+  computed from the stream, and an archive whose stream fails (or that
+  has a partial download to resume) is fetched in staged mode instead
+
+Large databases such as refseq_rna come in dozens of parts. Fetching them
+one after another, each behind a probe request and its extraction, leaves
+the connection idle most of the time; with several connections and
+extraction in the background, the install is limited by bandwidth.
+
+Downloads use curl if available (Python SSL may not trust the NCBI
+certificate chain on some systems), otherwise urllib.
+
+Functions:
+    install_pending: Check whether an install was interrupted.
+
+Classes:
+    NcbiDownloader: Find, fetch, and extract the archives of a database.
+
+Typical usage:
+    downloader = NcbiDownloader("https://ftp.ncbi.nlm.nih.gov/blast/db", connections=4, mode="stream")
+    downloader.install("refseq_rna", "nucl", "databases/refseq_rna")
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import hashlib
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+# Block size for streamed downloads and timeout per network operation
+DOWNLOAD_BLOCK_BYTES: int = 1 << 20
+DOWNLOAD_TIMEOUT_SECONDS: int = 60
+
+# Default number of simultaneous connections
+DEFAULT_CONNECTIONS: int = 4
+
+# Install modes: 'stream' extracts archives while they download, 'staged'
+# saves each archive to disk first (resumable), then extracts it
+DOWNLOAD_MODES: tuple[str, ...] = ("stream", "staged")
+DEFAULT_MODE: str = "stream"
+
+# Attempts per archive: interrupted transfers resume where they stopped,
+# archives failing their md5 check are fetched again from the start
+MAX_ATTEMPTS: int = 3
+RETRY_DELAY_SECONDS: float = 2.0
+
+# Partial download of an archive, the journal tying it to its source, and
+# the list of archives already extracted by an unfinished install
+PARTIAL_EXTENSION: str = ".part"
+JOURNAL_EXTENSION: str = ".journal"
+INSTALL_JOURNAL_EXTENSION: str = ".download"
+
+# Hidden directory a streamed archive is extracted into until its MD5
+# digest is confirmed
+STAGING_EXTENSION: str = ".extracting"
+
+# curl exit code when the server cannot resume a transfer
+CURL_CANNOT_RESUME: int = 33
+
+
+class _RangeNotSupported(Exception):
+    """
+    The server ignored a Range request; the transfer must start over.
+    """
+
+
+def install_pending(db_name: str, db_dir: str) -> bool:
+    """
+    Check whether an install of a database was interrupted.
+
+    Args:
+        db_name (str): Database name.
+        db_dir (str): Local database directory.
+
+    Returns:
+        bool: True if some archives of the database are still to be
+        fetched or extracted.
+    """
+    return os.path.isfile(os.path.join(db_dir, db_name + INSTALL_JOURNAL_EXTENSION))
+
+
+def _file_md5(path: str) -> str:
+    """
+    Return the hex MD5 digest of a file.
+    """
+    digest = hashlib.md5()
+
+    with open(path, "rb") as stream:
+        for block in iter(lambda: stream.read(DOWNLOAD_BLOCK_BYTES), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+class _FileHasher(threading.Thread):
+    """
+    Compute the MD5 digest of a file while another thread writes it.
+
+    The thread follows the file as it grows and finishes once finish()
+    is called and every byte written so far has been hashed, so the
+    digest is ready as soon as the transfer ends.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(daemon=True)
+        self.path = path
+        self.digest = hashlib.md5()
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        with open(self.path, "rb") as stream:
+            while True:
+                finishing = self._done.is_set()
+                block = stream.read(DOWNLOAD_BLOCK_BYTES)
+
+                if block:
+                    self.digest.update(block)
+                elif finishing:
+                    return
+                else:
+                    self._done.wait(0.05)
+
+    def finish(self) -> str:
+        """
+        Wait for the remaining bytes to be hashed and return the hex digest.
+        """
+        self._done.set()
+        self.join()
+        return self.digest.hexdigest()
+
+
+class _HashingReader:
+    """
+    File-like wrapper that hashes and counts every byte read through it.
+    """
+
+    def __init__(self, stream) -> None:
+        self.stream = stream
+        self.digest = hashlib.md5()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        block = self.stream.read(size)
+        self.digest.update(block)
+        self.size += len(block)
+        return block
+
+    def drain(self) -> None:
+        """
+        Read the rest of the stream (tar padding, gzip trailer).
+        """
+        while self.read(DOWNLOAD_BLOCK_BYTES):
+            pass
+
+
+class NcbiDownloader:
+    """
+    Find, fetch, and extract the archives of an NCBI BLAST database.
+
+    Attributes:
+        base_url (str): Directory URL the archives are served from.
+        connections (int): Maximum number of simultaneous downloads.
+        mode (str): 'stream' or 'staged'.
+    """
+
+    def __init__(self, base_url: str, connections: int = DEFAULT_CONNECTIONS, mode: str = DEFAULT_MODE) -> None:
+        """
+        Initialize the downloader.
+
+        Args:
+            base_url (str): Directory URL the archives are served from.
+            connections (int): Maximum number of simultaneous downloads.
+            mode (str): 'stream' or 'staged'.
+
+        Raises:
+            ValueError: If mode is not a supported install mode.
+        """
+        if mode not in DOWNLOAD_MODES:
+            raise ValueError(f"Unknown download mode '{mode}'. Use one of: {', '.join(DOWNLOAD_MODES)}.")
+
+        self.base_url = base_url.rstrip("/")
+        self.connections = max(1, int(connections))
+        self.mode = mode
+        self._output_lock = threading.Lock()
+
+    # -----------------------------------------------------------------------
+    # Private helpers
+    # -----------------------------------------------------------------------
+
+    def _write(self, message: str) -> None:
+        """
+        Print a message from any worker thread without interleaving.
+        """
+        with self._output_lock:
+            sys.stdout.write(message)
+            sys.stdout.flush()
+
+    def _url(self, filename: str) -> str:
+        """
+        Return the URL of a file in base_url.
+        """
+        return f"{self.base_url}/{filename}"
+
+    def url_exists(self, url: str) -> bool:
+        """
+        Check whether a remote URL exists.
+
+        Args:
+            url (str): URL to test.
+
+        Returns:
+            bool: True if the URL exists, False otherwise.
+        """
+        try:
+            if shutil.which("curl"):
+                cmd = ["curl", "-I", "-L", "-s", "-f", "-o", os.devnull, url]
+                result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+                return result.returncode == 0
+
+            request = urllib.request.Request(url, method="HEAD")
+            with urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT_SECONDS):
+                return True
+        except Exception:
+            return False
+
+    def _read_text(self, url: str) -> str | None:
+        """
+        Return the contents of a small remote text file, or None if it
+        cannot be fetched.
+        """
+        try:
+            if shutil.which("curl"):
+                result = subprocess.run(
+                    ["curl", "-L", "-s", "-f", url],
+                    capture_output=True, text=True, check=False,
+                )
+                return result.stdout if result.returncode == 0 else None
+
+            with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT_SECONDS) as response:
+                return response.read().decode("utf-8")
+        except Exception:
+            return None
+
+    def _probe_parts(self, db_name: str) -> list[str]:
+        """
+        Find the archives of a database by probing their URLs.
+
+        Parts are probed `connections` at a time until one is missing.
+
+        Returns:
+            list[str]: Archive file names, or an empty list if none exist.
+        """
+        single = f"{db_name}.tar.gz"
+
+        if self.url_exists(self._url(single)):
+            return [single]
+
+        parts: list[str] = []
+
+        with ThreadPoolExecutor(max_workers=self.connections) as executor:
+            while True:
+                window = [f"{db_name}.{len(parts) + offset:02d}.tar.gz" for offset in range(self.connections)]
+                found = list(executor.map(lambda name: self.url_exists(self._url(name)), window))
+
+                for name, exists in zip(window, found):
+                    if not exists:
+                        return parts
+                    parts.append(name)
+
+    def _expected_md5(self, filename: str) -> str | None:
+        """
+        Return the MD5 digest NCBI publishes for an archive (<archive>.md5),
+        or None if there is none.
+        """
+        text = self._read_text(self._url(filename + ".md5"))
+
+        if not text or not text.split():
+            return None
+
+        digest = text.split()[0].lower()
+        return digest if len(digest) == 32 else None
+
+    def _transfer(self, url: str, partial_path: str) -> None:
+        """
+        Append the rest of a remote file to its partial download.
+
+        A Range request asks for the bytes after those already on disk.
+
+        Raises:
+            _RangeNotSupported: If the server cannot resume the transfer.
+            RuntimeError: If the transfer fails.
+        """
+        offset = os.path.getsize(partial_path)
+
+        if shutil.which("curl"):
+            cmd = ["curl", "-L", "-s", "-S", "-f", url, "-o", partial_path]
+            if offset:
+                cmd[1:1] = ["-C", "-"]
+
+            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+
+            if result.returncode == CURL_CANNOT_RESUME:
+                raise _RangeNotSupported()
+
+            if result.returncode != 0:
+                raise RuntimeError(
+                    f"curl download failed with return code {result.returncode}.\n"
+                    f"STDERR:\n{result.stderr}"
+                )
+            return
+
+        request = urllib.request.Request(url)
+        if offset:
+            request.add_header("Range", f"bytes={offset}-")
+
+        try:
+            response = urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT_SECONDS)
+        except urllib.error.HTTPError as e:
+            if e.code == 416 and offset:
+                # Requested range starts at the end: nothing left to fetch
+                return
+            raise RuntimeError(f"HTTP error {e.code} for '{url}'.")
+        except Exception as e:
+            raise RuntimeError(
+                "Download failed. Python SSL may not trust the certificate chain in this environment.\n"
+                "A curl-based download is recommended on this system.\n"
+                f"Original error: {e}"
+            )
+
+        with response:
+            if offset and response.status != 206:
+                raise _RangeNotSupported()
+
+            expected_bytes = response.headers.get("Content-Length")
+            received = 0
+
+            try:
+                with open(partial_path, "ab") as partial:
+                    while True:
+                        block = response.read(DOWNLOAD_BLOCK_BYTES)
+                        if not block:
+                            break
+                        partial.write(block)
+                        received += len(block)
+            except Exception as e:
+                raise RuntimeError(f"Transfer of '{url}' interrupted: {e}")
+
+            # A dropped connection can look like a normal end of stream
+            if expected_bytes is not None and received < int(expected_bytes):
+                raise RuntimeError(f"Transfer of '{url}' interrupted after {received} of {expected_bytes} bytes.")
+
+    def _fetch(self, filename: str, archive_path: str) -> None:
+        """
+        Download and verify one archive.
+
+        The archive is downloaded to <archive>.part, next to a journal
+        recording its URL and published MD5 digest. An interrupted
+        transfer resumes from the partial file, in this run or the next
+        one; a partial file whose journal does not match the archive
+        published now is discarded. The digest is computed by a worker
+        thread while the archive downloads. An archive failing the check
+        is fetched again from the start.
+
+        An archive already in place, left by an earlier run that stopped
+        before extracting it, is checked against the published digest
+        again and only kept if it matches.
+
+        Raises:
+            RuntimeError: If the archive still cannot be downloaded, or
+                still fails its MD5 check, after MAX_ATTEMPTS attempts.
+        """
+        url = self._url(filename)
+        expected = self._expected_md5(filename)
+
+        if os.path.isfile(archive_path):
+            if expected is None or _file_md5(archive_path) == expected:
+                return
+
+            self._write(f"'{filename}' on disk does not match its MD5 digest; fetching it again.\n")
+            os.remove(archive_path)
+        partial_path = archive_path + PARTIAL_EXTENSION
+        journal_path = archive_path + JOURNAL_EXTENSION
+        journal = {"url": url, "md5": expected}
+
+        if os.path.isfile(journal_path):
+            with open(journal_path, "r", encoding="utf-8") as journal_file:
+                try:
+                    previous = json.load(journal_file)
+                except ValueError:
+                    previous = None
+
+            if previous != journal and os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        with open(journal_path, "w", encoding="utf-8") as journal_file:
+            json.dump(journal, journal_file)
+
+        if os.path.isfile(partial_path) and os.path.getsize(partial_path):
+            self._write(f"Resuming '{filename}' at {os.path.getsize(partial_path) / 1_000_000:.1f} MB.\n")
+
+        error = "no attempt made"
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            if attempt > 1:
+                time.sleep(RETRY_DELAY_SECONDS)
+
+            open(partial_path, "ab").close()
+            hasher = _FileHasher(partial_path)
+            hasher.start()
+
+            try:
+                self._transfer(url, partial_path)
+            except _RangeNotSupported:
+                hasher.finish()
+                os.remove(partial_path)
+                error = "server does not support resuming"
+                self._write(f"Server cannot resume '{filename}'; restarting it.\n")
+                continue
+            except RuntimeError as e:
+                hasher.finish()
+                error = str(e)
+                self._write(f"Download of '{filename}' interrupted (attempt {attempt}/{MAX_ATTEMPTS}).\n")
+                continue
+
+            digest = hasher.finish()
+
+            if expected is not None and digest != expected:
+                os.remove(partial_path)
+                error = f"MD5 mismatch (expected {expected}, got {digest})"
+                self._write(f"'{filename}' failed its MD5 check (attempt {attempt}/{MAX_ATTEMPTS}).\n")
+                continue
+
+            os.replace(partial_path, archive_path)
+            os.remove(journal_path)
+            return
+
+        raise RuntimeError(f"Download of '{url}' failed after {MAX_ATTEMPTS} attempts: {error}")
+
+    def _extract(self, archive_path: str, db_dir: str) -> None:
+        """
+        Extract one .tar.gz archive into the database directory and delete it.
+
+        An archive that cannot be extracted is deleted as well, so the
+        next run fetches it again instead of reusing it.
+
+        Raises:
+            RuntimeError: If extraction fails.
+        """
+        try:
+            with tarfile.open(archive_path, "r:gz") as tar:
+                tar.extractall(path=db_dir)
+        except Exception as e:
+            if os.path.isfile(archive_path):
+                os.remove(archive_path)
+            raise RuntimeError(f"Extraction failed for '{archive_path}': {e}")
+
+        os.remove(archive_path)
+
+    def _stream(self, filename: str, db_dir: str) -> None:
+        """
+        Download one archive and extract it on the fly.
+
+        The response is read through a gzip/tar stream extractor into a
+        hidden staging directory, hashing every byte on the way. The
+        extracted files are moved into db_dir only once the MD5 digest
+        matches the published one, so a failed stream leaves db_dir as it
+        was.
+
+        Raises:
+            RuntimeError: If the transfer fails, is incomplete, cannot be
+                extracted, or fails its MD5 check.
+        """
+        url = self._url(filename)
+        expected = self._expected_md5(filename)
+        staging_dir = os.path.join(db_dir, f".{filename}{STAGING_EXTENSION}")
+
+        if os.path.isdir(staging_dir):
+            shutil.rmtree(staging_dir)
+        os.makedirs(staging_dir)
+
+        process = None
+        expected_bytes: str | None = None
+
+        try:
+            if shutil.which("curl"):
+                process = subprocess.Popen(
+                    ["curl", "-L", "-s", "-S", "-f", url],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+                source = process.stdout
+            else:
+                try:
+                    source = urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT_SECONDS)
+                except Exception as e:
+                    raise RuntimeError(f"Request for '{url}' failed: {e}")
+                expected_bytes = source.headers.get("Content-Length")
+
+            reader = _HashingReader(source)
+
+            try:
+                with tarfile.open(fileobj=reader, mode="r|gz") as tar:
+                    tar.extractall(path=staging_dir)
+                reader.drain()
+            except Exception as e:
+                raise RuntimeError(f"Streamed extraction of '{filename}' failed: {e}")
+            finally:
+                source.close()
+
+            if process is not None:
+                stderr_text = process.stderr.read().decode("utf-8", "replace")
+                if process.wait() != 0:
+                    raise RuntimeError(
+                        f"curl download failed with return code {process.returncode}.\n"
+                        f"STDERR:\n{stderr_text}"
+                    )
+
+            if expected_bytes is not None and reader.size < int(expected_bytes):
+                raise RuntimeError(f"Transfer of '{url}' interrupted after {reader.size} of {expected_bytes} bytes.")
+
+            digest = reader.digest.hexdigest()
+
+            if expected is not None and digest != expected:
+                raise RuntimeError(f"MD5 mismatch (expected {expected}, got {digest})")
+
+            for name in os.listdir(staging_dir):
+                os.replace(os.path.join(staging_dir, name), os.path.join(db_dir, name))
+        finally:
+            if process is not None and process.poll() is None:
+                process.kill()
+                process.wait()
+
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def _install_part(self, filename: str, db_dir: str) -> bool:
+        """
+        Bring one archive into db_dir, streamed or staged.
+
+        Archives are streamed in 'stream' mode unless an earlier run left
+        a partial download to resume. A failed stream falls back to a
+        staged download, which can resume where it stops.
+
+        Returns:
+            bool: True if the archive was streamed and is already
+            extracted, False if it was saved to db_dir for extraction.
+        """
+        archive_path = os.path.join(db_dir, filename)
+        resumable = os.path.isfile(archive_path) or os.path.isfile(archive_path + PARTIAL_EXTENSION)
+
+        if self.mode == "stream" and not resumable:
+            try:
+                self._stream(filename, db_dir)
+                return True
+            except RuntimeError as e:
+                self._write(f"Streaming '{filename}' failed ({e}); falling back to a staged download.\n")
+
+        self._fetch(filename, archive_path)
+        return False
+
+    # -----------------------------------------------------------------------
+    # Public methods
+    # -----------------------------------------------------------------------
+
+    def list_parts(self, db_name: str, db_type: str) -> list[str]:
+        """
+        Return the file names of every archive of a database.
+
+        The metadata file NCBI publishes with each database lists them in
+        one request; if it is missing or unreadable, the archive URLs are
+        probed instead.
+
+        Args:
+            db_name (str): Database name.
+            db_type (str): 'nucl' or 'prot'.
+
+        Returns:
+            list[str]: Archive file names, e.g. ['refseq_rna.00.tar.gz', ...].
+
+        Raises:
+            RuntimeError: If no archives are found.
+        """
+        metadata_text = self._read_text(self._url(f"{db_name}-{db_type}-metadata.json"))
+        parts: list[str] = []
+
+        if metadata_text:
+            try:
+                metadata = json.loads(metadata_text)
+                parts = [
+                    url.rsplit("/", 1)[-1] for url in metadata.get("files", [])
+                    if url.endswith(".tar.gz")
+                ]
+            except (ValueError, AttributeError):
+                parts = []
+
+        if not parts:
+            parts = self._probe_parts(db_name)
+
+        if not parts:
+            raise RuntimeError(
+                f"No single-part or multi-part archives were found for database '{db_name}'."
+            )
+
+        return parts
+
+    def install(self, db_name: str, db_type: str, db_dir: str) -> list[str]:
+        """
+        Download and extract every archive of a database into db_dir.
+
+        Up to `connections` archives download at once. In 'stream' mode
+        each archive is extracted as it arrives; in 'staged' mode (and for
+        archives falling back to it) each finished archive is handed to a
+        background extraction thread, so the remaining downloads continue
+        while it is unpacked. Extracted
+        archives are recorded in <db_name>.download until the install
+        completes, so an interrupted install resumes with the archives
+        still missing (and their partial downloads).
+
+        Args:
+            db_name (str): Database name.
+            db_type (str): 'nucl' or 'prot'.
+            db_dir (str): Local database directory.
+
+        Returns:
+            list[str]: File names of the installed archives.
+
+        Raises:
+            RuntimeError: If an archive cannot be found, downloaded,
+                verified, or extracted. Pending downloads are cancelled;
+                partial downloads are kept for the next attempt.
+        """
+        parts = self.list_parts(db_name, db_type)
+        install_journal = os.path.join(db_dir, db_name + INSTALL_JOURNAL_EXTENSION)
+        installed: set[str] = set()
+
+        if os.path.isfile(install_journal):
+            with open(install_journal, "r", encoding="utf-8") as journal_file:
+                installed = {line.strip() for line in journal_file if line.strip()}
+        else:
+            open(install_journal, "w", encoding="utf-8").close()
+
+        pending = [part for part in parts if part not in installed]
+        workers = max(1, min(self.connections, len(pending)))
+
+        if installed:
+            self._write(f"Resuming install of '{db_name}': {len(parts) - len(pending)} archive(s) already extracted.\n")
+
+        self._write(
+            f"Fetching {len(pending)} archive(s) of '{db_name}' "
+            f"over {workers} connection(s)...\n"
+        )
+
+        with ThreadPoolExecutor(max_workers=workers) as downloads, \
+                ThreadPoolExecutor(max_workers=1) as extraction:
+            fetching = {
+                downloads.submit(self._install_part, part, db_dir): part
+                for part in pending
+            }
+            extracting = {}
+            fetched = 0
+
+            try:
+                while fetching or extracting:
+                    done, _ = wait(list(fetching) + list(extracting), return_when=FIRST_COMPLETED)
+
+                    for future in done:
+                        streamed = future.result()
+
+                        if future in fetching:
+                            part = fetching.pop(future)
+                            fetched += 1
+                            self._write(f"Fetched '{part}' ({fetched}/{len(pending)}).\n")
+
+                            if not streamed:
+                                extracting[extraction.submit(self._extract, os.path.join(db_dir, part), db_dir)] = part
+                                continue
+                        else:
+                            part = extracting.pop(future)
+
+                        with open(install_journal, "a", encoding="utf-8") as journal_file:
+                            journal_file.write(part + "\n")
+                        self._write(f"Extracted '{part}'.\n")
+            except BaseException:
+                for future in list(fetching) + list(extracting):
+                    future.cancel()
+                raise
+
+        os.remove(install_journal)
+        return parts
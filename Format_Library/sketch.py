@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+# By Patrick Bircher
+
+"""
+sketch.py
+
+Compact k-mer sketches of BLAST databases, used to prefilter searches.
+
+Currently supports:
+- building a FracMinHash sketch (every k-mer whose hash falls below
+  2^64 / scale) of a database from its FASTA file or from blastdbcmd
+  output, in bounded memory
+- sketching a whole batch of queries in one vectorized NumPy pass
+- scoring queries against every sketched database by containment (the
+  fraction of a query's sampled k-mers found in the database) and
+  routing each query to its top-N databases
+
+Nucleotide sketches use canonical k-mers (the smaller of a k-mer and its
+reverse complement), since BLAST searches both strands. Protein sketches
+use residues directly.
+
+Sketch format (<db_prefix>.sketch.npz):
+    hashes   sorted unique uint64 k-mer hashes
+    k        k-mer length
+    scale    sampling rate (1 in scale k-mers kept)
+    db_type  'nucl' or 'prot'
+
+The sketch sits next to the database files, so it is part of the database
+fingerprint and is replaced whenever the database is rebuilt.
+
+Functions:
+    sketch_path: Path of the sketch file of a database.
+    kmer_hashes: Hash every valid k-mer of a batch of sequences.
+    build_sketch: Build and save the sketch of a sequence stream.
+    merge_sketches: Save the union of several sketches.
+
+Classes:
+    DatabaseSketch: Sampled k-mer hashes of one database.
+    SketchRouter: Pick the candidate databases of each query.
+
+Typical usage:
+    build_sketch(sequences, "nucl", sketch_path("databases/db1/db1"))
+
+    router = SketchRouter(databases, "nucl")
+    routes = router.route(query_sequences, top_n=2)
+"""
+
+import os
+from typing import Iterable
+
+import numpy as np
+
+
+SKETCH_EXTENSION: str = ".sketch.npz"
+
+# k-mer length and sampling rate per database type. Nucleotide k-mers are
+# 2 bits per base, protein k-mers 5 bits per residue, so both fit in 64 bits.
+SKETCH_PARAMS: dict[str, dict[str, int]] = {
+    "nucl": {"k": 21, "scale": 20, "bits": 2},
+    "prot": {"k": 7, "scale": 10, "bits": 5},
+}
+
+# Bases of sequence hashed per pass while building a database sketch
+BUILD_CHUNK_BASES: int = 4_000_000
+
+INVALID_CODE: int = 255
+
+
+def _code_table(db_type: str) -> np.ndarray:
+    """
+    Return the byte -> residue code lookup table of one database type.
+
+    Unknown characters (ambiguity codes, gaps, separators) map to
+    INVALID_CODE, and k-mers containing them are skipped.
+    """
+    table = np.full(256, INVALID_CODE, dtype=np.uint8)
+
+    if db_type == "nucl":
+        alphabet = "ACGT"
+        table[ord("U")] = table[ord("u")] = 3
+    else:
+        alphabet = "ACDEFGHIKLMNPQRSTVWY"
+
+    for code, residue in enumerate(alphabet):
+        table[ord(residue)] = table[ord(residue.lower())] = code
+
+    return table
+
+
+_CODE_TABLES: dict[str, np.ndarray] = {db_type: _code_table(db_type) for db_type in SKETCH_PARAMS}
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """
+    Scramble packed k-mers into uniformly distributed 64-bit hashes
+    (the splitmix64 finalizer; uint64 arithmetic wraps around).
+    """
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def sketch_path(db_prefix: str) -> str:
+    """
+    Return the path of the sketch file of a database.
+
+    Args:
+        db_prefix (str): Full path prefix of the database.
+
+    Returns:
+        str: e.g. 'databases/my_db/my_db.sketch.npz'.
+    """
+    return db_prefix + SKETCH_EXTENSION
+
+
+def kmer_hashes(
+    sequences: list[str],
+    db_type: str,
+    k: int,
+    scale: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Hash the sampled k-mers of a batch of sequences in one vectorized pass.
+
+    The sequences are joined with separators into one code array, so the
+    work per batch is a fixed number of NumPy operations regardless of how
+    many sequences it holds.
+
+    Args:
+        sequences (list[str]): Sequence strings.
+        db_type (str): 'nucl' or 'prot'.
+        k (int): k-mer length.
+        scale (int): Keep the k-mers whose hash is below 2^64 / scale.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]:
+            - uint64 hash of every sampled k-mer
+            - index of the sequence each hash came from
+    """
+    bits = SKETCH_PARAMS[db_type]["bits"]
+    joined = "\0".join(sequences).encode("ascii", errors="replace")
+    codes = _CODE_TABLES[db_type][np.frombuffer(joined, dtype=np.uint8)]
+    num_windows = len(codes) - k + 1
+
+    if num_windows <= 0:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+
+    invalid = codes == INVALID_CODE
+    invalid_before = np.concatenate(([0], np.cumsum(invalid, dtype=np.int64)))
+    valid = invalid_before[k:] == invalid_before[:num_windows]
+
+    values = np.where(invalid, 0, codes).astype(np.uint64)
+    forward = np.zeros(num_windows, dtype=np.uint64)
+    reverse = np.zeros(num_windows, dtype=np.uint64) if db_type == "nucl" else None
+
+    for offset in range(k):
+        window = values[offset:offset + num_windows]
+        forward = (forward << np.uint64(bits)) | window
+
+        if reverse is not None:
+            reverse |= (np.uint64(3) - window) << np.uint64(bits * offset)
+
+    packed = forward if reverse is None else np.minimum(forward, reverse)
+    hashes = _mix64(packed)
+    keep = valid & (hashes < np.uint64((2**64 - 1) // scale))
+
+    starts = np.cumsum([0] + [len(sequence) + 1 for sequence in sequences[:-1]])
+    owners = np.searchsorted(starts, np.flatnonzero(keep), side="right") - 1
+
+    return hashes[keep], owners
+
+
+class DatabaseSketch:
+    """
+    Sampled k-mer hashes of one database.
+
+    Attributes:
+        hashes (np.ndarray): Sorted unique uint64 hashes.
+        k (int): k-mer length.
+        scale (int): Sampling rate.
+        db_type (str): 'nucl' or 'prot'.
+    """
+
+    def __init__(self, hashes: np.ndarray, k: int, scale: int, db_type: str) -> None:
+        """
+        Wrap sketch data. Use build_sketch() or DatabaseSketch.load() to get one.
+        """
+        self.hashes = hashes
+        self.k = k
+        self.scale = scale
+        self.db_type = db_type
+
+    def save(self, path: str) -> None:
+        """
+        Write the sketch atomically.
+
+        Args:
+            path (str): Sketch file path (see sketch_path()).
+        """
+        temp_path = path + ".tmp.npz"
+        np.savez(temp_path, hashes=self.hashes, k=self.k, scale=self.scale, db_type=self.db_type)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DatabaseSketch":
+        """
+        Read a sketch file.
+
+        Args:
+            path (str): Sketch file path.
+
+        Returns:
+            DatabaseSketch: The stored sketch.
+
+        Raises:
+            FileNotFoundError: If the sketch file does not exist.
+        """
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Sketch file not found: {path}")
+
+        with np.load(path) as stored:
+            return cls(stored["hashes"], int(stored["k"]), int(stored["scale"]), str(stored["db_type"]))
+
+    def containment(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Return which of the given hashes are in this sketch.
+
+        Args:
+            hashes (np.ndarray): uint64 hashes.
+
+        Returns:
+            np.ndarray: Boolean array, True where the hash is present.
+        """
+        if len(self.hashes) == 0:
+            return np.zeros(len(hashes), dtype=bool)
+
+        positions = np.searchsorted(self.hashes, hashes)
+        positions[positions == len(self.hashes)] = 0
+        return self.hashes[positions] == hashes
+
+
+def build_sketch(sequences: Iterable[str], db_type: str, path: str) -> DatabaseSketch:
+    """
+    Build the sketch of a stream of database sequences and save it.
+
+    Sequences are hashed in batches of about BUILD_CHUNK_BASES bases, so
+    memory stays bounded by the batch size plus the sketch itself.
+
+    Args:
+        sequences (Iterable[str]): Database sequences.
+        db_type (str): 'nucl' or 'prot'.
+        path (str): Sketch file path (see sketch_path()).
+
+    Returns:
+        DatabaseSketch: The saved sketch.
+    """
+    params = SKETCH_PARAMS[db_type]
+    parts: list[np.ndarray] = []
+    batch: list[str] = []
+    batch_bases = 0
+
+    def flush() -> None:
+        hashes, _ = kmer_hashes(batch, db_type, params["k"], params["scale"])
+        parts.append(np.unique(hashes))
+        batch.clear()
+
+    for sequence in sequences:
+        batch.append(sequence)
+        batch_bases += len(sequence)
+
+        if batch_bases >= BUILD_CHUNK_BASES:
+            flush()
+            batch_bases = 0
+
+            if len(parts) >= 16:
+                parts[:] = [np.unique(np.concatenate(parts))]
+
+    if batch:
+        flush()
+
+    hashes = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.uint64)
+    sketch = DatabaseSketch(hashes, params["k"], params["scale"], db_type)
+    sketch.save(path)
+    return sketch
+
+
+def merge_sketches(paths: list[str], path: str) -> DatabaseSketch | None:
+    """
+    Save the union of several sketches, e.g. of the volumes of one database.
+
+    If any input sketch is missing, no union is saved and an older sketch
+    at path is removed, since it would no longer describe every volume.
+
+    Args:
+        paths (list[str]): Sketch files to join.
+        path (str): Sketch file path of the union.
+
+    Returns:
+        DatabaseSketch | None: The saved sketch, or None if an input is missing.
+    """
+    if not paths or not all(os.path.isfile(part) for part in paths):
+        if os.path.isfile(path):
+            os.remove(path)
+        return None
+
+    sketches = [DatabaseSketch.load(part) for part in paths]
+    first = sketches[0]
+    hashes = np.unique(np.concatenate([sketch.hashes for sketch in sketches]))
+    sketch = DatabaseSketch(hashes, first.k, first.scale, first.db_type)
+    sketch.save(path)
+    return sketch
+
+
+class SketchRouter:
+    """
+    Route queries to the databases whose sketches they share most k-mers with.
+
+    Databases without a sketch file cannot be scored and are searched for
+    every query.
+
+    Attributes:
+        databases (list[str]): Database prefixes, in search order.
+        sketches (dict[str, DatabaseSketch]): Sketch of every sketched database.
+        unsketched (list[str]): Databases without a usable sketch.
+    """
+
+    def __init__(self, databases: list[str], db_type: str) -> None:
+        """
+        Load the sketches of the given databases.
+
+        Args:
+            databases (list[str]): Database prefix paths.
+            db_type (str): 'nucl' or 'prot'; sketches of another type are ignored.
+        """
+        self.databases = databases
+        self.sketches: dict[str, DatabaseSketch] = {}
+        self.unsketched: list[str] = []
+
+        for database in databases:
+            path = sketch_path(database)
+            sketch = DatabaseSketch.load(path) if os.path.isfile(path) else None
+
+            if sketch is None or sketch.db_type != db_type:
+                self.unsketched.append(database)
+            else:
+                self.sketches[database] = sketch
+
+    def scores(self, query_sequences: dict[str, str]) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """
+        Score every query against every sketched database.
+
+        Args:
+            query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+
+        Returns:
+            tuple[list[str], np.ndarray, np.ndarray]:
+                - sketched databases, in search order (the score columns)
+                - containment matrix, queries x databases
+                - number of sampled k-mers per query
+        """
+        sketched = [database for database in self.databases if database in self.sketches]
+        num_queries = len(query_sequences)
+        matrix = np.zeros((num_queries, len(sketched)), dtype=np.float64)
+        sizes = np.zeros(num_queries, dtype=np.int64)
+
+        # Sketches built with the same parameters share one query pass
+        by_params: dict[tuple[int, int], list[int]] = {}
+        for column, database in enumerate(sketched):
+            sketch = self.sketches[database]
+            by_params.setdefault((sketch.k, sketch.scale), []).append(column)
+
+        sequences = list(query_sequences.values())
+
+        # Hash queries in batches of about BUILD_CHUNK_BASES bases
+        batches: list[tuple[int, int]] = []
+        start = batch_bases = 0
+        for position, sequence in enumerate(sequences):
+            batch_bases += len(sequence)
+            if batch_bases >= BUILD_CHUNK_BASES or position == num_queries - 1:
+                batches.append((start, position + 1))
+                start, batch_bases = position + 1, 0
+
+        for (k, scale), columns in by_params.items():
+            db_type = self.sketches[sketched[columns[0]]].db_type
+
+            for first, last in batches:
+                hashes, owners = kmer_hashes(sequences[first:last], db_type, k, scale)
+                batch_sizes = np.bincount(owners, minlength=last - first)
+                sizes[first:last] = batch_sizes
+
+                for column in columns:
+                    found = self.sketches[sketched[column]].containment(hashes)
+                    shared = np.bincount(owners, weights=found, minlength=last - first)
+                    matrix[first:last, column] = shared / np.maximum(batch_sizes, 1)
+
+        return sketched, matrix, sizes
+
+    def route(
+        self,
+        query_sequences: dict[str, str],
+        top_n: int,
+        min_containment: float = 0.0,
+    ) -> dict[str, list[str]]:
+        """
+        Pick the databases each query should be searched against.
+
+        A query goes to its top_n sketched databases by containment (among
+        those scoring above min_containment) plus every unsketched database.
+        Queries with no k-mer evidence at all (too short, or no shared
+        k-mers with any database) go to every database, so distant hits
+        BLAST could still find are not lost.
+
+        Args:
+            query_sequences (dict[str, str]): Dictionary like {query_id: sequence}.
+            top_n (int): Number of sketched databases kept per query.
+            min_containment (float): Minimum containment for a database to count.
+
+        Returns:
+            dict[str, list[str]]: {database: query IDs to search}, covering
+            every database in search order, with query IDs in input order.
+        """
+        routes: dict[str, list[str]] = {database: [] for database in self.databases}
+        query_ids = list(query_sequences)
+        sketched, matrix, sizes = self.scores(query_sequences)
+
+        if sketched:
+            order = np.argsort(-matrix, axis=1, kind="stable")[:, :max(1, top_n)]
+            best = np.take_along_axis(matrix, order, axis=1)
+            keep = (best > min_containment) & (best > 0)
+            no_evidence = (sizes == 0) | ~keep.any(axis=1)
+        else:
+            no_evidence = np.ones(len(query_ids), dtype=bool)
+
+        for row, query_id in enumerate(query_ids):
+            if no_evidence[row]:
+                chosen = set(self.databases)
+            else:
+                chosen = {sketched[column] for column in order[row][keep[row]]}
+                chosen.update(self.unsketched)
+
+            for database in self.databases:
+                if database in chosen:
+                    routes[database].append(query_id)
+
+        return routes
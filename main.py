@@ -20,14 +20,24 @@ specific tasks to the corresponding modules.
 Typical usage:
     python3 main.py --list_databases
     python3 main.py --download_ncbi 16S_ribosomal_RNA
+    python3 main.py --build_sketches
     python3 main.py --db_name H1N1 --fasta_file databases/H1N1_2025.fasta --db_type nucl
+    python3 main.py --db_name ref --fasta_file ref.fasta --db_type nucl --shards 8
     python3 main.py --run_blast --query_file queries/16S_Unknown.fasta
+    python3 main.py --run_blast --query_file queries/16S_Unknown.fasta --query_ids 16S_Unknown_2
+    python3 main.py --run_blast --query_file queries/16S_Unknown.fasta --update
     python3 main.py --classify results/16S_Unknown/16S_Unknown_results.txt
 """
 
 import os
 import sys
+import json
+import hashlib
 import argparse
+from functools import partial
+from typing import Callable, Iterator
+
+import numpy as np
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -40,12 +50,19 @@ from database_manager import (
     download_ncbi_database,
     get_all_database_paths_by_type,
     list_databases,
+    database_fingerprint,
+    build_missing_sketches,
 )
-from config import load_config, print_config
-from file_handler import load_fasta
+from config import load_config, config_flag, config_list, classifier_thresholds, print_config
+from file_handler import chunk_records, iter_fasta_chunks, prefetch_chunks
+from fasta_index import FastaIndex
+from dereplication import dereplicate_sequences, duplicate_counts, iter_expanded_tables
+from clustering import cluster_sequences
 from blast_runner import BlastRunner
-from classifier import classify_results_file
-from results_handler import save_results
+from cascade import SearchStage, format_stage_report, merge_stage_stats, order_databases, run_stages
+from hit_table import HitTable
+from classifier import best_hit_rows, classify_results_file, update_classification
+from results_handler import ResultsWriter, results_paths, saved_run_databases, update_results
 
 
 # ---------------------------------------------------------------------------
@@ -79,12 +96,25 @@ def parse_args() -> argparse.Namespace:
         help="Type of database sequence"
     )
 
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Build a new database as this many volumes with parallel makeblastdb processes"
+    )
+
     parser.add_argument(
         "--list_databases",
         action="store_true",
         help="List available BLAST databases"
     )
 
+    parser.add_argument(
+        "--build_sketches",
+        action="store_true",
+        help="Build the prefilter sketch of every database that has none yet"
+    )
+
     parser.add_argument(
         "--config",
         default="Format_Library/blast_config.txt",
@@ -108,9 +138,31 @@ def parse_args() -> argparse.Namespace:
         help="Run BLAST using the selected query file"
     )
 
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted --run_blast run from its journal"
+    )
+
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Search only new or rebuilt databases and merge their hits into the saved results"
+    )
+
+    parser.add_argument(
+        "--query_ids",
+        help="Comma-separated query IDs to re-run from --query_file (uses a FASTA index)"
+    )
+
+    parser.add_argument(
+        "--shard",
+        help="Run only shard I of N of --query_file, given as I/N (1-based)"
+    )
+
     parser.add_argument(
         "--classify",
-        help="Path to a BLAST results file"
+        help="Path to a BLAST results file (.txt) or binary results directory (.hits)"
     )
 
     parser.add_argument(
@@ -121,6 +173,450 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+# ---------------------------------------------------------------------------
+# BLAST search helpers
+# ---------------------------------------------------------------------------
+
+def select_query_chunks(args: argparse.Namespace, chunk_size: int):
+    """
+    Return the query chunks to search and the name of the results run.
+
+    By default the whole query file is streamed. With --query_ids or
+    --shard, the records are pulled through a FASTA offset index instead,
+    and results are saved under a separate run name so they do not
+    overwrite the results of the full file.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+        chunk_size (int): Maximum number of queries per chunk.
+
+    Returns:
+        tuple: (iterator of {query_id: sequence} chunks, run name or None).
+    """
+    if not args.query_ids and not args.shard:
+        return iter_fasta_chunks(args.query_file, chunk_size), None
+
+    query_name = os.path.splitext(os.path.basename(args.query_file))[0]
+    index = FastaIndex.open(args.query_file)
+
+    if args.query_ids:
+        query_ids = [query_id.strip() for query_id in args.query_ids.split(",") if query_id.strip()]
+        missing = [query_id for query_id in query_ids if query_id not in index]
+
+        if missing:
+            sys.stderr.write(f"Error: Query IDs not found in '{args.query_file}': {', '.join(missing)}\n")
+            sys.exit(1)
+
+        records = ((query_id, index.fetch(query_id)) for query_id in query_ids)
+        return chunk_records(records, chunk_size), f"{query_name}_rerun"
+
+    try:
+        shard_number, num_shards = (int(value) for value in args.shard.split("/"))
+    except ValueError:
+        sys.stderr.write("Error: --shard must look like I/N, e.g. 2/8.\n")
+        sys.exit(1)
+
+    shards = index.partition(num_shards)
+
+    if not 1 <= shard_number <= num_shards:
+        sys.stderr.write(f"Error: Shard {shard_number} is outside 1..{num_shards}.\n")
+        sys.exit(1)
+
+    if shard_number > len(shards):
+        records = iter(())
+    else:
+        start_byte, end_byte = shards[shard_number - 1]
+        records = index.iter_range(start_byte, end_byte)
+
+    return chunk_records(records, chunk_size), f"{query_name}_shard{shard_number}of{num_shards}"
+
+
+def run_fingerprint(query_file: str, databases: list[str], config: dict) -> dict:
+    """
+    Describe the inputs of a BLAST run, so a resumed run can verify that
+    nothing changed since it started.
+
+    Args:
+        query_file (str): Path to the query FASTA file.
+        databases (list[str]): List of database prefix paths.
+        config (dict): Loaded configuration.
+
+    Returns:
+        dict: Query file signature, fingerprint per database, and a hash
+        of the configuration.
+    """
+    query_stat = os.stat(query_file)
+    config_text = json.dumps({str(key): str(value) for key, value in config.items()}, sort_keys=True)
+
+    return {
+        "query_file": f"{os.path.abspath(query_file)}\tsize={query_stat.st_size}\tmtime_ns={query_stat.st_mtime_ns}",
+        "databases": {database: database_fingerprint(database) for database in databases},
+        "config": hashlib.sha256(config_text.encode("utf-8")).hexdigest(),
+    }
+
+
+def search_queries(
+    runner: BlastRunner,
+    queries: dict[str, str],
+    databases: list[str],
+    dereplicate: bool,
+    completed: set[str] | None = None,
+) -> Iterator[tuple[HitTable, dict[str, int] | None]]:
+    """
+    Search one chunk of queries against every database, piece by piece.
+
+    Pieces are yielded as soon as their queries are finished on every
+    database, in input order, so they can be written out immediately.
+
+    With dereplication enabled, identical sequences within the chunk are
+    searched once and their hits are copied back to every duplicate.
+    Duplicates spread over different chunks are served by the result cache.
+
+    Args:
+        runner (BlastRunner): Configured BLAST runner.
+        queries (dict[str, str]): Dictionary like {query_id: sequence}.
+        databases (list[str]): List of database prefix paths.
+        dereplicate (bool): Collapse identical sequences before searching.
+        completed (set[str] | None): Queries already written by an earlier
+            attempt of a resumed run; they are skipped.
+
+    Yields:
+        tuple[HitTable, dict[str, int] | None]: BLAST hits of the next
+        finished queries, and copy counts per query of the chunk (None
+        without dereplication).
+    """
+    completed = completed or set()
+
+    if not dereplicate:
+        remaining = {query_id: sequence for query_id, sequence in queries.items() if query_id not in completed}
+
+        for piece in runner.iter_results(remaining, databases):
+            yield HitTable.from_results(piece), None
+        return
+
+    # Copy counts cover the whole chunk, including already completed queries
+    unique_queries, representatives = dereplicate_sequences(queries)
+    copy_counts = duplicate_counts(representatives)
+
+    if completed:
+        representatives = {
+            query_id: representative_id
+            for query_id, representative_id in representatives.items()
+            if query_id not in completed
+        }
+        needed = set(representatives.values())
+        unique_queries = {
+            query_id: sequence for query_id, sequence in unique_queries.items() if query_id in needed
+        }
+
+    sys.stdout.write(
+        f"Dereplicated {len(queries)} queries into "
+        f"{len(unique_queries)} unique sequences.\n"
+    )
+
+    unique_tables = (
+        HitTable.from_results(piece)
+        for piece in runner.iter_results(unique_queries, databases)
+    )
+
+    for table in iter_expanded_tables(unique_tables, representatives):
+        yield table, copy_counts
+
+
+def clustered_search(
+    search: Callable[[dict[str, str]], Iterator[tuple[HitTable, dict[str, int] | None]]],
+    queries: dict[str, str],
+    clusters: tuple[dict[str, str], dict[str, str], dict[str, tuple[str, float]]],
+    dereplicate: bool,
+    completed: set[str] | None = None,
+) -> Iterator[tuple[HitTable, dict[str, int] | None]]:
+    """
+    Search only the cluster representatives of a chunk and copy their hits
+    to every member.
+
+    Args:
+        search (Callable): Searches {query_id: sequence} and yields
+            (HitTable, copy counts) pieces, e.g. search_queries() without
+            dereplication.
+        queries (dict[str, str]): Dictionary like {query_id: sequence}.
+        clusters (tuple): Result of cluster_sequences() for queries.
+        dereplicate (bool): Report copy counts of identical sequences.
+        completed (set[str] | None): Queries already written by an earlier
+            attempt of a resumed run; they are skipped.
+
+    Yields:
+        tuple[HitTable, dict[str, int] | None]: BLAST hits of the next
+        finished queries, in input order, and copy counts per query of
+        the chunk (None without dereplication).
+    """
+    completed = completed or set()
+    representatives, assignment, _ = clusters
+    copy_counts = duplicate_counts(dereplicate_sequences(queries)[1]) if dereplicate else None
+
+    assignment = {
+        query_id: representative_id
+        for query_id, representative_id in assignment.items()
+        if query_id not in completed
+    }
+    needed = set(assignment.values())
+    representatives = {
+        query_id: sequence for query_id, sequence in representatives.items() if query_id in needed
+    }
+
+    sys.stdout.write(
+        f"Clustered {len(queries)} queries into {len(representatives)} representatives.\n"
+    )
+
+    representative_tables = (table for table, _ in search(representatives))
+
+    for table in iter_expanded_tables(representative_tables, assignment):
+        yield table, copy_counts
+
+
+def cluster_chunk(
+    queries: dict[str, str],
+    config: dict,
+) -> tuple[dict[str, str], dict[str, str], dict[str, tuple[str, float]]] | None:
+    """
+    Cluster a chunk of queries if 'cluster' is enabled, else return None.
+
+    Queries at or above 'cluster_identity' (estimated from shared k-mers)
+    join the cluster of a longer representative. Clusters never span
+    chunks: near-duplicates read in different chunks are searched
+    separately.
+    """
+    if not config_flag(config, "cluster"):
+        return None
+
+    db_type = "prot" if str(config.get("program", "blastn")).lower() == "blastp" else "nucl"
+    return cluster_sequences(queries, float(config.get("cluster_identity", 0.97)), db_type)
+
+
+def search_table(
+    runner: BlastRunner,
+    databases: list[str],
+    dereplicate: bool,
+    queries: dict[str, str],
+) -> HitTable:
+    """
+    Search queries against databases and return all hits as one table.
+    """
+    return HitTable.concat([table for table, _ in search_queries(runner, queries, databases, dereplicate)])
+
+
+def resolved_check(config: dict) -> Callable[[HitTable], np.ndarray]:
+    """
+    Return a function marking the queries of a table that the classifier
+    would label with the configured thresholds.
+    """
+    evalue_threshold, identity_threshold = classifier_thresholds(config)
+
+    def is_resolved(table: HitTable):
+        return best_hit_rows(table, evalue_threshold, identity_threshold) >= 0
+
+    return is_resolved
+
+
+def fast_search_params(config: dict) -> dict:
+    """
+    Return the configuration for the fast first pass of an escalated search.
+
+    'fast_task' and 'fast_word_size' replace the task and word size;
+    everything else (thresholds, filters, batching) stays the same. Left
+    blank, they default to what suits the program: megablast with word
+    size 28 for blastn, the '-fast' task with word size 6 otherwise.
+    """
+    program = str(config.get("program", "blastn")).lower()
+
+    def setting(key, default):
+        value = config.get(key)
+        if value is None or value != value or not str(value).strip():  # missing or blank (NaN)
+            return default
+        return value
+
+    return {
+        **config,
+        "task": setting("fast_task", "megablast" if program == "blastn" else f"{program}-fast"),
+        "word_size": setting("fast_word_size", 28 if program == "blastn" else 6),
+    }
+
+
+def search_stages(
+    runner: BlastRunner,
+    databases: list[str],
+    dereplicate: bool,
+    config: dict,
+) -> list[SearchStage]:
+    """
+    Build the stages of a staged search, or [] for a plain search.
+
+    - cascade: one stage per database. Databases listed in 'cascade_order'
+      come first; the rest follow from the smallest to the largest.
+    - escalation: a fast pass (e.g. megablast) over every database first,
+      then the configured, sensitive settings for the queries the fast
+      pass left unresolved. The sensitive hits replace the fast ones.
+
+    With both enabled, the fast pass and the sensitive pass are each a
+    cascade.
+    """
+    cascade = config_flag(config, "cascade") and len(databases) > 1
+    escalation = config_flag(config, "escalation")
+
+    if not cascade and not escalation:
+        return []
+
+    if cascade:
+        ordered = order_databases(databases, config_list(config, "cascade_order"))
+        sys.stdout.write(
+            "Cascade order: " + " -> ".join(os.path.basename(database) for database in ordered) + "\n"
+        )
+        tiers = [(os.path.basename(database), [database]) for database in ordered]
+    else:
+        tiers = [("all databases", databases)]
+
+    def stages_for(stage_runner: BlastRunner, prefix: str, replaces_hits: bool) -> list[SearchStage]:
+        return [
+            SearchStage(
+                f"{prefix}{name}",
+                partial(search_table, stage_runner, tier_databases, dereplicate),
+                replaces_hits=replaces_hits and index == 0,
+            )
+            for index, (name, tier_databases) in enumerate(tiers)
+        ]
+
+    if not escalation:
+        return stages_for(runner, "", False)
+
+    fast_params = fast_search_params(config)
+    fast_runner = BlastRunner(fast_params)
+
+    return (
+        stages_for(fast_runner, f"{fast_params['task']}:", False)
+        + stages_for(runner, "sensitive:", True)
+    )
+
+
+def staged_search(
+    stages: list[SearchStage],
+    queries: dict[str, str],
+    dereplicate: bool,
+    completed: set[str],
+    is_resolved: Callable[[HitTable], np.ndarray],
+    stats: list[dict],
+) -> Iterator[tuple[HitTable, dict[str, int] | None]]:
+    """
+    Search one chunk of queries stage by stage (see cascade.run_stages).
+
+    Yields the chunk's hits as a single piece, since a query is finished
+    only once no later stage needs it. Stage statistics are added to stats.
+    """
+    copy_counts = duplicate_counts(dereplicate_sequences(queries)[1]) if dereplicate else None
+    remaining = {query_id: sequence for query_id, sequence in queries.items() if query_id not in completed}
+
+    table, chunk_stats = run_stages(remaining, stages, is_resolved)
+    merge_stage_stats(stats, chunk_stats)
+
+    yield table, copy_counts
+
+
+def update_run(
+    args: argparse.Namespace,
+    runner: BlastRunner,
+    config: dict,
+    databases: list[str],
+) -> None:
+    """
+    Bring saved results up to date with the current database catalog.
+
+    The database fingerprints recorded in the run journal of the saved
+    results are compared with the current ones. Only new or rebuilt
+    databases are searched; hits from rebuilt or removed databases are
+    replaced, and only the queries whose hits changed are reclassified.
+    Text and binary results are both updated. The update is refused if
+    the query file or the configuration changed since the results were
+    saved, since new hits would then not be comparable with the old ones.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+        runner (BlastRunner): Configured BLAST runner.
+        config (dict): Loaded configuration.
+        databases (list[str]): Current database prefix paths.
+    """
+    _, run_name = select_query_chunks(args, 1)
+    results_dir, text_file, binary_dir = results_paths(args.query_file, run_name)
+    fingerprint = run_fingerprint(args.query_file, databases, config)
+
+    try:
+        recorded = saved_run_databases(args.query_file, fingerprint, run_name)
+    except (ValueError, FileNotFoundError) as error:
+        sys.stderr.write(f"Error: {error}\n")
+        sys.exit(1)
+
+    current = fingerprint["databases"]
+    searched = [database for database in databases if recorded.get(database) != current[database]]
+    replaced = [database for database in recorded if recorded[database] != current.get(database)]
+
+    if not searched and not replaced:
+        sys.stdout.write(f"Results in {results_dir} are up to date.\n")
+        return
+
+    sys.stdout.write(
+        f"Updating {results_dir}: searching {len(searched)} new or rebuilt databases, "
+        f"replacing hits from {len(replaced)}.\n"
+    )
+
+    dereplicate = config_flag(config, "dereplicate")
+    query_chunks, _ = select_query_chunks(args, int(config.get("read_chunk_size", 100000)))
+    new_tables: list[HitTable] = []
+
+    if searched:
+        for queries in query_chunks:
+            clusters = cluster_chunk(queries, config)
+
+            if clusters is None:
+                pieces = search_queries(runner, queries, searched, dereplicate)
+            else:
+                pieces = clustered_search(
+                    partial(search_queries, runner, databases=searched, dereplicate=False),
+                    queries, clusters, dereplicate,
+                )
+
+            for table, _ in pieces:
+                new_tables.append(table)
+
+    try:
+        merged, changed_queries = update_results(
+            args.query_file,
+            HitTable.concat(new_tables),
+            {os.path.basename(database) for database in replaced},
+            fingerprint,
+            run_name=run_name,
+        )
+    except ValueError as error:
+        sys.stderr.write(f"Error: {error}\n")
+        sys.exit(1)
+
+    sys.stdout.write(f"Results saved in: {results_dir} ({len(changed_queries)} queries with changed hits)\n")
+
+    evalue_threshold, identity_threshold = classifier_thresholds(config)
+
+    relabeled = update_classification(
+        merged,
+        changed_queries,
+        binary_dir if os.path.isdir(binary_dir) else text_file,
+        evalue_threshold=evalue_threshold,
+        identity_threshold=identity_threshold,
+    )
+
+    if relabeled is None:
+        sys.stdout.write("No saved classification to update; run --classify to create one.\n")
+        return
+
+    sys.stdout.write(f"Reclassified {len(changed_queries)} queries; {len(relabeled)} labels changed:\n")
+    for query_id, label in relabeled.items():
+        sys.stdout.write(f"{query_id}\t{label}\n")
+
+
 # ---------------------------------------------------------------------------
 # Main workflow
 # ---------------------------------------------------------------------------
@@ -134,6 +630,7 @@ def main() -> None:
 
     Supported actions:
     - list databases
+    - build missing prefilter sketches
     - show configuration
     - download NCBI database
     - create or reuse local database
@@ -146,23 +643,35 @@ def main() -> None:
         list_databases()
         return
 
+    if args.build_sketches:
+        built = build_missing_sketches()
+        sys.stdout.write(f"Built prefilter sketches for {len(built)} databases.\n")
+        return
+
     if args.show_config:
         config = load_config(args.config)
         print_config(config)
         return
 
     if args.download_ncbi:
-        db_path = download_ncbi_database(args.download_ncbi)
+        config = load_config(args.config)
+        db_path = download_ncbi_database(
+            args.download_ncbi,
+            connections=int(config.get("download_connections", 4)),
+            mode=str(config.get("download_mode", "stream")).strip().lower(),
+            build_sketches=config_flag(config, "prefilter"),
+        )
         sys.stdout.write(f"Downloaded database ready: {db_path}\n")
         return
 
     if args.classify:
         config = load_config(args.config)
+        evalue_threshold, identity_threshold = classifier_thresholds(config)
 
         predictions = classify_results_file(
             results_file=args.classify,
-            evalue_threshold=float(config.get("evalue", 1e-5)),
-            identity_threshold=float(config.get("perc_identity", 70.0)),
+            evalue_threshold=evalue_threshold,
+            identity_threshold=identity_threshold,
             save_output=True
         )
 
@@ -179,10 +688,14 @@ def main() -> None:
                 )
                 sys.exit(1)
 
+            config = load_config(args.config)
+
             db_path = get_database(
                 fasta_path=args.fasta_file,
                 db_name=args.db_name,
-                db_type=args.db_type
+                db_type=args.db_type,
+                num_shards=args.shards,
+                build_sketches=config_flag(config, "prefilter"),
             )
 
             sys.stdout.write(f"Database ready: {db_path}\n")
@@ -196,7 +709,6 @@ def main() -> None:
             sys.exit(1)
 
         config = load_config(args.config)
-        queries = load_fasta(args.query_file)
 
         if args.db_name:
             databases = [os.path.join("databases", args.db_name, args.db_name)]
@@ -217,22 +729,94 @@ def main() -> None:
 
         runner = BlastRunner(config)
 
-        blast_results = runner.run_blast_across_databases(
-            query_sequences=queries,
-            databases=databases
-        )
+        if args.update:
+            update_run(args, runner, config, databases)
+            return
+
+        dereplicate = config_flag(config, "dereplicate")
+        read_chunk_size = int(config.get("read_chunk_size", 100000))
+
+        query_chunks, run_name = select_query_chunks(args, read_chunk_size)
+        chunks = prefetch_chunks(query_chunks)
+
+        try:
+            writer = ResultsWriter(
+                args.query_file,
+                run_name=run_name,
+                filters=runner.hit_filters(),
+                results_format=str(config.get("results_format", "text")),
+                with_copies=dereplicate,
+                buffer_hits=int(config.get("results_buffer_hits", 100000)),
+                fingerprint=run_fingerprint(args.query_file, databases, config),
+                resume=args.resume,
+                with_clusters=config_flag(config, "cluster"),
+            )
+        except (ValueError, FileNotFoundError) as error:
+            sys.stderr.write(f"Error: {error}\n")
+            sys.exit(1)
+
+        stage_stats: list[dict] = []
+
+        try:
+            stages = search_stages(runner, databases, dereplicate, config)
+        except ValueError as error:
+            sys.stderr.write(f"Error: {error}\n")
+            sys.exit(1)
+
+        with writer:
+            if writer.finished:
+                return
+
+            for queries in chunks:
+                if writer.completed_queries.issuperset(queries):
+                    continue
+
+                sys.stdout.write(f"Read {len(queries)} queries from '{args.query_file}'.\n")
+
+                clusters = cluster_chunk(queries, config)
+                inferred = clusters[2] if clusters is not None else None
+
+                if stages:
+                    search = partial(
+                        staged_search, stages, dereplicate=dereplicate and clusters is None,
+                        completed=set(), is_resolved=resolved_check(config), stats=stage_stats,
+                    )
+                else:
+                    search = partial(
+                        search_queries, runner, databases=databases,
+                        dereplicate=dereplicate and clusters is None,
+                    )
+
+                if clusters is None:
+                    pieces = search(queries, completed=writer.completed_queries)
+                else:
+                    pieces = clustered_search(search, queries, clusters, dereplicate, writer.completed_queries)
+
+                for table, copy_counts in pieces:
+                    writer.write(table, copy_counts, inferred)
+
+        if stage_stats:
+            report = format_stage_report(stage_stats, stage_stats[0]["queries"])
+            report_file = writer.text_file[:-len("_results.txt")] + "_stage_report.txt"
+
+            with open(report_file, "w", encoding="utf-8") as out:
+                out.write(report)
 
-        save_results(blast_results, args.query_file)
+            sys.stdout.write(report)
+            sys.stdout.write(f"Stage report saved in: {report_file}\n")
         return
 
     sys.stdout.write(
         "No action selected.\n"
         "Use one of the following options:\n"
         "  --list_databases\n"
+        "  --build_sketches\n"
         "  --show_config [--config <file>]\n"
         "  --download_ncbi <db_name>\n"
-        "  --db_name <name> --fasta_file <file> --db_type <nucl|prot>\n"
+        "  --db_name <name> --fasta_file <file> --db_type <nucl|prot> [--shards <N>]\n"
         "  --run_blast --query_file <file> [--db_name <name>] [--config <file>]\n"
+        "             [--resume | --update]\n"
+        "             [--query_ids <id1,id2,...> | --shard <I/N>]\n"
         "  --classify <results_file> [--config <file>]\n"
     )
 
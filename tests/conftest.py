@@ -0,0 +1,20 @@
+# By Isabella Zuluaga
+
+"""
+Shared pytest setup.
+
+The pipeline modules are imported as flat modules, the same way main.py
+does it, so the library folders are added to sys.path here.
+"""
+
+import os
+import sys
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for library in ("Format_Library", "BLAST_Library", "Evaluation_Library"):
+    library_path = os.path.join(ROOT_DIR, library)
+
+    if library_path not in sys.path:
+        sys.path.insert(0, library_path)
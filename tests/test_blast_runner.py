@@ -0,0 +1,155 @@
+# By Isabella Zuluaga
+
+"""
+Checks for the parse-time filters of BlastRunner.
+"""
+
+import blast_runner
+from blast_runner import BlastRunner
+from classifier import classify_hit_table
+from hit_table import HitTable
+
+
+def test_hit_filters_use_classifier_thresholds():
+    runner = BlastRunner({
+        "evalue": 10.0,
+        "perc_identity": 0,
+        "classify_evalue": 1e-5,
+        "classify_identity": 80.0,
+        "pushdown_filters": "yes",
+        "top_k_per_query": 3,
+    })
+
+    assert runner.hit_filters() == {"evalue": 1e-5, "identity": 80.0, "top_k": 3}
+
+
+def test_hit_filters_fall_back_to_blast_thresholds():
+    runner = BlastRunner({
+        "evalue": 1e-3,
+        "perc_identity": 90,
+        "classify_evalue": float("nan"),
+        "pushdown_filters": "yes",
+    })
+
+    assert runner.hit_filters() == {"evalue": 1e-3, "identity": 90.0, "top_k": 0}
+
+
+def test_hit_filters_disabled_by_default():
+    assert BlastRunner({"evalue": 1e-3}).hit_filters() is None
+
+
+def volume_hit(subject_id: str, evalue: float, bitscore: float, identity: float = 99.0) -> dict:
+    return {
+        "database": "ref.00",
+        "subject_id": subject_id,
+        "identity": identity,
+        "evalue": evalue,
+        "bitscore": bitscore,
+    }
+
+
+def volume_piece() -> dict:
+    return {
+        "q1": [
+            # volume ref.00, in BLAST order
+            volume_hit("s1", 1e-10, 100.0),
+            volume_hit("s1", 1e-5, 40.0),
+            volume_hit("s2", 1e-8, 90.0),
+            # volume ref.01
+            volume_hit("s3", 1e-10, 100.0),
+            volume_hit("s5", 1e-12, 120.0, identity=50.0),
+            volume_hit("s4", 1e-9, 95.0),
+        ],
+    }
+
+
+def test_merge_volume_hits_keeps_best_subjects_in_blast_order():
+    runner = BlastRunner({"max_target_seqs": 4})
+
+    merged = runner.merge_volume_hits(volume_piece(), "databases/ref/ref")["q1"]
+
+    # s1 and s3 tie: volume order decides; HSPs of s1 stay together
+    assert [(hit["subject_id"], hit["evalue"]) for hit in merged] == [
+        ("s5", 1e-12), ("s1", 1e-10), ("s1", 1e-5), ("s3", 1e-10), ("s4", 1e-9),
+    ]
+    assert {hit["database"] for hit in merged} == {"ref"}
+
+
+def test_merge_volume_hits_filters_after_max_target_seqs():
+    runner = BlastRunner({
+        "max_target_seqs": 4,
+        "pushdown_filters": "yes",
+        "classify_evalue": 1e-9,
+        "classify_identity": 90.0,
+        "top_k_per_query": 0,
+    })
+
+    merged = runner.merge_volume_hits(volume_piece(), "databases/ref/ref")["q1"]
+
+    # s5 takes a max_target_seqs slot before it is filtered out, so s2
+    # stays cut, as in a single-volume search
+    assert [hit["subject_id"] for hit in merged] == ["s1", "s3", "s4"]
+
+
+class FakeSubjectMap:
+    """Subject map of an alias over dbA and dbB with no shared subject IDs."""
+
+    def __init__(self, alias_prefix: str):
+        pass
+
+    def lookup(self, subject_ids: list[str]) -> dict[str, str]:
+        return {subject_id: "db" + subject_id[0].upper() for subject_id in subject_ids}
+
+    def ambiguous(self, subject_ids: list[str]) -> set[str]:
+        return set()
+
+    def close(self) -> None:
+        pass
+
+
+def alias_search(monkeypatch, top_k: int) -> dict:
+    # dbA's hits outscore dbB's, so a top-K over the whole alias search
+    # drops all of dbB, although its best hit wins after normalization
+    def fake_blast(self, cmd, fasta_records, database_name, filters=None):
+        for subject_id, identity, evalue, bitscore in (
+            ("a1", 95.0, 0.0, 500.0),
+            ("b1", 99.0, 0.0, 300.0),
+            ("b2", 98.0, 0.0, 290.0),
+            ("a2", 80.0, 1e-10, 50.0),
+        ):
+            yield {
+                "query_id": "q1",
+                "database": database_name,
+                "subject_id": subject_id,
+                "identity": identity,
+                "alignment_length": 100,
+                "evalue": evalue,
+                "bitscore": bitscore,
+            }
+
+    monkeypatch.setattr(blast_runner, "SubjectDatabaseMap", FakeSubjectMap)
+    monkeypatch.setattr(BlastRunner, "alias_database_for", lambda self, databases: "databases/.alias/all_nucl")
+    monkeypatch.setattr(BlastRunner, "check_blast_program", lambda self: None)
+    monkeypatch.setattr(BlastRunner, "stream_blast", fake_blast)
+
+    runner = BlastRunner({
+        "search_mode": "alias",
+        "pushdown_filters": "yes",
+        "top_k_per_query": top_k,
+    })
+
+    results: dict = {}
+    for piece in runner.iter_results({"q1": "ACGT"}, ["databases/dbA/dbA", "databases/dbB/dbB"]):
+        results.update(piece)
+    return results
+
+
+def test_alias_top_k_is_applied_per_member_database(monkeypatch):
+    unfiltered = alias_search(monkeypatch, top_k=0)
+    filtered = alias_search(monkeypatch, top_k=1)
+
+    assert classify_hit_table(HitTable.from_results(unfiltered)) == {"q1": "b1"}
+    assert classify_hit_table(HitTable.from_results(filtered)) == {"q1": "b1"}
+
+    # dbA keeps its best and its lowest bit score; dbB's two hits both stay
+    assert {hit["database"] for hit in filtered["q1"]} == {"dbA", "dbB"}
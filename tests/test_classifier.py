@@ -0,0 +1,89 @@
+# By Isabella Zuluaga
+
+"""
+Checks that the vectorized classifier matches the per-query loop.
+"""
+
+import numpy as np
+
+from classifier import best_hit_rows, classify_hit_table, classify_sequences
+from hit_table import HitTable
+
+
+def hit(db: str, subject_id: str, identity: float, evalue: float, bitscore: float) -> dict:
+    return {
+        "db": db,
+        "subject_id": subject_id,
+        "identity": identity,
+        "alignment_length": 100,
+        "evalue": evalue,
+        "bitscore": bitscore,
+    }
+
+
+RESULTS = {
+    # identical bitscore, E-value and identity: the first hit must win
+    "full_tie": [
+        hit("db1", "first", 99.0, 1e-30, 200.0),
+        hit("db1", "second", 99.0, 1e-30, 200.0),
+    ],
+    # same bitscore, E-value breaks the tie
+    "evalue_tie_break": [
+        hit("db1", "weaker", 95.0, 1e-20, 150.0),
+        hit("db1", "stronger", 95.0, 1e-40, 150.0),
+    ],
+    # same bitscore and E-value, identity breaks the tie
+    "identity_tie_break": [
+        hit("db1", "lower_identity", 90.0, 1e-10, 120.0),
+        hit("db1", "higher_identity", 97.0, 1e-10, 120.0),
+    ],
+    # normalization is per database, so both maxima tie at 1.0
+    "cross_database_tie": [
+        hit("db1", "db1_low", 99.0, 1e-30, 100.0),
+        hit("db1", "db1_best", 99.0, 1e-30, 300.0),
+        hit("db2", "db2_best", 99.0, 1e-50, 80.0),
+        hit("db2", "db2_low", 99.0, 1e-50, 40.0),
+    ],
+    # best raw hit fails the identity threshold
+    "thresholded": [
+        hit("db1", "too_divergent", 60.0, 1e-80, 500.0),
+        hit("db1", "accepted", 80.0, 1e-10, 90.0),
+    ],
+    "rejected": [hit("db2", "weak", 99.0, 1.0, 20.0)],
+    "no_hits": [],
+}
+
+
+def test_classify_hit_table_matches_per_query_loop():
+    table = HitTable.from_results(RESULTS)
+
+    expected = classify_sequences(RESULTS)
+
+    assert classify_hit_table(table) == expected
+    assert expected["full_tie"] == "first"
+    assert expected["evalue_tie_break"] == "stronger"
+    assert expected["identity_tie_break"] == "higher_identity"
+    assert expected["cross_database_tie"] == "db2_best"
+    assert expected["thresholded"] == "accepted"
+    assert expected["rejected"] == "Unclassified"
+    assert expected["no_hits"] == "Unclassified"
+
+
+def test_classify_hit_table_matches_with_custom_thresholds():
+    table = HitTable.from_results(RESULTS)
+
+    for evalue_threshold, identity_threshold in ((1e-25, 0.0), (1.0, 98.0), (1e-100, 70.0)):
+        assert classify_hit_table(table, evalue_threshold, identity_threshold) == classify_sequences(
+            RESULTS, evalue_threshold, identity_threshold
+        )
+
+
+def test_best_hit_rows_marks_queries_without_acceptable_hits():
+    table = HitTable.from_results(RESULTS)
+    best_rows = best_hit_rows(table)
+
+    codes = {query_id: code for code, query_id in enumerate(table.query_ids)}
+
+    assert best_rows[codes["rejected"]] == -1
+    assert best_rows[codes["no_hits"]] == -1
+    assert np.all(best_rows[[codes["full_tie"], codes["thresholded"]]] >= 0)
@@ -0,0 +1,149 @@
+# By Isabella Zuluaga
+
+"""
+Checks for the alias subject map, sketches, the catalog, and database
+fingerprints.
+"""
+
+import json
+import multiprocessing
+import os
+import stat
+import threading
+
+from database_manager import DatabaseManager, SubjectDatabaseMap, database_fingerprint
+from sketch import sketch_path
+
+
+FAKE_BLASTDBCMD = """#!/usr/bin/env python3
+import os, sys
+args = sys.argv[1:]
+name = os.path.basename(args[args.index("-db") + 1])
+# more stderr than a pipe buffer holds, written before any stdout
+sys.stderr.write("warning\\n" * 50000)
+sys.stderr.flush()
+print("shared")
+print(name + "_only")
+"""
+
+
+FAKE_SEQUENCE_BLASTDBCMD = """#!/usr/bin/env python3
+import sys
+# more stderr than a pipe buffer holds, while stdout is still being read
+sys.stderr.write("warning\\n" * 50000)
+sys.stderr.flush()
+print("ACGTTGCAACGTAGCTAGCTAGGATCGATCGA" * 4)
+"""
+
+
+def install_fake_blastdbcmd(tmp_path, monkeypatch, source=FAKE_BLASTDBCMD):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "blastdbcmd"
+    script.write_text(source)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+
+def test_subject_map_keeps_ids_shared_by_several_databases(tmp_path, monkeypatch):
+    install_fake_blastdbcmd(tmp_path, monkeypatch)
+
+    manager = DatabaseManager(str(tmp_path / "databases"))
+    alias_prefix = str(tmp_path / "alias" / "all_nucl")
+    os.makedirs(os.path.dirname(alias_prefix))
+    members = [str(tmp_path / "databases" / "A"), str(tmp_path / "databases" / "B")]
+
+    manager._build_subject_map(alias_prefix, members, {member: "1" for member in members})
+
+    subject_map = SubjectDatabaseMap(alias_prefix)
+    try:
+        subject_ids = ["shared", "A_only", "B_only", "unknown"]
+        assert subject_map.lookup(subject_ids) == {"A_only": "A", "B_only": "B"}
+        assert subject_map.ambiguous(subject_ids) == {"shared"}
+    finally:
+        subject_map.close()
+
+
+def test_sketch_build_does_not_block_on_stderr(tmp_path, monkeypatch):
+    install_fake_blastdbcmd(tmp_path, monkeypatch, FAKE_SEQUENCE_BLASTDBCMD)
+
+    manager = DatabaseManager(str(tmp_path / "databases"))
+    prefix = str(tmp_path / "databases" / "db0" / "db0")
+    os.makedirs(os.path.dirname(prefix))
+
+    build = threading.Thread(target=manager._build_sketch, args=(prefix, "nucl"), daemon=True)
+    build.start()
+    build.join(timeout=60)
+
+    assert not build.is_alive()
+    assert os.path.isfile(sketch_path(prefix))
+
+
+def catalog_worker(download_dir: str, db_name: str) -> None:
+    # rewritten in place, as a rebuild does: the directory's modification
+    # time stays the same, so only _update_catalog records the new size
+    with open(os.path.join(download_dir, db_name, f"{db_name}.nsq"), "w", encoding="utf-8") as volume:
+        volume.write("A" * 100)
+
+    manager = DatabaseManager(download_dir)
+    for _ in range(5):
+        manager._update_catalog(db_name)
+
+
+def test_concurrent_catalog_updates_keep_every_entry(tmp_path):
+    download_dir = tmp_path / "databases"
+    names = [f"db{number}" for number in range(6)]
+
+    for db_name in names:
+        (download_dir / db_name).mkdir(parents=True)
+        (download_dir / db_name / f"{db_name}.nsq").write_text("")
+
+    # every database is in the catalog before the concurrent rebuilds
+    DatabaseManager(str(download_dir)).catalog()
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=catalog_worker, args=(str(download_dir), db_name)) for db_name in names]
+
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    with open(download_dir / ".catalog" / "catalog.json", "r", encoding="utf-8") as catalog_file:
+        stored = json.load(catalog_file)
+
+    assert sorted(stored["databases"]) == names
+    assert all(stored["databases"][db_name]["size_bytes"] == 100 for db_name in names)
+
+
+def test_catalog_works_when_it_cannot_be_saved(tmp_path):
+    download_dir = tmp_path / "databases"
+    (download_dir / "db0").mkdir(parents=True)
+    (download_dir / "db0" / "db0.nsq").write_text("")
+
+    # a file where the catalog directory should be: saving fails with an
+    # OSError like in a read-only tree, even when running as root
+    (download_dir / ".catalog").write_text("")
+
+    assert list(DatabaseManager(str(download_dir)).catalog()) == ["db0"]
+
+
+def test_fingerprint_ignores_sidecar_files(tmp_path):
+    db_dir = tmp_path / "databases" / "db0"
+    db_dir.mkdir(parents=True)
+    prefix = str(db_dir / "db0")
+
+    for extension in (".nsq", ".nhr", ".nin", ".build"):
+        (db_dir / f"db0{extension}").write_text("blast")
+
+    before = database_fingerprint(prefix)
+
+    # sketch, moved-in FASTA and its index, record manifest
+    for sidecar in ("db0.sketch.npz", "db0.fasta", "db0.fasta.fxi", "db0.records.sqlite"):
+        (db_dir / sidecar).write_text("sidecar")
+
+    assert database_fingerprint(prefix) == before
+
+    (db_dir / "db0.build").write_text("rebuilt")
+
+    assert database_fingerprint(prefix) != before
@@ -0,0 +1,52 @@
+# By Isabella Zuluaga
+
+"""
+Checks for records sharing an ID in FastaIndex, and for indexing next to
+FASTA files that cannot get a sidecar.
+"""
+
+import pytest
+
+from fasta_index import FastaIndex
+
+
+def test_fetch_every_occurrence_of_a_duplicate_id(tmp_path):
+    fasta_path = tmp_path / "dup.fasta"
+    fasta_path.write_text(">a\nAAAA\n>b\nCCCC\n>a\nGGGGTT\n")
+
+    index = FastaIndex.open(str(fasta_path))
+    try:
+        assert index.ids() == ["a", "b", "a"]
+        assert index.duplicate_ids() == ["a"]
+        assert index.fetch("a") == "AAAA"
+        assert index.fetch("a", 1) == "GGGGTT"
+        assert index.entry("a", 1)[0] == 6
+
+        with pytest.raises(KeyError):
+            index.fetch("b", 1)
+    finally:
+        index.close()
+
+    # the same occurrences come back from the saved sidecar index
+    reloaded = FastaIndex.open(str(fasta_path))
+    try:
+        assert reloaded.fetch("a", 1) == "GGGGTT"
+    finally:
+        reloaded.close()
+
+
+def test_index_works_when_sidecar_cannot_be_written(tmp_path):
+    fasta_path = tmp_path / "reads.fasta"
+    fasta_path.write_text(">r1\nACGT\n>r2\nTTGGCC\n")
+
+    # a directory where the temporary sidecar goes: writing fails with an
+    # OSError like in a read-only tree, even when running as root
+    (tmp_path / "reads.fasta.fxi.tmp").mkdir()
+
+    index = FastaIndex.open(str(fasta_path))
+    try:
+        assert index.fetch("r2") == "TTGGCC"
+    finally:
+        index.close()
+
+    assert not (tmp_path / "reads.fasta.fxi").exists()
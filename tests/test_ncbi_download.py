@@ -0,0 +1,338 @@
+# By Patrick Bircher
+
+"""
+Checks for NcbiDownloader against a local HTTP server.
+"""
+
+import functools
+import hashlib
+import http.server
+import io
+import json
+import os
+import shutil
+import tarfile
+import threading
+
+import pytest
+
+import ncbi_download
+from ncbi_download import INSTALL_JOURNAL_EXTENSION, NcbiDownloader
+
+
+NUM_PARTS = 5
+
+
+def make_archive(path: str, members: dict[str, bytes]) -> None:
+    with tarfile.open(path, "w:gz") as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+
+def publish(serve_dir, db_name: str, with_metadata: bool) -> list[str]:
+    """
+    Write the archives of a fake multi-part database, with .md5 files
+    and optionally the metadata file, and return the archive names.
+    """
+    parts = [f"{db_name}.{number:02d}.tar.gz" for number in range(NUM_PARTS)]
+
+    for number, part in enumerate(parts):
+        path = os.path.join(serve_dir, part)
+        # some random payload, so the archives are not trivially small
+        make_archive(path, {
+            f"{db_name}.{number:02d}.nsq": os.urandom(50000),
+            f"{db_name}.{number:02d}.nhr": f"part {number}\n".encode("utf-8"),
+        })
+
+        with open(path, "rb") as archive:
+            digest = hashlib.md5(archive.read()).hexdigest()
+
+        with open(path + ".md5", "w", encoding="utf-8") as md5_file:
+            md5_file.write(f"{digest}  {part}\n")
+
+    if with_metadata:
+        metadata = {"dbname": db_name, "files": [f"ftp://example.org/blast/db/{part}" for part in parts]}
+
+        with open(os.path.join(serve_dir, f"{db_name}-nucl-metadata.json"), "w", encoding="utf-8") as metadata_file:
+            json.dump(metadata, metadata_file)
+
+    return parts
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(params=["curl", "urllib"])
+def client(request, monkeypatch):
+    """
+    Run a test with curl (if installed) and with the urllib fallback.
+    """
+    if request.param == "curl":
+        if not shutil.which("curl"):
+            pytest.skip("curl is not installed")
+    else:
+        which = shutil.which
+        monkeypatch.setattr(
+            ncbi_download.shutil, "which", lambda name: None if name == "curl" else which(name)
+        )
+    return request.param
+
+
+@pytest.fixture
+def http_server(tmp_path):
+    """
+    Serve tmp_path/served over HTTP; yields (served directory, base URL).
+    """
+    serve_dir = tmp_path / "served"
+    serve_dir.mkdir()
+
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(QuietHandler, directory=str(serve_dir))
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        yield str(serve_dir), f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def assert_installed(db_dir, db_name: str, parts: list[str]) -> None:
+    files = set(os.listdir(db_dir))
+
+    for number in range(len(parts)):
+        assert f"{db_name}.{number:02d}.nsq" in files
+        assert f"{db_name}.{number:02d}.nhr" in files
+
+    assert db_name + INSTALL_JOURNAL_EXTENSION not in files
+    assert not [name for name in files if name.endswith((".tar.gz", ".part", ".journal"))]
+    assert not [name for name in files if name.startswith(".")]
+
+
+@pytest.mark.parametrize("mode", ["stream", "staged"])
+@pytest.mark.parametrize("with_metadata", [True, False], ids=["metadata", "probing"])
+def test_install_extracts_every_part(http_server, client, tmp_path, mode, with_metadata):
+    serve_dir, base_url = http_server
+    parts = publish(serve_dir, "mydb", with_metadata)
+    db_dir = tmp_path / "databases" / "mydb"
+    db_dir.mkdir(parents=True)
+
+    downloader = NcbiDownloader(base_url, connections=3, mode=mode)
+
+    assert downloader.list_parts("mydb", "nucl") == parts
+    assert downloader.install("mydb", "nucl", str(db_dir)) == parts
+    assert_installed(db_dir, "mydb", parts)
+
+
+# ---------------------------------------------------------------------------
+# Interrupted, corrupt, and non-resumable transfers
+# ---------------------------------------------------------------------------
+
+class FaultHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Range-capable file server that injects faults into the first GET of
+    selected files (server.faults maps a file name to a set of faults):
+
+    - 'cut': send the headers of the whole file, half the body, and close
+    - 'corrupt': send a body of the right length with flipped bytes
+    - 'norange': ignore Range requests and answer 200 with the whole file
+
+    Every GET is logged in server.requests as (file name, Range header).
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def respond(self, send_body: bool) -> None:
+        name = self.path.lstrip("/")
+        path = os.path.join(self.server.serve_dir, name)
+
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        with open(path, "rb") as served:
+            data = served.read()
+
+        faults = self.server.faults.get(name, set())
+        range_header = self.headers.get("Range")
+
+        if send_body:
+            with self.server.lock:
+                first = all(logged != name for logged, _ in self.server.requests)
+                self.server.requests.append((name, range_header))
+        else:
+            first = False
+
+        status, start = 200, 0
+
+        if range_header and "norange" not in faults:
+            start = int(range_header.split("=", 1)[1].split("-", 1)[0])
+            status = 206
+
+        body = data[start:]
+
+        if first and "corrupt" in faults:
+            body = bytes(byte ^ 0xFF for byte in body)
+
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+        if not send_body:
+            return
+
+        if first and "cut" in faults:
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def fault_server(tmp_path, monkeypatch):
+    """
+    Serve tmp_path/served through FaultHandler; yields the server, with
+    serve_dir, faults, requests, and base_url set.
+    """
+    monkeypatch.setattr(ncbi_download, "RETRY_DELAY_SECONDS", 0)
+
+    serve_dir = tmp_path / "served"
+    serve_dir.mkdir()
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FaultHandler)
+    server.serve_dir = str(serve_dir)
+    server.faults = {}
+    server.requests = []
+    server.lock = threading.Lock()
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def archive_requests(server, name: str) -> list:
+    return [range_header for logged, range_header in server.requests if logged == name]
+
+
+def install_staged(server, tmp_path) -> tuple[list[str], object]:
+    db_dir = tmp_path / "databases" / "mydb"
+    db_dir.mkdir(parents=True, exist_ok=True)
+    downloader = NcbiDownloader(server.base_url, connections=3, mode="staged")
+    return downloader.install("mydb", "nucl", str(db_dir)), db_dir
+
+
+def test_interrupted_transfer_resumes_with_range(fault_server, client, tmp_path):
+    parts = publish(fault_server.serve_dir, "mydb", with_metadata=True)
+    fault_server.faults[parts[1]] = {"cut"}
+    size = os.path.getsize(os.path.join(fault_server.serve_dir, parts[1]))
+
+    installed, db_dir = install_staged(fault_server, tmp_path)
+
+    assert installed == parts
+    assert_installed(db_dir, "mydb", parts)
+
+    first, retry = archive_requests(fault_server, parts[1])
+    assert first is None
+    assert retry == f"bytes={size // 2}-"
+
+    for part in parts[:1] + parts[2:]:
+        assert archive_requests(fault_server, part) == [None]
+
+
+def test_corrupt_part_is_fetched_again_alone(fault_server, client, tmp_path):
+    parts = publish(fault_server.serve_dir, "mydb", with_metadata=True)
+    fault_server.faults[parts[3]] = {"corrupt"}
+
+    installed, db_dir = install_staged(fault_server, tmp_path)
+
+    assert installed == parts
+    assert_installed(db_dir, "mydb", parts)
+
+    # the failed MD5 check restarts that part from scratch
+    assert archive_requests(fault_server, parts[3]) == [None, None]
+
+    for part in parts[:3] + parts[4:]:
+        assert archive_requests(fault_server, part) == [None]
+
+
+def test_full_response_to_range_request_restarts_transfer(fault_server, client, tmp_path):
+    parts = publish(fault_server.serve_dir, "mydb", with_metadata=True)
+    fault_server.faults[parts[0]] = {"cut", "norange"}
+    size = os.path.getsize(os.path.join(fault_server.serve_dir, parts[0]))
+
+    installed, db_dir = install_staged(fault_server, tmp_path)
+
+    assert installed == parts
+    assert_installed(db_dir, "mydb", parts)
+
+    # cut, resume refused with a 200, then a clean restart from byte 0
+    assert archive_requests(fault_server, parts[0]) == [None, f"bytes={size // 2}-", None]
+
+
+def test_existing_archive_is_checked_before_reuse(fault_server, client, tmp_path):
+    parts = publish(fault_server.serve_dir, "mydb", with_metadata=True)
+    db_dir = tmp_path / "databases" / "mydb"
+    db_dir.mkdir(parents=True)
+
+    # an earlier run left one good and one damaged archive behind
+    shutil.copy(os.path.join(fault_server.serve_dir, parts[0]), db_dir / parts[0])
+    (db_dir / parts[2]).write_bytes(b"not the published archive")
+
+    installed, db_dir = install_staged(fault_server, tmp_path)
+
+    assert installed == parts
+    assert_installed(db_dir, "mydb", parts)
+    assert archive_requests(fault_server, parts[0]) == []
+    assert archive_requests(fault_server, parts[2]) == [None]
+
+
+def test_archive_failing_extraction_is_deleted(fault_server, client, tmp_path):
+    parts = publish(fault_server.serve_dir, "mydb", with_metadata=True)
+    broken = os.path.join(fault_server.serve_dir, parts[2])
+    good = open(broken, "rb").read()
+
+    # the published digest matches, but the archive cannot be extracted
+    with open(broken, "wb") as archive:
+        archive.write(b"not a tar.gz archive")
+    with open(broken + ".md5", "w", encoding="utf-8") as md5_file:
+        md5_file.write(hashlib.md5(b"not a tar.gz archive").hexdigest() + "\n")
+
+    with pytest.raises(RuntimeError, match="Extraction failed"):
+        install_staged(fault_server, tmp_path)
+
+    db_dir = tmp_path / "databases" / "mydb"
+    assert not (db_dir / parts[2]).exists()
+
+    with open(broken, "wb") as archive:
+        archive.write(good)
+    with open(broken + ".md5", "w", encoding="utf-8") as md5_file:
+        md5_file.write(hashlib.md5(good).hexdigest() + "\n")
+
+    installed, db_dir = install_staged(fault_server, tmp_path)
+
+    assert installed == parts
+    assert_installed(db_dir, "mydb", parts)
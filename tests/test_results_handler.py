@@ -0,0 +1,65 @@
+# By Isabella Zuluaga
+
+"""
+Checks for updating saved results with hits from new databases.
+"""
+
+import pytest
+
+from hit_table import HitTable
+from results_handler import ResultsWriter, load_text_results, saved_run_databases, update_results
+
+
+def hit(database: str, subject_id: str, bitscore: float) -> dict:
+    return {
+        "database": database,
+        "subject_id": subject_id,
+        "identity": 99.0,
+        "alignment_length": 100,
+        "evalue": 1e-30,
+        "bitscore": bitscore,
+    }
+
+
+def fingerprint(databases: dict, config: str = "config-1") -> dict:
+    return {"query_file": "queries/q.fasta", "databases": databases, "config": config}
+
+
+@pytest.fixture
+def saved_run(tmp_path, monkeypatch):
+    """Finished text results of q1/q2 searched against db1 only."""
+    monkeypatch.chdir(tmp_path)
+
+    with ResultsWriter("queries/q.fasta", fingerprint=fingerprint({"databases/db1/db1": "v1"})) as writer:
+        writer.write({"q1": [hit("db1", "s1", 100.0)], "q2": []})
+
+    return "queries/q.fasta"
+
+
+def test_text_results_are_updated_with_new_database(saved_run):
+    updated = fingerprint({"databases/db1/db1": "v1", "databases/db2/db2": "v1"})
+
+    assert saved_run_databases(saved_run, updated) == {"databases/db1/db1": "v1"}
+
+    new_hits = HitTable.from_results({"q1": [], "q2": [hit("db2", "s2", 80.0)]})
+    merged, changed = update_results(saved_run, new_hits, set(), updated)
+
+    assert changed == ["q2"]
+
+    table, copies, filters = load_text_results("results/q/q_results.txt")
+    assert list(table.query_ids) == ["q1", "q2"]
+    assert [table.subject_ids[code] for code in table.subject] == ["s1", "s2"]
+    assert copies is None and filters is None
+
+    # the journal now records db2, so there is nothing left to update
+    assert saved_run_databases(saved_run, updated) == updated["databases"]
+
+
+def test_update_is_refused_when_config_changed(saved_run):
+    with pytest.raises(ValueError, match="config"):
+        saved_run_databases(saved_run, fingerprint({"databases/db1/db1": "v1"}, config="config-2"))
+
+
+def test_update_needs_finished_results(saved_run):
+    with pytest.raises(FileNotFoundError):
+        saved_run_databases("queries/other.fasta", fingerprint({}))